@@ -4,3 +4,8 @@ class NotificacionesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.notificaciones'
     label = 'notificaciones'
+
+    def ready(self):
+        from .cache import tipos_notificacion, estados_notificacion
+        tipos_notificacion.conectar()
+        estados_notificacion.conectar()
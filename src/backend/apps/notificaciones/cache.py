@@ -0,0 +1,6 @@
+from backend.services.catalogos import CatalogoCache
+from .models import TipoNotificacion, EstadoNotificacion
+
+# Tablas de referencia de notificaciones
+tipos_notificacion = CatalogoCache(TipoNotificacion)
+estados_notificacion = CatalogoCache(EstadoNotificacion)
@@ -32,6 +32,9 @@ class Notificacion(models.Model):
 
     class Meta:
         ordering = ['-fecha_creacion']
+        indexes = [
+            models.Index(fields=['usuario', '-fecha_creacion', '-id']),
+        ]
 
     def __str__(self):
         return f"Notificación {self.id} - {self.usuario.email} - {self.tipo.nombre}"
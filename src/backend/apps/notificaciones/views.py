@@ -3,6 +3,7 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.utils import timezone
 from .models import Notificacion, TipoNotificacion, EstadoNotificacion
+from .cache import tipos_notificacion
 from .serializers import (
     NotificacionSerializer,
     TipoNotificacionSerializer,
@@ -14,7 +15,7 @@ class NotificacionViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return Notificacion.objects.filter(usuario=self.request.user)
+        return Notificacion.objects.filter(usuario=self.request.user).select_related('tipo', 'estado')
 
     def perform_create(self, serializer):
         serializer.save(usuario=self.request.user)
@@ -39,7 +40,9 @@ class NotificacionViewSet(viewsets.ModelViewSet):
             # Asumimos que el estado inicial es el ID 1 (PENDIENTE) o similar
             # Esto requeriría fixtures o lógica de inicialización.
             # Para evitar errores si no existen datos, validamos primero.
-            if not TipoNotificacion.objects.filter(id=tipo_id).exists():
+            try:
+                tipos_notificacion.por_id(tipo_id)
+            except (TipoNotificacion.DoesNotExist, ValueError):
                  return Response({"error": "Tipo de notificación no válido"}, status=status.HTTP_400_BAD_REQUEST)
             
             # Crear la notificación
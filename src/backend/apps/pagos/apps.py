@@ -4,3 +4,8 @@ class PagosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.pagos'
     label = 'pagos'
+
+    def ready(self):
+        from .cache import metodos_pago, estados_pago
+        metodos_pago.conectar()
+        estados_pago.conectar()
@@ -0,0 +1,6 @@
+from backend.services.catalogos import CatalogoCache
+from .models import MetodoPago, EstadoPago
+
+# Tablas de referencia consultadas en cada checkout y en cada cambio de pago
+metodos_pago = CatalogoCache(MetodoPago)
+estados_pago = CatalogoCache(EstadoPago)
@@ -0,0 +1,43 @@
+from django.test import TestCase
+from apps.pagos.models import MetodoPago, EstadoPago
+from apps.pagos.cache import metodos_pago, estados_pago
+
+
+class TestCatalogoCache(TestCase):
+    def setUp(self):
+        self.metodo = MetodoPago.objects.create(nombre="Efectivo", activo=True)
+
+    def test_por_nombre_cachea(self):
+        """Test that repeated lookups by normalized name skip the database"""
+        self.assertEqual(metodos_pago.por_nombre("  EFECTIVO ").id, self.metodo.id)
+        with self.assertNumQueries(0):
+            self.assertEqual(metodos_pago.por_nombre("efectivo").id, self.metodo.id)
+
+    def test_por_id_cachea(self):
+        """Test that repeated lookups by id skip the database"""
+        metodos_pago.por_id(self.metodo.id)
+        with self.assertNumQueries(0):
+            self.assertEqual(metodos_pago.por_id(self.metodo.id).nombre, "Efectivo")
+
+    def test_invalidacion_al_guardar(self):
+        """Test that saving a row invalidates cached entries"""
+        metodos_pago.por_nombre("Efectivo")
+        self.metodo.activo = False
+        self.metodo.save()
+        self.assertFalse(metodos_pago.por_nombre("Efectivo").activo)
+
+    def test_invalidacion_al_eliminar(self):
+        """Test that deleting a row invalidates cached entries"""
+        metodos_pago.por_id(self.metodo.id)
+        metodo_id = self.metodo.id
+        self.metodo.delete()
+        with self.assertRaises(MetodoPago.DoesNotExist):
+            metodos_pago.por_id(metodo_id)
+
+    def test_obtener_o_crear(self):
+        """Test that missing rows are created once and then served from cache"""
+        estado = estados_pago.obtener_o_crear("Pendiente")
+        self.assertEqual(EstadoPago.objects.filter(nombre="Pendiente").count(), 1)
+        estados_pago.por_nombre("Pendiente")
+        with self.assertNumQueries(0):
+            self.assertEqual(estados_pago.obtener_o_crear("pendiente").id, estado.id)
@@ -16,9 +16,10 @@ class PagoViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         user = self.request.user
+        pagos = Pago.objects.select_related('estado', 'metodo_pago').prefetch_related('transacciones')
         if getattr(user, 'rol', None) in ['admin', 'comprador']:
-            return Pago.objects.all()
-        return Pago.objects.filter(usuario=user)
+            return pagos
+        return pagos.filter(usuario=user)
 
     def perform_create(self, serializer):
         # Asignar automáticamente el usuario actual
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Tienda, Producto, Pedido, DetallePedido
+from .models import Tienda, Producto, Pedido, DetallePedido, recalculo_total_diferido
 
 
 @admin.register(Tienda)
@@ -112,6 +112,11 @@ class PedidoAdmin(admin.ModelAdmin):
     def total_display(self, obj):
         return f"${obj.total}"
 
+    def save_related(self, request, form, formsets, change):
+        """Guarda los detalles inline y recalcula el total una sola vez."""
+        with recalculo_total_diferido():
+            super().save_related(request, form, formsets, change)
+
     def marcar_como_preparando(self, request, queryset):
         queryset.filter(estado='pendiente').update(estado='preparando')
         self.message_user(request, "Pedidos marcados como en preparación")
@@ -5,3 +5,11 @@ class ProductosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.productos'
     label = 'productos'
+
+    def ready(self):
+        from backend.services.cache import invalidar_al_guardar
+        from .cache import TAG_CATALOGO
+        from .models import Pedido, Producto, Seccion, Tienda
+        invalidar_al_guardar(Pedido, "pedidos")
+        for model in (Producto, Tienda, Seccion):
+            invalidar_al_guardar(model, TAG_CATALOGO)
@@ -0,0 +1,29 @@
+from django.db.models import Count, Max
+
+from backend.services.cache import get_or_set
+
+TAG_CATALOGO = "catalogo"
+
+
+def ultima_modificacion_catalogo():
+    """
+    Retorna (fecha, total_productos) del catálogo: la mayor `fecha_actualizacion`
+    de Producto, Tienda y Seccion y la cantidad de productos (para detectar
+    eliminaciones). Se cachea bajo TAG_CATALOGO, así las peticiones repetidas
+    no consultan la base de datos.
+    """
+    from .models import Producto, Seccion, Tienda
+
+    def calcular():
+        productos = Producto.objects.aggregate(
+            ultima=Max("fecha_actualizacion"), total=Count("id")
+        )
+        fechas = [
+            productos["ultima"],
+            Tienda.objects.aggregate(ultima=Max("fecha_actualizacion"))["ultima"],
+            Seccion.objects.aggregate(ultima=Max("fecha_actualizacion"))["ultima"],
+        ]
+        fechas = [fecha for fecha in fechas if fecha is not None]
+        return (max(fechas) if fechas else None, productos["total"])
+
+    return get_or_set("catalogo:ultima_modificacion", calcular, tags=(TAG_CATALOGO,))
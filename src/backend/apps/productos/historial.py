@@ -0,0 +1,128 @@
+import datetime
+import gzip
+import json
+import os
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .models import HistorialRecarga, ResumenMensualRecargas
+
+CAMPOS_ARCHIVO = (
+    "id", "producto_id", "cantidad", "stock_anterior", "stock_nuevo",
+    "tipo", "usuario_id", "notas", "fecha_creacion",
+)
+
+
+class ArchivoHistorialRecargas:
+    """
+    Retención de HistorialRecarga por meses.
+
+    El historial de los meses completos anteriores a la ventana de retención
+    (HISTORIAL_RECARGAS_RETENCION_DIAS) se mueve, mes a mes, a un archivo
+    `historial_recargas_AAAA-MM.jsonl.gz` en HISTORIAL_RECARGAS_DIR, se suma
+    a ResumenMensualRecargas (recargas y cantidad por producto) y se borra de
+    la tabla. Así la tabla solo guarda la ventana de retención y los totales
+    históricos salen de los resúmenes.
+
+    Cada mes se procesa en su propia transacción. Si falla después de
+    escribir el archivo, la siguiente ejecución vuelve a agregar esas filas:
+    el `id` de cada línea permite descartar duplicados al leer el archivo.
+
+    Sin directorio configurado no se borra nada: el archivo es la única copia
+    de esas filas.
+    """
+
+    def __init__(self, dias=None, directorio=None, lote=2000):
+        self.dias = dias if dias is not None else getattr(settings, "HISTORIAL_RECARGAS_RETENCION_DIAS", 365)
+        self.directorio = directorio or getattr(settings, "HISTORIAL_RECARGAS_DIR", "")
+        self.lote = lote
+
+    def limite(self, ahora=None):
+        """Inicio (local) del mes que contiene el borde de la retención: se archiva lo anterior."""
+        borde = timezone.localtime((ahora or timezone.now()) - datetime.timedelta(days=self.dias))
+        return borde.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+    def meses_pendientes(self, ahora=None):
+        return list(
+            HistorialRecarga.objects.filter(fecha_creacion__lt=self.limite(ahora))
+            .annotate(mes=TruncMonth("fecha_creacion", tzinfo=timezone.get_current_timezone()))
+            .order_by("mes").values_list("mes", flat=True).distinct()
+        )
+
+    @staticmethod
+    def _mes_siguiente(inicio):
+        siguiente = (inicio.replace(tzinfo=None) + datetime.timedelta(days=32)).replace(day=1)
+        return timezone.make_aware(siguiente)
+
+    def ruta(self, mes):
+        return os.path.join(self.directorio, f"historial_recargas_{mes:%Y-%m}.jsonl.gz")
+
+    def archivar(self, dry_run=False, ahora=None):
+        """
+        Archiva todos los meses pendientes. Retorna una lista de dicts
+        {"mes", "filas", "archivo"}; con `dry_run` solo cuenta las filas.
+        """
+        if not dry_run and not self.directorio:
+            raise ImproperlyConfigured(
+                "HISTORIAL_RECARGAS_DIR no está configurado: se necesita un directorio persistente para archivar"
+            )
+        resultados = []
+        for mes in self.meses_pendientes(ahora):
+            inicio = timezone.localtime(mes)
+            filas = HistorialRecarga.objects.filter(
+                fecha_creacion__gte=inicio, fecha_creacion__lt=self._mes_siguiente(inicio)
+            )
+            if dry_run:
+                resultados.append({"mes": inicio.date(), "filas": filas.count(), "archivo": self.ruta(inicio)})
+            else:
+                resultados.append(self._archivar_mes(inicio, filas))
+        return resultados
+
+    def _archivar_mes(self, inicio, filas):
+        os.makedirs(self.directorio, exist_ok=True)
+        ruta = self.ruta(inicio)
+        totales = defaultdict(lambda: [0, 0])
+        ultimo_id = None
+        cantidad = 0
+        with transaction.atomic():
+            # "at" agrega un miembro gzip nuevo si el mes ya tenía archivo
+            with gzip.open(ruta, "at", encoding="utf-8") as archivo:
+                for fila in filas.order_by("id").values(*CAMPOS_ARCHIVO).iterator(chunk_size=self.lote):
+                    archivo.write(json.dumps(fila, cls=DjangoJSONEncoder) + "\n")
+                    totales[fila["producto_id"]][0] += 1
+                    totales[fila["producto_id"]][1] += fila["cantidad"]
+                    ultimo_id = fila["id"]
+                    cantidad += 1
+            if ultimo_id is not None:
+                self._sumar_resumenes(inicio.date(), totales)
+                # Solo lo escrito en el archivo
+                filas.filter(id__lte=ultimo_id).delete()
+        return {"mes": inicio.date(), "filas": cantidad, "archivo": ruta}
+
+    @staticmethod
+    def _sumar_resumenes(mes, totales):
+        existentes = {
+            resumen.producto_id: resumen
+            for resumen in ResumenMensualRecargas.objects.select_for_update().filter(
+                mes=mes, producto_id__in=list(totales)
+            )
+        }
+        actualizar, nuevos = [], []
+        for producto_id, (recargas, cantidad) in totales.items():
+            resumen = existentes.get(producto_id)
+            if resumen is None:
+                nuevos.append(ResumenMensualRecargas(
+                    producto_id=producto_id, mes=mes, recargas=recargas, cantidad_total=cantidad,
+                ))
+            else:
+                resumen.recargas += recargas
+                resumen.cantidad_total += cantidad
+                actualizar.append(resumen)
+        ResumenMensualRecargas.objects.bulk_update(actualizar, ["recargas", "cantidad_total"])
+        ResumenMensualRecargas.objects.bulk_create(nuevos)
@@ -0,0 +1,103 @@
+import datetime
+import hashlib
+import json
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import SolicitudIdempotente
+
+
+class Idempotencia:
+    """
+    Soporte de la cabecera `Idempotency-Key` para acciones que modifican datos.
+
+    - La primera petición con una clave ejecuta la acción y, en la misma
+      transacción, registra su respuesta en SolicitudIdempotente.
+    - Un reintento con la misma clave y el mismo cuerpo recibe la respuesta
+      registrada (con `Idempotent-Replayed: true`) sin ejecutar nada.
+    - La misma clave con otro cuerpo se rechaza con 422.
+    - Dos peticiones simultáneas con la misma clave chocan en la restricción
+      única: la segunda se revierte completa y responde lo de la primera.
+
+    Solo se registran las respuestas exitosas (un error no cambió datos y
+    puede reintentarse). Las claves vencen a las IDEMPOTENCIA_HORAS.
+    """
+
+    CABECERA = "Idempotency-Key"
+    LONGITUD_MAXIMA = 255
+
+    def __init__(self, request, accion):
+        self.usuario = request.user
+        self.accion = accion
+        self.clave = request.headers.get(self.CABECERA)
+        self.huella = hashlib.sha256(
+            json.dumps(request.data, cls=JSONEncoder, sort_keys=True, separators=(",", ":")).encode("utf-8")
+        ).hexdigest()
+
+    @staticmethod
+    def vencimiento():
+        return timezone.now() - datetime.timedelta(hours=getattr(settings, "IDEMPOTENCIA_HORAS", 24))
+
+    @classmethod
+    def purgar(cls):
+        """Borra las claves vencidas. Retorna la cantidad borrada."""
+        borradas, _ = SolicitudIdempotente.objects.filter(fecha_creacion__lt=cls.vencimiento()).delete()
+        return borradas
+
+    def _previa(self):
+        previa = SolicitudIdempotente.objects.filter(
+            usuario=self.usuario, accion=self.accion, clave=self.clave
+        ).first()
+        if previa is not None and previa.fecha_creacion < self.vencimiento():
+            previa.delete()
+            return None
+        return previa
+
+    def _repetir(self, previa):
+        if previa.huella != self.huella:
+            return Response(
+                {"error": f"La clave {self.CABECERA} ya se usó con otro cuerpo de petición"},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            )
+        response = Response(previa.respuesta, status=previa.codigo)
+        response["Idempotent-Replayed"] = "true"
+        return response
+
+    def ejecutar(self, accion):
+        """
+        Ejecuta `accion() -> (codigo, datos)` en una transacción y retorna la
+        Response, o la respuesta registrada si la clave ya se usó.
+        """
+        if not self.clave:
+            with transaction.atomic():
+                codigo, datos = accion()
+            return Response(datos, status=codigo)
+        if len(self.clave) > self.LONGITUD_MAXIMA:
+            return Response(
+                {"error": f"{self.CABECERA} admite hasta {self.LONGITUD_MAXIMA} caracteres"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        previa = self._previa()
+        if previa is not None:
+            return self._repetir(previa)
+        try:
+            with transaction.atomic():
+                codigo, datos = accion()
+                if codigo < 400:
+                    SolicitudIdempotente.objects.create(
+                        usuario=self.usuario, accion=self.accion, clave=self.clave,
+                        huella=self.huella, codigo=codigo, respuesta=datos,
+                    )
+        except IntegrityError:
+            # Otra petición con la misma clave se confirmó primero
+            previa = self._previa()
+            if previa is None:
+                raise
+            return self._repetir(previa)
+        return Response(datos, status=codigo)
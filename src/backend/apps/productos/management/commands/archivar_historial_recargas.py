@@ -0,0 +1,63 @@
+"""
+Comando de gestión para archivar el historial de recargas fuera de la
+ventana de retención en archivos JSONL comprimidos (uno por mes), dejando
+resúmenes mensuales por producto. Requiere --directorio o
+HISTORIAL_RECARGAS_DIR apuntando a un disco persistente: las filas archivadas
+se borran de la tabla.
+
+Uso:
+    python manage.py archivar_historial_recargas
+    python manage.py archivar_historial_recargas --dias 180 --directorio /backups/recargas
+"""
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.productos.historial import ArchivoHistorialRecargas
+
+
+class Command(BaseCommand):
+    help = 'Mueve el historial de recargas anterior a la retención a archivos .jsonl.gz'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dias',
+            type=int,
+            default=None,
+            help='Días de historial a conservar en la tabla (default: HISTORIAL_RECARGAS_RETENCION_DIAS)',
+        )
+        parser.add_argument(
+            '--directorio',
+            default=None,
+            help='Directorio de los archivos (default: HISTORIAL_RECARGAS_DIR)',
+        )
+        parser.add_argument('--lote', type=int, default=2000, help='Filas leídas por consulta (default: 2000)')
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Muestra qué meses se archivarían sin hacer cambios',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        if dry_run:
+            self.stdout.write(self.style.WARNING('🔍 Modo DRY RUN - No se harán cambios reales'))
+
+        archivo = ArchivoHistorialRecargas(
+            dias=options['dias'], directorio=options['directorio'], lote=options['lote'],
+        )
+        self.stdout.write(f'\n📦 Archivando historial anterior a {archivo.limite():%Y-%m-%d}...\n')
+
+        try:
+            resultados = archivo.archivar(dry_run=dry_run)
+        except (ImproperlyConfigured, OSError) as e:
+            raise CommandError(str(e))
+
+        for resultado in resultados:
+            self.stdout.write(self.style.SUCCESS(
+                f"✅ {resultado['mes']:%Y-%m}: {resultado['filas']} filas → {resultado['archivo']}"
+            ))
+
+        total = sum(resultado['filas'] for resultado in resultados)
+        accion = 'a archivar' if dry_run else 'archivadas'
+        self.stdout.write(self.style.SUCCESS(f'\n✨ Filas {accion}: {total} en {len(resultados)} meses'))
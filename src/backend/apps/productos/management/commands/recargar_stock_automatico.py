@@ -8,7 +8,8 @@ Uso:
 
 from django.core.management.base import BaseCommand
 from django.utils import timezone
-from apps.productos.models import StockConfig, HistorialRecarga
+from apps.productos.models import StockConfig
+from apps.productos.services import RecargaStock
 
 
 class Command(BaseCommand):
@@ -27,56 +28,25 @@ class Command(BaseCommand):
         if dry_run:
             self.stdout.write(self.style.WARNING('🔍 Modo DRY RUN - No se harán cambios reales'))
         
-        # Obtener todas las configuraciones activas
-        configs = StockConfig.objects.filter(recarga_automatica_activa=True).select_related('producto')
-        
-        self.stdout.write(f'\n📦 Verificando {configs.count()} configuraciones de stock...\n')
-        
-        recargas_realizadas = 0
-        productos_procesados = []
-        
-        for config in configs:
-            producto = config.producto
-            
-            if config.necesita_recarga():
-                stock_anterior = producto.stock
-                
-                if not dry_run:
-                    # Registrar en historial antes de recargar
-                    HistorialRecarga.objects.create(
-                        producto=producto,
-                        cantidad=config.cantidad_recarga,
-                        stock_anterior=stock_anterior,
-                        stock_nuevo=stock_anterior + config.cantidad_recarga,
-                        tipo='automatica',
-                        notas=f'Recarga automática. Stock mínimo: {config.stock_minimo}'
-                    )
-                    
-                    # Ejecutar recarga
-                    config.ejecutar_recarga()
-                    producto.refresh_from_db()
-                
-                stock_nuevo = stock_anterior + config.cantidad_recarga if dry_run else producto.stock
-                
-                self.stdout.write(
-                    self.style.SUCCESS(
-                        f'✅ {producto.nombre}: {stock_anterior} → {stock_nuevo} '
-                        f'(+{config.cantidad_recarga})'
-                    )
+        activas = StockConfig.objects.filter(recarga_automatica_activa=True).count()
+        self.stdout.write(f'\n📦 Verificando {activas} configuraciones de stock...\n')
+
+        # Recarga por conjuntos: un SELECT de candidatos y UPDATE/INSERT en lote
+        recargas = RecargaStock.ejecutar(dry_run=dry_run)
+
+        for recarga in recargas:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f'✅ {recarga["nombre"]}: {recarga["stock_anterior"]} → {recarga["stock_nuevo"]} '
+                    f'(+{recarga["cantidad_agregada"]})'
                 )
-                
-                recargas_realizadas += 1
-                productos_procesados.append({
-                    'nombre': producto.nombre,
-                    'stock_anterior': stock_anterior,
-                    'stock_nuevo': stock_nuevo,
-                    'cantidad_agregada': config.cantidad_recarga
-                })
+            )
+        recargas_realizadas = len(recargas)
         
         # Resumen
         self.stdout.write('\n' + '='*60)
         self.stdout.write(self.style.SUCCESS(f'\n✨ Proceso completado'))
-        self.stdout.write(f'   • Configuraciones revisadas: {configs.count()}')
+        self.stdout.write(f'   • Configuraciones revisadas: {activas}')
         self.stdout.write(f'   • Recargas realizadas: {recargas_realizadas}')
         self.stdout.write(f'   • Fecha: {timezone.now().strftime("%Y-%m-%d %H:%M:%S")}')
         
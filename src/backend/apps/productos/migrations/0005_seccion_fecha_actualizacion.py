@@ -0,0 +1,18 @@
+# Generated by Django 5.0.4 on 2026-10-18 10:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0004_seccion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='seccion',
+            name='fecha_actualizacion',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
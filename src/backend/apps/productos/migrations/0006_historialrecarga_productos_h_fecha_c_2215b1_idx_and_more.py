@@ -0,0 +1,23 @@
+# Generated by Django 5.0.4 on 2026-10-18 10:24
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0005_seccion_fecha_actualizacion'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='historialrecarga',
+            index=models.Index(fields=['-fecha_creacion', '-id'], name='productos_h_fecha_c_2215b1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pedido',
+            index=models.Index(fields=['-fecha_creacion', '-id'], name='productos_p_fecha_c_01cd1d_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.0.4 on 2026-10-18 11:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0006_historialrecarga_productos_h_fecha_c_2215b1_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='stockconfig',
+            index=models.Index(condition=models.Q(('recarga_automatica_activa', True)), fields=['producto', 'stock_minimo'], name='stockconfig_activa_umbral_idx'),
+        ),
+    ]
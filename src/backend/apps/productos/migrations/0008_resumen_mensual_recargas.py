@@ -0,0 +1,33 @@
+# Generated by Django 5.0.4 on 2026-10-18 11:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0007_stockconfig_indice_umbral'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenMensualRecargas',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mes', models.DateField(help_text='Primer día del mes (hora local)')),
+                ('recargas', models.PositiveIntegerField(default=0)),
+                ('cantidad_total', models.PositiveIntegerField(default=0)),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumenes_recargas', to='productos.producto')),
+            ],
+            options={
+                'verbose_name': 'Resumen Mensual de Recargas',
+                'verbose_name_plural': 'Resúmenes Mensuales de Recargas',
+                'ordering': ['-mes'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='resumenmensualrecargas',
+            constraint=models.UniqueConstraint(fields=('producto', 'mes'), name='resumen_recargas_producto_mes_unico'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.0.4 on 2026-10-18 11:56
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0008_resumen_mensual_recargas'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SolicitudIdempotente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('accion', models.CharField(max_length=50)),
+                ('clave', models.CharField(max_length=255)),
+                ('huella', models.CharField(help_text='SHA-256 del cuerpo de la petición', max_length=64)),
+                ('codigo', models.PositiveSmallIntegerField()),
+                ('respuesta', models.JSONField()),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='solicitudes_idempotentes', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Solicitud Idempotente',
+                'verbose_name_plural': 'Solicitudes Idempotentes',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='solicitudidempotente',
+            constraint=models.UniqueConstraint(fields=('usuario', 'accion', 'clave'), name='solicitud_idempotente_unica'),
+        ),
+    ]
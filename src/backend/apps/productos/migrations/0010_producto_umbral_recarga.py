@@ -0,0 +1,40 @@
+# Generated by Django 5.0.4 on 2026-10-18 12:26
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copiar_umbrales(apps, schema_editor):
+    """Copia el stock mínimo de las configuraciones activas a sus productos."""
+    Producto = apps.get_model('productos', 'Producto')
+    StockConfig = apps.get_model('productos', 'StockConfig')
+    Producto.objects.update(umbral_recarga=Subquery(
+        StockConfig.objects.filter(producto=OuterRef('pk'), recarga_automatica_activa=True)
+        .order_by().values('stock_minimo')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0009_solicitud_idempotente'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='stockconfig',
+            name='stockconfig_activa_umbral_idx',
+        ),
+        migrations.AddField(
+            model_name='producto',
+            name='umbral_recarga',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(copiar_umbrales, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(condition=models.Q(('stock__lte', models.F('umbral_recarga'))), fields=['umbral_recarga'], name='producto_bajo_umbral_idx'),
+        ),
+    ]
@@ -1,7 +1,37 @@
+import threading
+from contextlib import contextmanager
+
 from django.db import models
+from django.db.models import DecimalField, ExpressionWrapper, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from apps.usuarios.models import Usuario
 
 
+_recalculo_diferido = threading.local()
+
+
+@contextmanager
+def recalculo_total_diferido():
+    """
+    Difiere la actualización de `Pedido.total` durante ediciones masivas de
+    DetallePedido. Al salir del bloque se recalcula una sola vez el total de
+    cada pedido afectado. Los bloques anidados recalculan al cerrar el externo.
+    """
+    pendientes = getattr(_recalculo_diferido, "pedidos", None)
+    if pendientes is not None:
+        yield pendientes
+        return
+
+    _recalculo_diferido.pedidos = pendientes = set()
+    try:
+        yield pendientes
+    finally:
+        _recalculo_diferido.pedidos = None
+    if pendientes:
+        Pedido.recalcular_totales(pendientes)
+
+
 class Tienda(models.Model):
     """
     Modelo que representa una tienda minorista en el sistema.
@@ -72,6 +102,10 @@ class Producto(models.Model):
     fecha_creacion = models.DateTimeField(auto_now_add=True)
     fecha_actualizacion = models.DateTimeField(auto_now=True)
 
+    # Copia de StockConfig.stock_minimo con la recarga automática activa (NULL
+    # si no). La mantiene StockConfig; permite el índice parcial de stock bajo.
+    umbral_recarga = models.PositiveIntegerField(null=True, blank=True, editable=False)
+
     class Meta:
         ordering = ["-fecha_creacion"]
         verbose_name = "Producto"
@@ -83,6 +117,13 @@ class Producto(models.Model):
         indexes = [
             models.Index(fields=["tienda", "activo"]),
             models.Index(fields=["proveedor", "activo"]),
+            # Solo contiene los productos en o bajo su mínimo: la base de datos
+            # los agrega y quita al cambiar el stock, sin código en cada escritura
+            models.Index(
+                fields=["umbral_recarga"],
+                condition=models.Q(stock__lte=models.F("umbral_recarga")),
+                name="producto_bajo_umbral_idx",
+            ),
         ]
 
     def __str__(self):
@@ -145,6 +186,7 @@ class Pedido(models.Model):
             models.Index(fields=["cliente", "estado"]),
             models.Index(fields=["tienda", "estado"]),
             models.Index(fields=["estado", "-fecha_creacion"]),
+            models.Index(fields=["-fecha_creacion", "-id"]),
         ]
 
     def __str__(self):
@@ -152,11 +194,47 @@ class Pedido(models.Model):
 
     def calcular_total(self):
         """Calcula el total del pedido sumando todos los detalles."""
-        total = sum(detalle.subtotal for detalle in self.detalles.all())
-        self.total = total
-        self.save()
+        total = self.detalles.aggregate(total=Sum(DetallePedido.subtotal_expresion()))["total"]
+        self.total = total or 0
+        Pedido.objects.filter(pk=self.pk).update(
+            total=self.total, fecha_actualizacion=timezone.now()
+        )
         return self.total
 
+    @classmethod
+    def recalcular_totales(cls, pedido_ids):
+        """Recalcula el total de varios pedidos con un único UPDATE."""
+        suma_detalles = (
+            DetallePedido.objects.filter(pedido=OuterRef("pk"))
+            .order_by()
+            .values("pedido")
+            .annotate(total=Sum(DetallePedido.subtotal_expresion()))
+            .values("total")
+        )
+        return cls.objects.filter(pk__in=list(pedido_ids)).update(
+            total=Coalesce(
+                Subquery(suma_detalles, output_field=cls._meta.get_field("total")),
+                Value(0, output_field=cls._meta.get_field("total")),
+            ),
+            fecha_actualizacion=timezone.now(),
+        )
+
+    @classmethod
+    def aplicar_delta_total(cls, pedido_id, delta):
+        """
+        Suma `delta` al total del pedido con una expresión F() sobre la única
+        columna `total`. Dentro de `recalculo_total_diferido` solo se marca el
+        pedido para recalcularlo al final.
+        """
+        pendientes = getattr(_recalculo_diferido, "pedidos", None)
+        if pendientes is not None:
+            pendientes.add(pedido_id)
+            return
+        if delta:
+            cls.objects.filter(pk=pedido_id).update(
+                total=F("total") + delta, fecha_actualizacion=timezone.now()
+            )
+
     def puede_cambiar_a_preparando(self):
         """Verifica si el pedido puede pasar a estado 'preparando'."""
         return self.estado == "pendiente"
@@ -198,21 +276,65 @@ class DetallePedido(models.Model):
     def __str__(self):
         return f"{self.pedido.id} - {self.producto.nombre} x{self.cantidad}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Estado persistido, para aplicar solo la diferencia al total del pedido
+        instance._pedido_guardado = instance.__dict__.get("pedido_id")
+        instance._subtotal_guardado = (
+            instance.subtotal
+            if "cantidad" in instance.__dict__ and "precio_unitario" in instance.__dict__
+            else None
+        )
+        return instance
+
+    @staticmethod
+    def subtotal_expresion():
+        """Expresión SQL equivalente a `subtotal`."""
+        return ExpressionWrapper(
+            F("cantidad") * F("precio_unitario"),
+            output_field=DecimalField(max_digits=12, decimal_places=2),
+        )
+
     @property
     def subtotal(self):
         """Calcula el subtotal de este detalle del pedido."""
         return self.cantidad * self.precio_unitario
 
     def save(self, *args, **kwargs):
-        """Sobrescribe save para actualizar el total del pedido."""
+        """Sobrescribe save para aplicar al total del pedido solo la diferencia."""
+        pedido_anterior = getattr(self, "_pedido_guardado", None)
+        subtotal_anterior = getattr(self, "_subtotal_guardado", None)
+        if pedido_anterior is not None and subtotal_anterior is None:
+            # Instancia cargada con campos diferidos: se recalcula completo
+            super().save(*args, **kwargs)
+            self._marcar_guardado()
+            self.pedido.calcular_total()
+            return
+
         super().save(*args, **kwargs)
-        self.pedido.calcular_total()
+
+        if pedido_anterior is not None and pedido_anterior != self.pedido_id:
+            Pedido.aplicar_delta_total(pedido_anterior, -subtotal_anterior)
+            subtotal_anterior = None
+        Pedido.aplicar_delta_total(self.pedido_id, self.subtotal - (subtotal_anterior or 0))
+        self._marcar_guardado()
 
     def delete(self, *args, **kwargs):
-        """Sobrescribe delete para actualizar el total del pedido."""
-        pedido = self.pedido
-        super().delete(*args, **kwargs)
-        pedido.calcular_total()
+        """Sobrescribe delete para descontar el subtotal del total del pedido."""
+        pedido_id = getattr(self, "_pedido_guardado", None) or self.pedido_id
+        subtotal = getattr(self, "_subtotal_guardado", None)
+        if subtotal is None:
+            subtotal = self.subtotal
+        resultado = super().delete(*args, **kwargs)
+        Pedido.aplicar_delta_total(pedido_id, -subtotal)
+        self._pedido_guardado = None
+        self._subtotal_guardado = None
+        return resultado
+
+    def _marcar_guardado(self):
+        self._pedido_guardado = self.pedido_id
+        self._subtotal_guardado = self.subtotal
 
 
 class StockConfig(models.Model):
@@ -267,6 +389,22 @@ class StockConfig(models.Model):
     
     def __str__(self):
         return f"Config Stock: {self.producto.nombre} (Min: {self.stock_minimo}, Recarga: {self.cantidad_recarga})"
+
+    def save(self, *args, **kwargs):
+        """Sobrescribe save para copiar el umbral vigente a Producto.umbral_recarga."""
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or {"stock_minimo", "recarga_automatica_activa"} & set(update_fields):
+            Producto.objects.filter(pk=self.producto_id).update(
+                umbral_recarga=self.stock_minimo if self.recarga_automatica_activa else None
+            )
+
+    def delete(self, *args, **kwargs):
+        """Sobrescribe delete para quitar el producto del índice de stock bajo."""
+        producto_id = self.producto_id
+        resultado = super().delete(*args, **kwargs)
+        Producto.objects.filter(pk=producto_id).update(umbral_recarga=None)
+        return resultado
     
     def necesita_recarga(self):
         """Verifica si el producto necesita recarga automática"""
@@ -338,12 +476,71 @@ class HistorialRecarga(models.Model):
         indexes = [
             models.Index(fields=['producto', '-fecha_creacion']),
             models.Index(fields=['tipo', '-fecha_creacion']),
+            models.Index(fields=['-fecha_creacion', '-id']),
         ]
     
     def __str__(self):
         return f"{self.producto.nombre} - {self.tipo} (+{self.cantidad}) - {self.fecha_creacion.strftime('%Y-%m-%d %H:%M')}"
 
 
+class ResumenMensualRecargas(models.Model):
+    """
+    Totales mensuales por producto del HistorialRecarga ya archivado.
+
+    Las filas del historial más antiguas que la retención se mueven a
+    archivos JSONL comprimidos (ver ArchivoHistorialRecargas) y quedan
+    resumidas aquí, así las vistas nunca recorren historial viejo.
+    """
+
+    producto = models.ForeignKey(
+        Producto,
+        on_delete=models.CASCADE,
+        related_name='resumenes_recargas'
+    )
+    mes = models.DateField(help_text="Primer día del mes (hora local)")
+    recargas = models.PositiveIntegerField(default=0)
+    cantidad_total = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Resumen Mensual de Recargas"
+        verbose_name_plural = "Resúmenes Mensuales de Recargas"
+        ordering = ['-mes']
+        constraints = [
+            models.UniqueConstraint(fields=['producto', 'mes'], name='resumen_recargas_producto_mes_unico'),
+        ]
+
+    def __str__(self):
+        return f"{self.producto.nombre} - {self.mes:%Y-%m}: {self.recargas} recargas (+{self.cantidad_total})"
+
+
+class SolicitudIdempotente(models.Model):
+    """
+    Respuesta registrada de una petición con cabecera `Idempotency-Key`.
+
+    Se inserta en la misma transacción que los cambios de la petición, así
+    un reintento con la misma clave recibe la respuesta original en lugar
+    de aplicar los cambios otra vez (ver apps/productos/idempotencia.py).
+    """
+
+    usuario = models.ForeignKey(Usuario, on_delete=models.CASCADE, related_name='solicitudes_idempotentes')
+    accion = models.CharField(max_length=50)
+    clave = models.CharField(max_length=255)
+    huella = models.CharField(max_length=64, help_text="SHA-256 del cuerpo de la petición")
+    codigo = models.PositiveSmallIntegerField()
+    respuesta = models.JSONField()
+    fecha_creacion = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        verbose_name = "Solicitud Idempotente"
+        verbose_name_plural = "Solicitudes Idempotentes"
+        constraints = [
+            models.UniqueConstraint(fields=['usuario', 'accion', 'clave'], name='solicitud_idempotente_unica'),
+        ]
+
+    def __str__(self):
+        return f"{self.accion} {self.clave} ({self.usuario_id})"
+
+
 class Seccion(models.Model):
     """
     Modelo que representa una sección o catálogo de productos.
@@ -354,6 +551,7 @@ class Seccion(models.Model):
     productos = models.ManyToManyField(Producto, related_name='secciones', blank=True)
     activa = models.BooleanField(default=True)
     fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name = "Sección"
@@ -0,0 +1,132 @@
+import logging
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+
+from backend.services.cache import incrementar
+
+from .models import StockConfig
+
+logger = logging.getLogger(__name__)
+
+
+class ColaRecargas:
+    """
+    Recarga automática disparada por eventos en lugar de esperar al barrido
+    nocturno.
+
+    - `detectar()` se llama después de descontar stock y, con una consulta
+      acotada a los productos descontados, encuentra los que cruzaron
+      `stock_minimo` con ese descuento (antes estaban por encima, ahora no).
+    - Los productos se encolan en la cache al confirmar la transacción, en
+      ranuras numeradas con `incr` (como RegistroActividad).
+    - El primer evento de cada ventana de RECARGA_ESPERA_SEGUNDOS programa
+      `consumir()` (tarea de Celery con countdown, o un temporizador del
+      proceso si no hay broker), que recarga en lote todos los productos
+      encolados con RecargaStock. Ráfagas de ventas sobre el mismo producto
+      generan una sola recarga. Con cache por proceso siempre se usa el
+      temporizador: el worker de Celery no vería lo encolado aquí.
+
+    RecargaStock vuelve a verificar `stock <= stock_minimo`, así que un
+    evento viejo (stock ya recargado o liberado por una cancelación) no
+    recarga dos veces. `recargar_stock_automatico_task` queda como barrido de
+    reconciliación para lo que se haya perdido (p. ej. cache vaciada).
+    """
+
+    PREFIJO = "recargas"
+    TIMEOUT_PENDIENTE = 60 * 60 * 24
+
+    @staticmethod
+    def espera():
+        return getattr(settings, "RECARGA_ESPERA_SEGUNDOS", 30)
+
+    @classmethod
+    def _clave(cls, *partes):
+        return ":".join([cls.PREFIJO, *map(str, partes)])
+
+    @classmethod
+    def detectar(cls, cantidades):
+        """
+        `cantidades` es {producto_id: cantidad descontada}, ya aplicada en la
+        base de datos. Encola y retorna los productos que cruzaron el umbral.
+        """
+        if not cantidades:
+            return []
+        descontado = Case(
+            *[When(producto_id=producto_id, then=Value(cantidad)) for producto_id, cantidad in cantidades.items()],
+            output_field=IntegerField(),
+        )
+        cruzados = list(
+            StockConfig.objects.filter(
+                producto_id__in=list(cantidades),
+                recarga_automatica_activa=True,
+                producto__stock__lte=F("stock_minimo"),
+                producto__stock__gt=F("stock_minimo") - descontado,
+            ).values_list("producto_id", flat=True)
+        )
+        if cruzados:
+            transaction.on_commit(lambda: cls.encolar(cruzados))
+        return cruzados
+
+    @classmethod
+    def encolar(cls, producto_ids):
+        ranura = incrementar(cls._clave("contador"))
+        cache.set(cls._clave("pendiente", ranura), list(producto_ids), cls.TIMEOUT_PENDIENTE)
+        if cache.add(cls._clave("programada"), 1, cls.espera()):
+            cls._programar()
+
+    @classmethod
+    def _programar(cls):
+        from .tasks import consumir_recargas_task
+        if getattr(settings, "CACHE_COMPARTIDA", False):
+            try:
+                consumir_recargas_task.apply_async(countdown=cls.espera(), retry=False)
+                return
+            except Exception as e:
+                logger.warning("Broker de Celery no disponible, recarga con temporizador local: %s", e)
+        temporizador = threading.Timer(cls.espera(), cls._consumir_en_hilo)
+        temporizador.daemon = True
+        temporizador.start()
+
+    @classmethod
+    def _consumir_en_hilo(cls):
+        try:
+            cls.consumir()
+        except Exception:
+            logger.exception("Error en la recarga automática por eventos")
+        finally:
+            close_old_connections()
+
+    @classmethod
+    def pendientes(cls):
+        """Toma (y quita de la cache) los productos encolados desde el último consumo."""
+        clave_cursor = cls._clave("consumido")
+        desde = cache.get(clave_cursor, 0)
+        hasta = cache.get(cls._clave("contador"), 0)
+        if hasta < desde:
+            # El contador se reinició (cache vaciada)
+            desde = 0
+        if hasta == desde:
+            return set()
+        claves = [cls._clave("pendiente", ranura) for ranura in range(desde + 1, hasta + 1)]
+        encolados = cache.get_many(claves)
+        cache.set(clave_cursor, hasta, None)
+        cache.delete_many(claves)
+        return {producto_id for producto_ids in encolados.values() for producto_id in producto_ids}
+
+    @classmethod
+    def consumir(cls):
+        """Recarga en lote los productos encolados. Retorna las recargas aplicadas."""
+        from .services import RecargaStock
+
+        # Los eventos que lleguen desde ahora programan un nuevo consumo
+        cache.delete(cls._clave("programada"))
+        producto_ids = cls.pendientes()
+        if not producto_ids:
+            return []
+        return RecargaStock.ejecutar(
+            producto_ids=producto_ids, notas="Recarga automática por stock bajo el mínimo"
+        )
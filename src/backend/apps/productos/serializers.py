@@ -36,7 +36,7 @@ class ProductoSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Producto
-        fields = '__all__'
+        exclude = ['umbral_recarga']
 
 
 class ProductoListSerializer(serializers.ModelSerializer):
@@ -94,6 +94,32 @@ class PedidoCreateSerializer(serializers.Serializer):
         return value
 
 
+class PedidoLoteSerializer(serializers.Serializer):
+    """Serializer for crear_pedidos_lote endpoint; each item is validated with PedidoCreateSerializer"""
+    MAX_PEDIDOS = 500
+
+    pedidos = serializers.ListField(
+        child=serializers.DictField(),
+        required=True,
+        allow_empty=False,
+        max_length=MAX_PEDIDOS
+    )
+
+
+class AjusteStockSerializer(serializers.Serializer):
+    producto_id = serializers.IntegerField(min_value=1)
+    cantidad = serializers.IntegerField(min_value=1)
+    operacion = serializers.ChoiceField(choices=["aumentar", "reducir"])
+
+
+class AjusteStockMasivoSerializer(serializers.Serializer):
+    """Serializer for ajustar_stock_masivo endpoint"""
+    MAX_AJUSTES = 5000
+
+    ajustes = AjusteStockSerializer(many=True, allow_empty=False, max_length=MAX_AJUSTES)
+    notas = serializers.CharField(required=False, allow_blank=True)
+
+
 class PedidoUpdateEstadoSerializer(serializers.ModelSerializer):
     class Meta:
         model = Pedido
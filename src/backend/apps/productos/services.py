@@ -0,0 +1,592 @@
+from collections import OrderedDict
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, OuterRef, Subquery, Value, When
+from django.utils import timezone
+
+from backend.services.cache import invalidar_tags, invalidar_tags_al_confirmar
+
+from .cache import TAG_CATALOGO
+from .models import Producto, Pedido, DetallePedido, StockConfig, HistorialRecarga, Tienda
+from .recargas import ColaRecargas
+
+
+class StockInsuficienteError(ValueError):
+    """
+    Error lanzado cuando una o más líneas no pudieron reservar stock.
+    `fallos` contiene un dict por producto con el detalle del problema.
+    """
+
+    def __init__(self, fallos):
+        self.fallos = fallos
+        super().__init__(
+            "; ".join(fallo["error"] for fallo in fallos) or "Stock insuficiente"
+        )
+
+
+class _ReservaIncompleta(Exception):
+    """Señal interna para revertir una reserva parcial."""
+
+
+class ReservaStock:
+    """
+    Motor de reserva de stock sin bloqueos.
+
+    Todas las líneas se descuentan con un único UPDATE condicional
+    (`stock = stock - n WHERE stock >= n`, con `n` resuelto por CASE según el
+    producto). La base de datos resuelve la concurrencia: si otra transacción
+    consumió el stock primero, esa fila no se actualiza, el número de filas
+    afectadas no coincide y la reserva completa se revierte.
+
+    Los productos que quedan en o bajo su `stock_minimo` por la reserva se
+    encolan en ColaRecargas.
+    """
+
+    @staticmethod
+    def agrupar(items):
+        """Suma cantidades por producto conservando el orden de llegada."""
+        cantidades = OrderedDict()
+        for producto_id, cantidad in items:
+            producto_id = int(producto_id)
+            cantidades[producto_id] = cantidades.get(producto_id, 0) + int(cantidad)
+        return cantidades
+
+    @staticmethod
+    def _cantidad_por_producto(cantidades):
+        return Case(
+            *[When(pk=producto_id, then=Value(cantidad)) for producto_id, cantidad in cantidades.items()],
+            output_field=IntegerField(),
+        )
+
+    @classmethod
+    def reservar(cls, items):
+        """
+        Descuenta el stock de todas las líneas de forma atómica.
+
+        `items` es un iterable de pares (producto_id, cantidad). Si alguna
+        línea falla se revierten todas y se lanza StockInsuficienteError con
+        el detalle por producto.
+        """
+        cantidades = cls.agrupar(items)
+        if not cantidades:
+            return cantidades
+        if any(cantidad <= 0 for cantidad in cantidades.values()):
+            raise StockInsuficienteError(cls._describir_fallos(cantidades))
+
+        solicitado = cls._cantidad_por_producto(cantidades)
+        try:
+            with transaction.atomic():
+                actualizados = Producto.objects.filter(
+                    pk__in=list(cantidades), stock__gte=solicitado
+                ).update(
+                    stock=F("stock") - solicitado,
+                    fecha_actualizacion=timezone.now(),
+                )
+                if actualizados != len(cantidades):
+                    raise _ReservaIncompleta()
+                # Con las filas aún bloqueadas por el UPDATE
+                ColaRecargas.detectar(cantidades)
+        except _ReservaIncompleta:
+            raise StockInsuficienteError(cls._describir_fallos(cantidades))
+
+        # Los UPDATE no emiten post_save: el catálogo muestra stock
+        invalidar_tags_al_confirmar(TAG_CATALOGO)
+
+        return cantidades
+
+    @classmethod
+    def liberar(cls, items):
+        """Devuelve al inventario las cantidades de `items` (p. ej. al cancelar)."""
+        cantidades = cls.agrupar(items)
+        if cantidades:
+            Producto.objects.filter(pk__in=list(cantidades)).update(
+                stock=F("stock") + cls._cantidad_por_producto(cantidades),
+                fecha_actualizacion=timezone.now(),
+            )
+            invalidar_tags_al_confirmar(TAG_CATALOGO)
+        return cantidades
+
+    @staticmethod
+    def _describir_fallos(cantidades):
+        # Solo se consulta el stock en el camino de error
+        disponibles = dict(
+            Producto.objects.filter(pk__in=list(cantidades)).values_list("id", "stock")
+        )
+        fallos = []
+        for producto_id, solicitado in cantidades.items():
+            disponible = disponibles.get(producto_id)
+            if disponible is None:
+                error = f"Producto {producto_id} no existe"
+            elif solicitado <= 0:
+                error = f"Cantidad inválida para el producto {producto_id}"
+            elif disponible < solicitado:
+                error = (
+                    f"Stock insuficiente para el producto {producto_id}. "
+                    f"Disponible: {disponible}, Solicitado: {solicitado}"
+                )
+            else:
+                continue
+            fallos.append({
+                "producto": producto_id,
+                "solicitado": solicitado,
+                "disponible": disponible,
+                "error": error,
+            })
+        if not fallos:
+            # El stock cambió entre el UPDATE y la verificación
+            fallos = [{
+                "producto": producto_id,
+                "solicitado": solicitado,
+                "disponible": disponibles.get(producto_id),
+                "error": f"El stock del producto {producto_id} cambió durante la reserva, reintente",
+            } for producto_id, solicitado in cantidades.items()]
+        return fallos
+
+
+class AjusteStockMasivo:
+    """
+    Ajuste de inventario de muchos productos en una sola operación (conteos
+    de inventario de proveedores), con un número fijo de consultas:
+
+    1. un SELECT de los productos (bloqueados) que valida existencia y
+       propiedad del proveedor y toma el stock anterior
+    2. un UPDATE `stock = stock + delta` (delta por CASE) que exige
+       `stock >= -delta` en las reducciones
+    3. un `bulk_create` de los HistorialRecarga (tipo manual)
+
+    Varias líneas del mismo producto se combinan en un delta neto. Si alguna
+    reducción deja stock negativo se revierte todo y se lanza
+    StockInsuficienteError.
+    """
+
+    @staticmethod
+    def deltas(ajustes):
+        totales = OrderedDict()
+        for ajuste in ajustes:
+            signo = 1 if ajuste["operacion"] == "aumentar" else -1
+            producto_id = int(ajuste["producto_id"])
+            totales[producto_id] = totales.get(producto_id, 0) + signo * int(ajuste["cantidad"])
+        return totales
+
+    @staticmethod
+    def _productos(usuario, producto_ids):
+        """Stock y proveedor de los productos, o PermissionError/ValueError."""
+        filas = {
+            producto_id: (proveedor_id, stock)
+            for producto_id, proveedor_id, stock in Producto.objects.select_for_update()
+            .filter(pk__in=producto_ids, activo=True)
+            .values_list("id", "proveedor_id", "stock")
+        }
+        faltantes = [producto_id for producto_id in producto_ids if producto_id not in filas]
+        if faltantes:
+            raise ValueError(f"Productos inexistentes o inactivos: {faltantes}")
+        es_admin = usuario.is_superuser or getattr(usuario, "rol", None) == "admin"
+        ajenos = [producto_id for producto_id, (proveedor_id, _) in filas.items() if proveedor_id != usuario.id]
+        if ajenos and not es_admin:
+            raise PermissionError(f"No puede ajustar productos de otro proveedor: {ajenos}")
+        return filas
+
+    @classmethod
+    def aplicar(cls, usuario, ajustes, notas=None):
+        """
+        Aplica `ajustes` (dicts con producto_id, cantidad, operacion) dentro de
+        la transacción en curso o de una propia. Retorna una lista de dicts
+        (producto_id, stock_anterior, stock_nuevo).
+        """
+        deltas = cls.deltas(ajustes)
+        try:
+            with transaction.atomic():
+                filas = cls._productos(usuario, list(deltas))
+                cambios = {producto_id: delta for producto_id, delta in deltas.items() if delta}
+                if cambios:
+                    delta = Case(
+                        *[When(pk=producto_id, then=Value(valor)) for producto_id, valor in cambios.items()],
+                        output_field=IntegerField(),
+                    )
+                    requerido = Case(
+                        *[When(pk=producto_id, then=Value(max(0, -valor))) for producto_id, valor in cambios.items()],
+                        output_field=IntegerField(),
+                    )
+                    actualizados = Producto.objects.filter(
+                        pk__in=list(cambios), stock__gte=requerido
+                    ).update(stock=F("stock") + delta, fecha_actualizacion=timezone.now())
+                    if actualizados != len(cambios):
+                        raise _ReservaIncompleta()
+
+                    HistorialRecarga.objects.bulk_create([
+                        HistorialRecarga(
+                            producto_id=producto_id,
+                            cantidad=abs(valor),
+                            stock_anterior=filas[producto_id][1],
+                            stock_nuevo=filas[producto_id][1] + valor,
+                            tipo="manual",
+                            usuario=usuario,
+                            notas=notas or f"Ajuste masivo: {'aumentar' if valor > 0 else 'reducir'}",
+                        )
+                        for producto_id, valor in cambios.items()
+                    ])
+                    ColaRecargas.detectar({producto_id: -valor for producto_id, valor in cambios.items() if valor < 0})
+                    # Los UPDATE no emiten post_save: el catálogo muestra stock
+                    invalidar_tags_al_confirmar(TAG_CATALOGO)
+        except _ReservaIncompleta:
+            reducciones = {producto_id: -valor for producto_id, valor in deltas.items() if valor < 0}
+            raise StockInsuficienteError(ReservaStock._describir_fallos(reducciones))
+
+        return [{
+            "producto_id": producto_id,
+            "stock_anterior": filas[producto_id][1],
+            "stock_nuevo": filas[producto_id][1] + delta,
+        } for producto_id, delta in deltas.items()]
+
+
+class RecargaStock:
+    """
+    Motor de recarga automática de stock por conjuntos, con un número fijo de
+    consultas sin importar cuántos productos se recarguen:
+
+    1. un SELECT de las configuraciones activas con `stock <= stock_minimo`
+       (FOR UPDATE sobre el join: bloquea las configuraciones y sus productos)
+    2. un UPDATE `stock = stock + cantidad_recarga` (subconsulta sobre StockConfig)
+    3. un `bulk_create` de los HistorialRecarga
+    4. un UPDATE de `ultima_recarga` y `total_recargas` de las configuraciones
+
+    Todo dentro de una transacción.
+    """
+
+    NOTAS = "Recarga automática. Stock mínimo: {stock_minimo}"
+
+    @staticmethod
+    def candidatos(producto_ids=None):
+        # Misma condición que el índice parcial producto_bajo_umbral_idx
+        configs = StockConfig.objects.filter(
+            recarga_automatica_activa=True,
+            producto__stock__lte=F("producto__umbral_recarga"),
+        )
+        if producto_ids is not None:
+            configs = configs.filter(producto_id__in=list(producto_ids))
+        return configs
+
+    ORDENES = {
+        "deficit": ("-deficit", "producto_id"),
+        "nombre": ("producto__nombre", "producto_id"),
+        "stock": ("producto__stock", "producto_id"),
+    }
+
+    @classmethod
+    def stock_bajo(cls, orden="deficit"):
+        """
+        Productos en o bajo su mínimo con su déficit (`stock_minimo - stock`),
+        filtrados y ordenados en la base de datos, con producto y proveedor
+        en la misma consulta.
+        """
+        if orden not in cls.ORDENES:
+            raise ValueError(f"Orden inválido. Opciones: {', '.join(cls.ORDENES)}")
+        return cls.candidatos().select_related("producto__proveedor").annotate(
+            deficit=F("stock_minimo") - F("producto__stock"),
+        ).order_by(*cls.ORDENES[orden])
+
+    @classmethod
+    def ejecutar(cls, dry_run=False, notas=None, producto_ids=None):
+        """
+        Recarga los productos que lo necesitan (todos, o solo `producto_ids`).
+        Retorna una lista de dicts (producto_id, nombre, stock_anterior,
+        stock_nuevo, cantidad_agregada); con `dry_run` solo la calcula.
+        """
+        with transaction.atomic():
+            candidatos = cls.candidatos(producto_ids).order_by("producto_id")
+            if not dry_run:
+                candidatos = candidatos.select_for_update()
+            filas = list(candidatos.values(
+                "id", "producto_id", "producto__nombre", "producto__stock",
+                "stock_minimo", "cantidad_recarga",
+            ))
+            recargas = [{
+                "producto_id": fila["producto_id"],
+                "nombre": fila["producto__nombre"],
+                "stock_anterior": fila["producto__stock"],
+                "stock_nuevo": fila["producto__stock"] + fila["cantidad_recarga"],
+                "cantidad_agregada": fila["cantidad_recarga"],
+            } for fila in filas]
+            if dry_run or not filas:
+                return recargas
+
+            ahora = timezone.now()
+            Producto.objects.filter(pk__in=[fila["producto_id"] for fila in filas]).update(
+                stock=F("stock") + Subquery(
+                    StockConfig.objects.filter(producto=OuterRef("pk")).order_by().values("cantidad_recarga")[:1]
+                ),
+                fecha_actualizacion=ahora,
+            )
+            HistorialRecarga.objects.bulk_create([
+                HistorialRecarga(
+                    producto_id=fila["producto_id"],
+                    cantidad=fila["cantidad_recarga"],
+                    stock_anterior=fila["producto__stock"],
+                    stock_nuevo=fila["producto__stock"] + fila["cantidad_recarga"],
+                    tipo="automatica",
+                    notas=notas or cls.NOTAS.format(stock_minimo=fila["stock_minimo"]),
+                )
+                for fila in filas
+            ])
+            StockConfig.objects.filter(pk__in=[fila["id"] for fila in filas]).update(
+                ultima_recarga=ahora,
+                total_recargas=F("total_recargas") + 1,
+                fecha_actualizacion=ahora,
+            )
+            # Los UPDATE no emiten post_save: el catálogo muestra stock
+            invalidar_tags_al_confirmar(TAG_CATALOGO)
+        return recargas
+
+
+class ConstructorPedido:
+    """
+    Construye un pedido completo con un número fijo de consultas,
+    independiente del tamaño del carrito:
+
+    1. `in_bulk` de todos los productos
+    2. un UPDATE condicional para reservar el stock (más un SELECT de los
+       productos que cruzaron su stock mínimo, ver ColaRecargas)
+    3. un INSERT del Pedido con el total ya calculado en memoria
+    4. un `bulk_create` de los DetallePedido
+    """
+
+    @staticmethod
+    def cargar_productos(cantidades):
+        """Carga los productos de `cantidades`; falla si alguno no existe."""
+        productos = Producto.objects.in_bulk(list(cantidades))
+        for producto_id in cantidades:
+            if producto_id not in productos:
+                raise ValueError(f"Producto {producto_id} no existe")
+        return productos
+
+    @staticmethod
+    def calcular_total(cantidades, productos):
+        return sum(
+            productos[producto_id].precio * cantidad
+            for producto_id, cantidad in cantidades.items()
+        )
+
+    @staticmethod
+    def armar_detalles(pedido, cantidades, productos):
+        return [
+            DetallePedido(
+                pedido=pedido,
+                producto=productos[producto_id],
+                cantidad=cantidad,
+                precio_unitario=productos[producto_id].precio,
+            )
+            for producto_id, cantidad in cantidades.items()
+        ]
+
+    @classmethod
+    def crear(cls, cliente, tienda_id, detalles, notas=""):
+        """
+        Crea el pedido, sus detalles y reserva el stock dentro de una transacción.
+        `detalles` es la lista validada por PedidoCreateSerializer.
+        """
+        cantidades = ReservaStock.agrupar(
+            (detalle["producto"], detalle["cantidad"]) for detalle in detalles
+        )
+        with transaction.atomic():
+            productos = cls.cargar_productos(cantidades)
+            ReservaStock.reservar(cantidades.items())
+
+            pedido = Pedido.objects.create(
+                cliente=cliente,
+                tienda_id=tienda_id,
+                notas=notas,
+                total=cls.calcular_total(cantidades, productos),
+            )
+            DetallePedido.objects.bulk_create(
+                cls.armar_detalles(pedido, cantidades, productos)
+            )
+        return pedido
+
+    @staticmethod
+    def _validar_lineas(cantidades, productos, disponible):
+        """Verifica existencia y stock contra la foto en memoria de `disponible`."""
+        fallos = []
+        for producto_id, cantidad in cantidades.items():
+            if producto_id not in productos:
+                error = f"Producto {producto_id} no existe"
+            elif cantidad <= 0:
+                error = f"Cantidad inválida para el producto {producto_id}"
+            elif disponible[producto_id] < cantidad:
+                error = (
+                    f"Stock insuficiente para el producto {producto_id}. "
+                    f"Disponible: {disponible[producto_id]}, Solicitado: {cantidad}"
+                )
+            else:
+                continue
+            fallos.append({
+                "producto": producto_id,
+                "solicitado": cantidad,
+                "disponible": disponible.get(producto_id),
+                "error": error,
+            })
+        return fallos
+
+    @classmethod
+    def crear_lote(cls, cliente, pedidos):
+        """
+        Crea varios pedidos (con su pago pendiente) en una sola transacción.
+
+        `pedidos` es una lista de validated_data de PedidoCreateSerializer.
+        Los productos y métodos de pago se cargan una vez, el stock de todos
+        los pedidos aceptados se reserva con un único UPDATE y los Pedido,
+        DetallePedido y Pago se insertan con `bulk_create`. Retorna un
+        resultado por pedido, en el mismo orden recibido. Las tiendas se
+        verifican con una sola consulta: una tienda inexistente falla solo ese
+        pedido en lugar de romper la FK al insertar el lote.
+        """
+        from apps.pagos.models import MetodoPago, Pago
+        from apps.pagos.cache import metodos_pago, estados_pago
+
+        resultados = [None] * len(pedidos)
+        metodos = {}
+        for nombre in {datos["metodo_pago"] for datos in pedidos}:
+            try:
+                metodo = metodos_pago.por_nombre(nombre)
+            except MetodoPago.DoesNotExist:
+                continue
+            if metodo.activo:
+                metodos[metodos_pago.normalizar(nombre)] = metodo
+
+        lineas = []
+        for indice, datos in enumerate(pedidos):
+            try:
+                cantidades = ReservaStock.agrupar(
+                    (detalle["producto"], detalle["cantidad"]) for detalle in datos["detalles"]
+                )
+            except (TypeError, ValueError):
+                resultados[indice] = {
+                    "indice": indice,
+                    "exito": False,
+                    "error": "Los detalles deben indicar producto y cantidad enteros",
+                }
+                continue
+            lineas.append((indice, datos, cantidades))
+
+        productos = Producto.objects.in_bulk(
+            list({producto_id for _, _, cantidades in lineas for producto_id in cantidades})
+        )
+        disponible = {producto_id: producto.stock for producto_id, producto in productos.items()}
+        tiendas = set(
+            Tienda.objects.filter(id__in={datos["tienda_id"] for _, datos, _ in lineas})
+            .values_list("id", flat=True)
+        )
+
+        aceptados = []
+        for indice, datos, cantidades in lineas:
+            if datos["tienda_id"] not in tiendas:
+                resultados[indice] = {
+                    "indice": indice,
+                    "exito": False,
+                    "error": f"Tienda {datos['tienda_id']} no existe",
+                }
+                continue
+
+            metodo_pago = metodos.get(metodos_pago.normalizar(datos["metodo_pago"]))
+            if metodo_pago is None:
+                resultados[indice] = {
+                    "indice": indice,
+                    "exito": False,
+                    "error": f"Método de pago '{datos['metodo_pago']}' no válido o inactivo",
+                }
+                continue
+
+            fallos = cls._validar_lineas(cantidades, productos, disponible)
+            if fallos:
+                resultados[indice] = {
+                    "indice": indice,
+                    "exito": False,
+                    "error": "; ".join(fallo["error"] for fallo in fallos),
+                    "fallos": fallos,
+                }
+                continue
+
+            total = cls.calcular_total(cantidades, productos)
+            if float(datos["monto_pago"]) != float(total):
+                resultados[indice] = {
+                    "indice": indice,
+                    "exito": False,
+                    "error": f"El monto del pago ({datos['monto_pago']}) no coincide con el total del pedido ({total})",
+                }
+                continue
+
+            for producto_id, cantidad in cantidades.items():
+                disponible[producto_id] -= cantidad
+            aceptados.append((indice, datos, cantidades, total, metodo_pago))
+
+        if not aceptados:
+            return resultados
+
+        with transaction.atomic():
+            try:
+                ReservaStock.reservar(
+                    (producto_id, cantidad)
+                    for _, _, cantidades, _, _ in aceptados
+                    for producto_id, cantidad in cantidades.items()
+                )
+            except StockInsuficienteError:
+                # Otra transacción consumió stock entre la lectura y el UPDATE:
+                # se reserva pedido por pedido para aislar a los afectados.
+                aceptados = cls._reservar_por_pedido(aceptados, resultados)
+
+            nuevos = Pedido.objects.bulk_create([
+                Pedido(
+                    cliente=cliente,
+                    tienda_id=datos["tienda_id"],
+                    notas=datos.get("notas", ""),
+                    total=total,
+                )
+                for _, datos, _, total, _ in aceptados
+            ])
+
+            detalles = []
+            for pedido, (_, _, cantidades, _, _) in zip(nuevos, aceptados):
+                detalles.extend(cls.armar_detalles(pedido, cantidades, productos))
+            DetallePedido.objects.bulk_create(detalles)
+
+            # Los pagos nacen pendientes, por lo que omitir post_save no
+            # afecta la creación de ventas (solo reacciona a pagos aprobados).
+            estado_pendiente = estados_pago.obtener_o_crear("Pendiente")
+            Pago.objects.bulk_create([
+                Pago(
+                    usuario=cliente,
+                    pedido=pedido,
+                    monto=datos["monto_pago"],
+                    estado=estado_pendiente,
+                    metodo_pago=metodo_pago,
+                )
+                for pedido, (_, datos, _, _, metodo_pago) in zip(nuevos, aceptados)
+            ])
+            # bulk_create no emite post_save: se invalida a mano
+            invalidar_tags("pedidos")
+
+        for pedido, (indice, _, _, total, _) in zip(nuevos, aceptados):
+            resultados[indice] = {
+                "indice": indice,
+                "exito": True,
+                "pedido_id": pedido.id,
+                "total": str(total),
+            }
+        return resultados
+
+    @staticmethod
+    def _reservar_por_pedido(aceptados, resultados):
+        reservados = []
+        for aceptado in aceptados:
+            indice, _, cantidades, _, _ = aceptado
+            try:
+                ReservaStock.reservar(cantidades.items())
+            except StockInsuficienteError as e:
+                resultados[indice] = {
+                    "indice": indice,
+                    "exito": False,
+                    "error": str(e),
+                    "fallos": e.fallos,
+                }
+                continue
+            reservados.append(aceptado)
+        return reservados
@@ -1,6 +1,9 @@
 from celery import shared_task
 from django.utils import timezone
-from .models import StockConfig, HistorialRecarga
+from .historial import ArchivoHistorialRecargas
+from .idempotencia import Idempotencia
+from .recargas import ColaRecargas
+from .services import RecargaStock
 
 @shared_task
 def recargar_stock_automatico_task():
@@ -8,7 +11,9 @@ def recargar_stock_automatico_task():
     Ejecutado por Celery Beat: 
     1. Genera reporte de ventas del día anterior.
     2. Envía correo a administradores.
-    3. Ejecuta recarga automática de stock.
+    3. Reconcilia la recarga automática de stock: recarga lo que haya quedado
+       bajo el mínimo sin pasar por ColaRecargas (p. ej. cache vaciada o
+       stock_minimo modificado).
     """
     from django.core.mail import send_mail
     from django.conf import settings
@@ -35,38 +40,15 @@ def recargar_stock_automatico_task():
     reporte_lines.append("\n-----------------------------------\n")
     reporte_lines.append("Ejecución de Recarga Automática de Stock:")
     
-    # 2. Recarga Automática
-    configs = StockConfig.objects.filter(recarga_automatica_activa=True).select_related('producto')
-    recargas_count = 0
-    
-    for config in configs:
-        if config.necesita_recarga():
-            producto = config.producto
-            stock_anterior = producto.stock
-            
-            # Aumentar stock
-            producto.aumentar_stock(config.cantidad_recarga)
-            
-            # Registrar historial
-            HistorialRecarga.objects.create(
-                producto=producto,
-                cantidad=config.cantidad_recarga,
-                stock_anterior=stock_anterior,
-                stock_nuevo=producto.stock,
-                tipo='automatica',
-                usuario=None,
-                notas='Recarga automática programada por Celery Beat',
-                fecha_creacion=timezone.now(),
-            )
-            
-            # Actualizar metadatos de configuración
-            config.ultima_recarga = timezone.now()
-            config.total_recargas += 1
-            config.save()
-            
-            reporte_lines.append(f"✅ {producto.nombre}: {stock_anterior} -> {producto.stock} (+{config.cantidad_recarga})")
-            recargas_count += 1
-    
+    # 2. Recarga Automática (por conjuntos, en una transacción)
+    recargas = RecargaStock.ejecutar(notas='Recarga automática programada por Celery Beat')
+    for recarga in recargas:
+        reporte_lines.append(
+            f"✅ {recarga['nombre']}: {recarga['stock_anterior']} -> {recarga['stock_nuevo']} "
+            f"(+{recarga['cantidad_agregada']})"
+        )
+    recargas_count = len(recargas)
+
     if recargas_count == 0:
         reporte_lines.append("No se requirieron recargas automáticas hoy.")
         
@@ -90,3 +72,36 @@ def recargar_stock_automatico_task():
 
     return f"Recarga: {recargas_count} productos. {email_status}"
 
+
+
+@shared_task
+def consumir_recargas_task():
+    """
+    Programada por ColaRecargas al primer cruce de `stock_minimo` de cada
+    ventana: recarga en lote los productos encolados.
+    """
+    recargas = ColaRecargas.consumir()
+    return f"Recarga por eventos: {len(recargas)} productos"
+
+
+@shared_task
+def archivar_historial_recargas_task():
+    """
+    Ejecutado por Celery Beat una vez al día si HISTORIAL_RECARGAS_ARCHIVAR:
+    archiva los meses de HistorialRecarga que quedaron fuera de la retención.
+    """
+    from django.conf import settings
+
+    if not getattr(settings, "HISTORIAL_RECARGAS_ARCHIVAR", False):
+        return "Archivo de historial desactivado"
+    resultados = ArchivoHistorialRecargas().archivar()
+    return f"Historial archivado: {sum(r['filas'] for r in resultados)} filas en {len(resultados)} meses"
+
+
+@shared_task
+def purgar_idempotencia_task():
+    """
+    Ejecutado por Celery Beat una vez al día: borra las claves
+    `Idempotency-Key` vencidas.
+    """
+    return f"Claves de idempotencia borradas: {Idempotencia.purgar()}"
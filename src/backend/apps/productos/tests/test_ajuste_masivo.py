@@ -0,0 +1,97 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from apps.productos.models import HistorialRecarga, Producto, SolicitudIdempotente, Tienda
+from apps.productos.services import AjusteStockMasivo
+
+User = get_user_model()
+
+
+class TestAjusteStockMasivo(TestCase):
+    def setUp(self):
+        admin = User.objects.create_user(email="admin@test.com", nombre="Admin", password="admin123", rol="admin")
+        self.proveedor = User.objects.create_user(email="prov@test.com", nombre="Prov", password="prov123", rol="proveedor")
+        self.otro = User.objects.create_user(email="otro@test.com", nombre="Otro", password="otro123", rol="proveedor")
+        self.tienda = Tienda.objects.create(nombre="Tienda", direccion="Calle 1", administrador=admin)
+        self.productos = [self._producto(f"P{i}", stock=10) for i in range(3)]
+        self.ajeno = self._producto("Ajeno", stock=10, proveedor=self.otro)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.proveedor)
+        self.url = reverse("producto-ajustar-stock-masivo")
+
+    def _producto(self, nombre, stock, proveedor=None):
+        return Producto.objects.create(
+            nombre=nombre, descripcion="Desc", precio=Decimal("1.00"), stock=stock,
+            tienda=self.tienda, proveedor=proveedor or self.proveedor,
+        )
+
+    def _stock(self, producto):
+        producto.refresh_from_db()
+        return producto.stock
+
+    def _ajustes(self, operacion="aumentar", cantidad=5, productos=None):
+        return [
+            {"producto_id": producto.id, "cantidad": cantidad, "operacion": operacion}
+            for producto in (productos or self.productos)
+        ]
+
+    def test_ajusta_todo_con_historial(self):
+        """Test that all adjustments are applied and recorded in bulk"""
+        ajustes = self._ajustes() + [{"producto_id": self.productos[0].id, "cantidad": 8, "operacion": "reducir"}]
+        response = self.client.post(self.url, ajustes, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["ajustados"], 3)
+        self.assertEqual([self._stock(p) for p in self.productos], [7, 15, 15])
+        reduccion = HistorialRecarga.objects.get(producto=self.productos[0])
+        self.assertEqual((reduccion.cantidad, reduccion.stock_anterior, reduccion.stock_nuevo), (3, 10, 7))
+        self.assertEqual(reduccion.usuario, self.proveedor)
+
+    def test_consultas_constantes(self):
+        """Test that query count does not grow with the number of products"""
+        with self.assertNumQueries(6):  # savepoint + SELECT + UPDATE + INSERT + cruces + release
+            AjusteStockMasivo.aplicar(self.proveedor, self._ajustes("reducir", 1, self.productos[:1]))
+        with self.assertNumQueries(6):
+            AjusteStockMasivo.aplicar(self.proveedor, self._ajustes("reducir", 1))
+
+    def test_stock_insuficiente_revierte_todo(self):
+        """Test that one failing reduction rolls back every adjustment"""
+        ajustes = self._ajustes() + [{"producto_id": self.productos[1].id, "cantidad": 50, "operacion": "reducir"}]
+        response = self.client.post(self.url, {"ajustes": ajustes}, format="json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["fallos"][0]["producto"], self.productos[1].id)
+        self.assertEqual([self._stock(p) for p in self.productos], [10, 10, 10])
+        self.assertFalse(HistorialRecarga.objects.exists())
+
+    def test_producto_ajeno_prohibido(self):
+        """Test that providers cannot adjust other providers' products"""
+        response = self.client.post(self.url, self._ajustes(productos=[self.productos[0], self.ajeno]), format="json")
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(self._stock(self.productos[0]), 10)
+
+    def test_idempotency_key_no_reaplica(self):
+        """Test that a retried upload with the same key replays the first response"""
+        cabeceras = {"HTTP_IDEMPOTENCY_KEY": "conteo-2026-10-18"}
+        primera = self.client.post(self.url, self._ajustes(), format="json", **cabeceras)
+        segunda = self.client.post(self.url, self._ajustes(), format="json", **cabeceras)
+
+        self.assertEqual(segunda.status_code, 200)
+        self.assertEqual(segunda.data, primera.data)
+        self.assertEqual(segunda["Idempotent-Replayed"], "true")
+        self.assertEqual(self._stock(self.productos[0]), 15)
+        self.assertEqual(SolicitudIdempotente.objects.count(), 1)
+
+        otra = self.client.post(self.url, self._ajustes(cantidad=1), format="json", **cabeceras)
+        self.assertEqual(otra.status_code, 422)
+
+    def test_error_no_registra_clave(self):
+        """Test that failed requests can be retried with the same key"""
+        cabeceras = {"HTTP_IDEMPOTENCY_KEY": "reintento"}
+        ajustes = self._ajustes("reducir", 20)
+        self.assertEqual(self.client.post(self.url, ajustes, format="json", **cabeceras).status_code, 400)
+        self.assertFalse(SolicitudIdempotente.objects.exists())
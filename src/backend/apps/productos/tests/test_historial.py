@@ -0,0 +1,118 @@
+import datetime
+import gzip
+import json
+import tempfile
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.productos.historial import ArchivoHistorialRecargas
+from apps.productos.models import HistorialRecarga, Producto, ResumenMensualRecargas, Tienda
+from apps.productos.tasks import archivar_historial_recargas_task
+
+User = get_user_model()
+
+
+class TestArchivoHistorialRecargas(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(email="admin@test.com", nombre="Admin", password="admin123", rol="admin")
+        proveedor = User.objects.create_user(email="prov@test.com", nombre="Prov", password="prov123", rol="proveedor")
+        tienda = Tienda.objects.create(nombre="Tienda", direccion="Calle 1", administrador=self.admin)
+        self.producto = Producto.objects.create(
+            nombre="Producto", descripcion="Desc", precio=Decimal("1.00"),
+            stock=10, tienda=tienda, proveedor=proveedor,
+        )
+        self.directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directorio.cleanup)
+        self.ahora = timezone.make_aware(datetime.datetime(2026, 6, 15, 12, 0))
+
+    def _recarga(self, fecha, cantidad=5):
+        recarga = HistorialRecarga.objects.create(
+            producto=self.producto, cantidad=cantidad, stock_anterior=0, stock_nuevo=cantidad,
+        )
+        HistorialRecarga.objects.filter(pk=recarga.pk).update(fecha_creacion=fecha)
+
+    def _fecha(self, anio, mes, dia):
+        return timezone.make_aware(datetime.datetime(anio, mes, dia, 10, 0))
+
+    def test_archiva_meses_completos_fuera_de_retencion(self):
+        """Test that whole months before the retention window move to gzip files and rollups"""
+        self._recarga(self._fecha(2026, 1, 5), cantidad=5)
+        self._recarga(self._fecha(2026, 1, 20), cantidad=7)
+        self._recarga(self._fecha(2026, 2, 3), cantidad=1)
+        self._recarga(self._fecha(2026, 3, 20))  # mes del borde: se conserva
+
+        archivo = ArchivoHistorialRecargas(dias=90, directorio=self.directorio.name)
+        resultados = archivo.archivar(ahora=self.ahora)
+
+        self.assertEqual([(r["mes"].month, r["filas"]) for r in resultados], [(1, 2), (2, 1)])
+        self.assertEqual(HistorialRecarga.objects.count(), 1)
+        enero = ResumenMensualRecargas.objects.get(producto=self.producto, mes=datetime.date(2026, 1, 1))
+        self.assertEqual((enero.recargas, enero.cantidad_total), (2, 12))
+
+        with gzip.open(resultados[0]["archivo"], "rt", encoding="utf-8") as f:
+            lineas = [json.loads(linea) for linea in f]
+        self.assertEqual([linea["cantidad"] for linea in lineas], [5, 7])
+        self.assertEqual(lineas[0]["producto_id"], self.producto.id)
+
+    def test_rearchivar_acumula(self):
+        """Test that archiving the same month again appends to the file and the rollup"""
+        archivo = ArchivoHistorialRecargas(dias=90, directorio=self.directorio.name)
+        self._recarga(self._fecha(2026, 1, 5), cantidad=5)
+        archivo.archivar(ahora=self.ahora)
+        self._recarga(self._fecha(2026, 1, 6), cantidad=3)
+        ruta = archivo.archivar(ahora=self.ahora)[0]["archivo"]
+
+        enero = ResumenMensualRecargas.objects.get(producto=self.producto)
+        self.assertEqual((enero.recargas, enero.cantidad_total), (2, 8))
+        with gzip.open(ruta, "rt", encoding="utf-8") as f:
+            self.assertEqual(len(f.readlines()), 2)
+
+    def test_comando_dry_run(self):
+        """Test that the dry run reports pending months without archiving"""
+        self._recarga(timezone.now() - datetime.timedelta(days=800))
+        salida = StringIO()
+        call_command(
+            "archivar_historial_recargas", "--dry-run", "--directorio", self.directorio.name, stdout=salida,
+        )
+        self.assertIn("Filas a archivar: 1", salida.getvalue())
+        self.assertEqual(HistorialRecarga.objects.count(), 1)
+
+    @override_settings(HISTORIAL_RECARGAS_DIR="")
+    def test_sin_directorio_no_borra(self):
+        """Test that nothing is deleted unless an archive directory is configured"""
+        self._recarga(timezone.now() - datetime.timedelta(days=800))
+        with self.assertRaises(CommandError):
+            call_command("archivar_historial_recargas", stdout=StringIO())
+        with override_settings(HISTORIAL_RECARGAS_ARCHIVAR=True):
+            with self.assertRaises(ImproperlyConfigured):
+                archivar_historial_recargas_task()
+        self.assertEqual(HistorialRecarga.objects.count(), 1)
+
+    def test_tarea_desactivada_por_defecto(self):
+        """Test that the scheduled task does nothing unless archiving is enabled"""
+        self._recarga(timezone.now() - datetime.timedelta(days=800))
+        with override_settings(HISTORIAL_RECARGAS_DIR=self.directorio.name):
+            self.assertEqual(archivar_historial_recargas_task(), "Archivo de historial desactivado")
+        self.assertEqual(HistorialRecarga.objects.count(), 1)
+
+    def test_vista_suma_resumenes(self):
+        """Test that the history view totals include archived rollups without scanning them"""
+        self._recarga(self._fecha(2025, 1, 5))
+        self._recarga(timezone.now())
+        ArchivoHistorialRecargas(dias=365, directorio=self.directorio.name).archivar()
+
+        client = APIClient()
+        client.force_authenticate(user=self.admin)
+        response = client.get(reverse("producto-historial-recargas", kwargs={"pk": self.producto.id}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["total_recargas"], 2)
+        self.assertEqual(len(response.data["historial"]), 1)
+        self.assertEqual(response.data["resumen_mensual_archivado"][0]["mes"], "2025-01")
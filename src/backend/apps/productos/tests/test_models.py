@@ -1,6 +1,6 @@
 from django.test import TestCase
 from django.contrib.auth import get_user_model
-from apps.productos.models import Tienda, Producto, Pedido, DetallePedido
+from apps.productos.models import Tienda, Producto, Pedido, DetallePedido, recalculo_total_diferido
 from decimal import Decimal
 
 User = get_user_model()
@@ -346,6 +346,53 @@ class TestDetallePedidoModel(TestCase):
         self.pedido.refresh_from_db()
         self.assertEqual(self.pedido.total, Decimal("0.00"))
 
+    def test_update_detalle_applies_delta(self):
+        """Test that editing a detalle only applies the subtotal difference"""
+        detalle = DetallePedido.objects.create(
+            pedido=self.pedido,
+            producto=self.producto,
+            cantidad=5,
+            precio_unitario=Decimal("10.00")
+        )
+        detalle = DetallePedido.objects.get(pk=detalle.pk)
+        detalle.cantidad = 2
+
+        with self.assertNumQueries(2):  # UPDATE detalle + UPDATE total
+            detalle.save()
+
+        self.pedido.refresh_from_db()
+        self.assertEqual(self.pedido.total, Decimal("20.00"))
+
+    def test_recalculo_total_diferido(self):
+        """Test that deferred edits recompute the total once at the end"""
+        producto2 = Producto.objects.create(
+            nombre="Producto Test 2",
+            descripcion="Desc",
+            precio=Decimal("5.00"),
+            stock=100,
+            tienda=self.tienda,
+            proveedor=self.proveedor
+        )
+
+        with recalculo_total_diferido():
+            DetallePedido.objects.create(
+                pedido=self.pedido,
+                producto=self.producto,
+                cantidad=1,
+                precio_unitario=Decimal("10.00")
+            )
+            DetallePedido.objects.create(
+                pedido=self.pedido,
+                producto=producto2,
+                cantidad=4,
+                precio_unitario=Decimal("5.00")
+            )
+            self.pedido.refresh_from_db()
+            self.assertEqual(self.pedido.total, Decimal("0"))
+
+        self.pedido.refresh_from_db()
+        self.assertEqual(self.pedido.total, Decimal("30.00"))
+
     def test_detalle_pedido_unique_together(self):
         """Test that duplicate producto in same pedido is not allowed"""
         DetallePedido.objects.create(
@@ -51,6 +51,37 @@ class TestProductosAudit(APITestCase):
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+    def test_list_productos_cacheado(self):
+        """Test that repeated listings are served from cache without queries"""
+        url = reverse('producto-list')
+        primera = self.client.get(url)
+        with self.assertNumQueries(0):
+            segunda = self.client.get(url)
+        self.assertEqual(segunda.status_code, status.HTTP_200_OK)
+        self.assertEqual(segunda.data, primera.data)
+        self.assertIn('ETag', segunda)
+        self.assertIn('Last-Modified', segunda)
+
+    def test_list_productos_not_modified(self):
+        """Test that a matching If-None-Match returns 304"""
+        url = reverse('producto-list')
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_list_productos_invalidado_al_cambiar(self):
+        """Test that changing a product invalidates the cached listing"""
+        url = reverse('producto-list')
+        etag = self.client.get(url)['ETag']
+
+        self.producto.precio = 25.00
+        self.producto.save()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data['results'][0]['precio'], '25.00')
+
     def test_create_producto_admin(self):
         """Test that admin can create products"""
         self.client.force_authenticate(user=self.admin)
@@ -92,6 +123,78 @@ class TestProductosAudit(APITestCase):
         self.producto.refresh_from_db()
         self.assertEqual(self.producto.stock, 110)
 
+    def test_historial_recargas_paginado(self):
+        """Test that recharge history is paged by cursor and reports the full total"""
+        from apps.productos.models import HistorialRecarga
+
+        for i in range(25):
+            HistorialRecarga.objects.create(
+                producto=self.producto, cantidad=1, stock_anterior=i, stock_nuevo=i + 1
+            )
+        self.client.force_authenticate(user=self.admin)
+        url = reverse('producto-historial-recargas', kwargs={'pk': self.producto.id})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total_recargas'], 25)
+        self.assertEqual(len(response.data['historial']), 20)
+
+        siguiente = self.client.get(response.data['next'])
+        self.assertEqual(len(siguiente.data['historial']), 5)
+        self.assertIsNone(siguiente.data['next'])
+
+    def test_productos_stock_bajo_por_deficit(self):
+        """Test that low-stock products are filtered in the database and sorted by deficit"""
+        from apps.productos.models import StockConfig
+
+        for i, (stock, minimo) in enumerate([(5, 10), (0, 20), (30, 10), (8, 8)]):
+            producto = Producto.objects.create(
+                nombre=f"Bajo {i}", descripcion="Desc", precio=1, stock=stock,
+                tienda=self.tienda, proveedor=self.proveedor,
+            )
+            StockConfig.objects.create(producto=producto, stock_minimo=minimo)
+        self.client.force_authenticate(user=self.admin)
+        url = reverse('producto-productos-stock-bajo')
+
+        # COUNT + página con producto y proveedor en la misma consulta
+        with self.assertNumQueries(2):
+            response = self.client.get(url, {'page_size': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual([p['deficit'] for p in response.data['productos']], [20, 5])
+        self.assertEqual(response.data['productos'][0]['proveedor'], "Proveedor User")
+
+        response = self.client.get(url, {'orden': 'stock'})
+        self.assertEqual([p['stock_actual'] for p in response.data['productos']], [0, 5, 8])
+        self.assertEqual(self.client.get(url, {'orden': 'precio'}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_umbral_recarga_sigue_la_configuracion(self):
+        """Test that config changes keep the low-stock index column in sync"""
+        from django.db import connection
+        from apps.productos.models import StockConfig
+        from apps.productos.services import RecargaStock
+
+        self.producto.stock = 5
+        self.producto.save()
+        config = StockConfig.objects.create(producto=self.producto, stock_minimo=10)
+        self.assertEqual(list(RecargaStock.stock_bajo().values_list('producto_id', flat=True)), [self.producto.id])
+
+        config.stock_minimo = 3
+        config.save()
+        self.producto.refresh_from_db()
+        self.assertEqual(self.producto.umbral_recarga, 3)
+        self.assertFalse(RecargaStock.stock_bajo().exists())
+
+        config.recarga_automatica_activa = False
+        config.save()
+        self.producto.refresh_from_db()
+        self.assertIsNone(self.producto.umbral_recarga)
+
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                sql, params = RecargaStock.stock_bajo().query.sql_with_params()
+                cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+                self.assertIn('producto_bajo_umbral_idx', str(cursor.fetchall()))
+
     def test_ajustar_stock_insuficiente(self):
         """Test that reducing stock beyond available fails"""
         self.client.force_authenticate(user=self.admin)
@@ -164,6 +267,120 @@ class TestPedidosAudit(APITestCase):
         self.producto.refresh_from_db()
         self.assertEqual(self.producto.stock, 98)
 
+    def test_crear_pedido_stock_insuficiente(self):
+        """Test that insufficient stock returns per-item failures and no stock is taken"""
+        from apps.pagos.models import MetodoPago, EstadoPago
+
+        MetodoPago.objects.create(nombre="Efectivo", activo=True)
+        EstadoPago.objects.create(nombre="Pendiente")
+
+        self.client.force_authenticate(user=self.cliente)
+        url = reverse('pedido-crear-pedido')
+        data = {
+            "tienda_id": self.tienda.id,
+            "detalles": [{"producto": self.producto.id, "cantidad": 101}],
+            "metodo_pago": "Efectivo",
+            "monto_pago": 1010.00
+        }
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["fallos"][0]["producto"], self.producto.id)
+        self.assertEqual(Pedido.objects.count(), 0)
+
+        self.producto.refresh_from_db()
+        self.assertEqual(self.producto.stock, 100)
+
+    def test_crear_pedidos_lote(self):
+        """Test that a batch creates valid orders and reports the failing ones"""
+        from apps.pagos.models import MetodoPago, EstadoPago, Pago
+
+        MetodoPago.objects.create(nombre="Efectivo", activo=True)
+        EstadoPago.objects.create(nombre="Pendiente")
+
+        self.client.force_authenticate(user=self.cliente)
+        url = reverse('pedido-crear-pedidos-lote')
+        pedido_valido = {
+            "tienda_id": self.tienda.id,
+            "detalles": [{"producto": self.producto.id, "cantidad": 60}],
+            "metodo_pago": "efectivo",
+            "monto_pago": 600.00
+        }
+        data = {
+            "pedidos": [
+                pedido_valido,
+                # Ya no queda stock suficiente tras el primer pedido
+                pedido_valido,
+                {"tienda_id": self.tienda.id, "detalles": []},
+                {
+                    "tienda_id": self.tienda.id,
+                    "detalles": [{"producto": self.producto.id, "cantidad": 1}],
+                    "metodo_pago": "Efectivo",
+                    "monto_pago": 10.00
+                },
+            ]
+        }
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["creados"], 2)
+        resultados = response.data["resultados"]
+        self.assertEqual([r["exito"] for r in resultados], [True, False, False, True])
+        self.assertEqual(resultados[1]["fallos"][0]["producto"], self.producto.id)
+
+        self.assertEqual(Pedido.objects.count(), 2)
+        self.assertEqual(DetallePedido.objects.count(), 2)
+        self.assertEqual(Pago.objects.count(), 2)
+        self.producto.refresh_from_db()
+        self.assertEqual(self.producto.stock, 39)
+
+    def test_crear_pedidos_lote_tienda_inexistente(self):
+        """Test that an unknown store fails only its own order in a batch"""
+        from apps.pagos.models import MetodoPago, EstadoPago
+
+        MetodoPago.objects.create(nombre="Efectivo", activo=True)
+        EstadoPago.objects.create(nombre="Pendiente")
+
+        self.client.force_authenticate(user=self.cliente)
+        pedido = {
+            "tienda_id": self.tienda.id,
+            "detalles": [{"producto": self.producto.id, "cantidad": 1}],
+            "metodo_pago": "Efectivo",
+            "monto_pago": 10.00
+        }
+        data = {"pedidos": [pedido, {**pedido, "tienda_id": self.tienda.id + 999}]}
+        response = self.client.post(reverse('pedido-crear-pedidos-lote'), data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        resultados = response.data["resultados"]
+        self.assertEqual([r["exito"] for r in resultados], [True, False])
+        self.assertIn("Tienda", resultados[1]["error"])
+        self.assertEqual(Pedido.objects.count(), 1)
+        self.producto.refresh_from_db()
+        self.assertEqual(self.producto.stock, 99)
+
+    def test_mis_pedidos_paginado(self):
+        """Test that mis_pedidos goes through the paginator"""
+        for _ in range(12):
+            Pedido.objects.create(cliente=self.cliente, tienda=self.tienda)
+        self.client.force_authenticate(user=self.cliente)
+        response = self.client.get(reverse('pedido-mis-pedidos'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 12)
+        self.assertEqual(len(response.data['results']), 10)
+
+    def test_mis_pedidos_stream(self):
+        """Test that ?stream=true returns the full set as streamed JSON"""
+        import json
+
+        for _ in range(12):
+            Pedido.objects.create(cliente=self.cliente, tienda=self.tienda)
+        self.client.force_authenticate(user=self.cliente)
+        response = self.client.get(reverse('pedido-mis-pedidos'), {'stream': 'true'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        pedidos = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(len(pedidos), 12)
+        self.assertEqual(pedidos[0]['cliente']['id'], self.cliente.id)
+
     def test_crear_pedido_sin_autenticacion(self):
         """Test that unauthenticated users cannot create orders"""
         url = reverse('pedido-crear-pedido')
@@ -0,0 +1,104 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from apps.productos.models import HistorialRecarga, Producto, StockConfig, Tienda
+from apps.productos.recargas import ColaRecargas
+from apps.productos.services import ReservaStock
+
+User = get_user_model()
+
+
+@override_settings(RECARGA_ESPERA_SEGUNDOS=30)
+class TestColaRecargas(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(email="admin@test.com", nombre="Admin", password="admin123", rol="admin")
+        proveedor = User.objects.create_user(email="prov@test.com", nombre="Prov", password="prov123", rol="proveedor")
+        tienda = Tienda.objects.create(nombre="Tienda", direccion="Calle 1", administrador=self.admin)
+        self.producto = Producto.objects.create(
+            nombre="Producto", descripcion="Desc", precio=Decimal("1.00"),
+            stock=15, tienda=tienda, proveedor=proveedor,
+        )
+        StockConfig.objects.create(producto=self.producto, stock_minimo=10, cantidad_recarga=50)
+        programar = mock.patch.object(ColaRecargas, "_programar")
+        self.programar = programar.start()
+        self.addCleanup(programar.stop)
+
+    def _reservar(self, cantidad):
+        with self.captureOnCommitCallbacks(execute=True):
+            return ReservaStock.reservar([(self.producto.id, cantidad)])
+
+    def test_solo_el_descuento_que_cruza_encola(self):
+        """Test that only the decrement crossing stock_minimo emits an event"""
+        self._reservar(4)   # 15 -> 11, sigue por encima
+        self.assertEqual(ColaRecargas.pendientes(), set())
+        self._reservar(3)   # 11 -> 8, cruza
+        self._reservar(2)   # 8 -> 6, ya estaba por debajo
+        self.assertEqual(ColaRecargas.pendientes(), {self.producto.id})
+
+    def test_rafaga_programa_un_solo_consumo(self):
+        """Test that a burst of crossings schedules the consumer once per window"""
+        ColaRecargas.encolar([self.producto.id])
+        ColaRecargas.encolar([self.producto.id])
+        self.assertEqual(self.programar.call_count, 1)
+
+    def test_consumir_recarga_en_lote(self):
+        """Test that the consumer restocks queued products once"""
+        self._reservar(6)   # 15 -> 9
+        recargas = ColaRecargas.consumir()
+
+        self.assertEqual([r["stock_nuevo"] for r in recargas], [59])
+        self.producto.refresh_from_db()
+        self.assertEqual(self.producto.stock, 59)
+        self.assertEqual(HistorialRecarga.objects.filter(producto=self.producto).count(), 1)
+        # La cola quedó vacía y el próximo cruce vuelve a programar
+        self.assertEqual(ColaRecargas.consumir(), [])
+
+    def test_evento_viejo_no_recarga(self):
+        """Test that an event for a product already above the minimum is skipped"""
+        self._reservar(6)
+        Producto.objects.filter(pk=self.producto.pk).update(stock=40)
+        self.assertEqual(ColaRecargas.consumir(), [])
+        self.assertFalse(HistorialRecarga.objects.exists())
+
+    def test_ajustar_stock_encola(self):
+        """Test that manually reducing stock below the minimum emits an event"""
+        client = APIClient()
+        client.force_authenticate(user=self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post(
+                reverse("producto-ajustar-stock", kwargs={"pk": self.producto.id}),
+                {"cantidad": 10, "operacion": "reducir"},
+                format="json",
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(ColaRecargas.pendientes(), {self.producto.id})
+
+
+@override_settings(RECARGA_ESPERA_SEGUNDOS=30)
+class TestProgramarConsumo(TestCase):
+    def _programar(self):
+        from apps.productos.tasks import consumir_recargas_task
+        with mock.patch.object(consumir_recargas_task, "apply_async") as apply_async, \
+                mock.patch("apps.productos.recargas.threading.Timer") as timer:
+            ColaRecargas._programar()
+        return apply_async, timer
+
+    @override_settings(CACHE_COMPARTIDA=True)
+    def test_cache_compartida_usa_celery(self):
+        """Test that a shared cache hands the consumer to Celery"""
+        apply_async, timer = self._programar()
+        apply_async.assert_called_once_with(countdown=30, retry=False)
+        timer.assert_not_called()
+
+    @override_settings(CACHE_COMPARTIDA=False)
+    def test_cache_local_usa_temporizador(self):
+        """Test that a per-process cache consumes in the same process"""
+        apply_async, timer = self._programar()
+        apply_async.assert_not_called()
+        timer.assert_called_once_with(30, ColaRecargas._consumir_en_hilo)
+        timer.return_value.start.assert_called_once()
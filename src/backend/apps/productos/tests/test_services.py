@@ -0,0 +1,229 @@
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from io import StringIO
+
+from django.core.management import call_command
+from apps.productos.models import Tienda, Producto, DetallePedido, StockConfig, HistorialRecarga
+from apps.productos.services import ConstructorPedido, RecargaStock, ReservaStock, StockInsuficienteError
+from decimal import Decimal
+
+User = get_user_model()
+
+
+class TestReservaStock(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            email="admin@test.com",
+            nombre="Admin",
+            password="admin123",
+            rol="admin"
+        )
+        self.proveedor = User.objects.create_user(
+            email="prov@test.com",
+            nombre="Proveedor",
+            password="prov123",
+            rol="proveedor"
+        )
+        self.tienda = Tienda.objects.create(
+            nombre="Tienda Test",
+            direccion="Calle 123",
+            administrador=self.admin
+        )
+        self.producto1 = Producto.objects.create(
+            nombre="Producto 1",
+            descripcion="Desc",
+            precio=Decimal("10.00"),
+            stock=10,
+            tienda=self.tienda,
+            proveedor=self.proveedor
+        )
+        self.producto2 = Producto.objects.create(
+            nombre="Producto 2",
+            descripcion="Desc",
+            precio=Decimal("5.00"),
+            stock=3,
+            tienda=self.tienda,
+            proveedor=self.proveedor
+        )
+
+    def test_reservar_descuenta_stock(self):
+        """Test that all lines are decremented"""
+        ReservaStock.reservar([(self.producto1.id, 4), (self.producto2.id, 3)])
+        self.producto1.refresh_from_db()
+        self.producto2.refresh_from_db()
+        self.assertEqual(self.producto1.stock, 6)
+        self.assertEqual(self.producto2.stock, 0)
+
+    def test_reservar_agrupa_lineas_repetidas(self):
+        """Test that repeated products are summed before checking stock"""
+        with self.assertRaises(StockInsuficienteError):
+            ReservaStock.reservar([(self.producto2.id, 2), (self.producto2.id, 2)])
+        self.producto2.refresh_from_db()
+        self.assertEqual(self.producto2.stock, 3)
+
+    def test_reservar_insuficiente_revierte_todo(self):
+        """Test that a failing line rolls back the other decrements"""
+        with self.assertRaises(StockInsuficienteError) as context:
+            ReservaStock.reservar([(self.producto1.id, 4), (self.producto2.id, 5)])
+
+        fallos = context.exception.fallos
+        self.assertEqual(len(fallos), 1)
+        self.assertEqual(fallos[0]["producto"], self.producto2.id)
+        self.assertEqual(fallos[0]["disponible"], 3)
+        self.assertEqual(fallos[0]["solicitado"], 5)
+
+        self.producto1.refresh_from_db()
+        self.assertEqual(self.producto1.stock, 10)
+
+    def test_reservar_producto_inexistente(self):
+        """Test that missing products are reported as failures"""
+        with self.assertRaises(StockInsuficienteError) as context:
+            ReservaStock.reservar([(999999, 1)])
+        self.assertIn("no existe", context.exception.fallos[0]["error"])
+
+    def test_reservar_un_solo_update(self):
+        """Test that all lines are reserved with a single UPDATE"""
+        with self.assertNumQueries(4):  # savepoint + UPDATE + SELECT de cruces + release
+            ReservaStock.reservar([(self.producto1.id, 1), (self.producto2.id, 1)])
+
+    def test_liberar_devuelve_stock(self):
+        """Test that released quantities go back to inventory"""
+        ReservaStock.liberar([(self.producto1.id, 5)])
+        self.producto1.refresh_from_db()
+        self.assertEqual(self.producto1.stock, 15)
+
+
+class TestConstructorPedido(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            email="admin@test.com",
+            nombre="Admin",
+            password="admin123",
+            rol="admin"
+        )
+        self.proveedor = User.objects.create_user(
+            email="prov@test.com",
+            nombre="Proveedor",
+            password="prov123",
+            rol="proveedor"
+        )
+        self.cliente = User.objects.create_user(
+            email="cliente@test.com",
+            nombre="Cliente",
+            password="client123",
+            rol="cliente"
+        )
+        self.tienda = Tienda.objects.create(
+            nombre="Tienda Test",
+            direccion="Calle 123",
+            administrador=self.admin
+        )
+        self.productos = [
+            Producto.objects.create(
+                nombre=f"Producto {i}",
+                descripcion="Desc",
+                precio=Decimal("2.50"),
+                stock=100,
+                tienda=self.tienda,
+                proveedor=self.proveedor
+            )
+            for i in range(20)
+        ]
+
+    def _detalles(self, cantidad_productos):
+        return [
+            {"producto": producto.id, "cantidad": 2}
+            for producto in self.productos[:cantidad_productos]
+        ]
+
+    def test_crear_pedido_con_total(self):
+        """Test that the order is written once with its total and details"""
+        pedido = ConstructorPedido.crear(self.cliente, self.tienda.id, self._detalles(3))
+        pedido.refresh_from_db()
+        self.assertEqual(pedido.total, Decimal("15.00"))
+        self.assertEqual(DetallePedido.objects.filter(pedido=pedido).count(), 3)
+        self.productos[0].refresh_from_db()
+        self.assertEqual(self.productos[0].stock, 98)
+
+    def test_crear_pedido_agrupa_productos_repetidos(self):
+        """Test that repeated products become a single detail line"""
+        detalles = [
+            {"producto": self.productos[0].id, "cantidad": 1},
+            {"producto": self.productos[0].id, "cantidad": 2},
+        ]
+        pedido = ConstructorPedido.crear(self.cliente, self.tienda.id, detalles)
+        detalle = DetallePedido.objects.get(pedido=pedido)
+        self.assertEqual(detalle.cantidad, 3)
+
+    def test_crear_pedido_producto_inexistente(self):
+        """Test that unknown products abort the order"""
+        with self.assertRaises(ValueError):
+            ConstructorPedido.crear(
+                self.cliente, self.tienda.id, [{"producto": 999999, "cantidad": 1}]
+            )
+
+    def test_crear_pedido_consultas_constantes(self):
+        """Test that query count does not grow with the cart size"""
+        with self.assertNumQueries(9):
+            ConstructorPedido.crear(self.cliente, self.tienda.id, self._detalles(1))
+        with self.assertNumQueries(9):
+            ConstructorPedido.crear(self.cliente, self.tienda.id, self._detalles(20))
+
+
+class TestRecargaStock(TestCase):
+    def setUp(self):
+        admin = User.objects.create_user(email="admin@test.com", nombre="Admin", password="admin123", rol="admin")
+        self.proveedor = User.objects.create_user(email="prov@test.com", nombre="Prov", password="prov123", rol="proveedor")
+        self.tienda = Tienda.objects.create(nombre="Tienda", direccion="Calle 1", administrador=admin)
+
+    def _producto(self, stock, minimo=10, recarga=50, activa=True):
+        producto = Producto.objects.create(
+            nombre=f"Producto {Producto.objects.count()}", descripcion="Desc",
+            precio=Decimal("1.00"), stock=stock, tienda=self.tienda, proveedor=self.proveedor,
+        )
+        StockConfig.objects.create(
+            producto=producto, stock_minimo=minimo, cantidad_recarga=recarga,
+            recarga_automatica_activa=activa,
+        )
+        return producto
+
+    def test_recarga_solo_candidatos(self):
+        """Test that only active configs at or below the minimum are restocked"""
+        bajo = self._producto(stock=10, recarga=40)
+        alto = self._producto(stock=11)
+        inactivo = self._producto(stock=0, activa=False)
+
+        recargas = RecargaStock.ejecutar()
+
+        self.assertEqual([r["producto_id"] for r in recargas], [bajo.id])
+        bajo.refresh_from_db()
+        alto.refresh_from_db()
+        inactivo.refresh_from_db()
+        self.assertEqual((bajo.stock, alto.stock, inactivo.stock), (50, 11, 0))
+        historial = HistorialRecarga.objects.get(producto=bajo)
+        self.assertEqual((historial.stock_anterior, historial.stock_nuevo, historial.tipo), (10, 50, "automatica"))
+        config = StockConfig.objects.get(producto=bajo)
+        self.assertEqual(config.total_recargas, 1)
+        self.assertIsNotNone(config.ultima_recarga)
+
+    def test_consultas_constantes(self):
+        """Test that query count does not grow with the number of restocked products"""
+        self._producto(stock=0)
+        # SELECT, UPDATE de stock, INSERT de historial y UPDATE de configs (+ savepoint)
+        with self.assertNumQueries(6):
+            RecargaStock.ejecutar()
+        for _ in range(10):
+            self._producto(stock=1, recarga=5)
+        with self.assertNumQueries(6):
+            self.assertEqual(len(RecargaStock.ejecutar()), 10)
+
+    def test_dry_run_no_modifica(self):
+        """Test that dry runs report without touching stock or history"""
+        producto = self._producto(stock=2)
+        salida = StringIO()
+        call_command("recargar_stock_automatico", "--dry-run", stdout=salida)
+
+        self.assertIn("2 → 52", salida.getvalue())
+        producto.refresh_from_db()
+        self.assertEqual(producto.stock, 2)
+        self.assertFalse(HistorialRecarga.objects.exists())
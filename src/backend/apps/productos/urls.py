@@ -62,6 +62,8 @@ urlpatterns = [
 #          "detalles": [{"producto": int, "cantidad": int}, ...],
 #          "notas": "opcional"
 #        }
+# POST   /api/pedidos/crear_pedidos_lote/ - Crear varios pedidos (cliente)
+#        Body: {"pedidos": [<mismo cuerpo que crear_pedido>, ...]}
 # GET    /api/pedidos/{id}/               - Detalle de pedido
 # DELETE /api/pedidos/{id}/               - Cancelar pedido (solo admin)
 # POST   /api/pedidos/{id}/cambiar_estado/ - Cambiar estado (admin, comprador, logística)
@@ -4,6 +4,10 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, BasePermission
 from django.db import transaction
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from urllib.parse import urlencode
+import hashlib
 
 
 
@@ -15,11 +19,19 @@ from .serializers import (
     ProductoListSerializer,
     PedidoSerializer,
     PedidoCreateSerializer,
+    PedidoLoteSerializer,
     PedidoUpdateEstadoSerializer,
+    AjusteStockMasivoSerializer,
     PedidoListSerializer,
     DetallePedidoSerializer,
     SeccionSerializer,
 )
+from .services import AjusteStockMasivo, ConstructorPedido, RecargaStock, ReservaStock, StockInsuficienteError
+from .idempotencia import Idempotencia
+from .recargas import ColaRecargas
+from .cache import TAG_CATALOGO, ultima_modificacion_catalogo
+from backend.services.cache import get_or_set
+from pagination import KeysetPagination, ListadoPaginadoMixin
 from .permissions import (
     IsAdmin,
     IsCliente,
@@ -32,8 +44,8 @@ from .permissions import (
 # ======================== TIENDA VIEWSET ========================
 
 
-class TiendaViewSet(viewsets.ModelViewSet):
-    queryset = Tienda.objects.filter(activa=True)
+class TiendaViewSet(ListadoPaginadoMixin, viewsets.ModelViewSet):
+    queryset = Tienda.objects.filter(activa=True).select_related("administrador")
     serializer_class = TiendaSerializer
 
     def get_permissions(self):
@@ -45,36 +57,82 @@ class TiendaViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=["get"], permission_classes=[IsAuthenticated])
     def mis_tiendas(self, request):
-        tiendas = Tienda.objects.filter(administrador=request.user)
-        serializer = self.get_serializer(tiendas, many=True)
-        return Response(serializer.data)
+        tiendas = Tienda.objects.filter(administrador=request.user).select_related("administrador")
+        return self.listar(tiendas)
 
 
 # ======================== PRODUCTO VIEWSET ========================
 
 
-class ProductoViewSet(viewsets.ModelViewSet):
+class ProductoViewSet(ListadoPaginadoMixin, viewsets.ModelViewSet):
     serializer_class = ProductoSerializer
 
     def get_queryset(self):
+        productos = Producto.objects.select_related("tienda", "proveedor")
+        if self.action != "list":
+            # ProductoSerializer incluye las secciones
+            productos = productos.prefetch_related("secciones")
+
         # Allow public access to all active products
         if not self.request.user.is_authenticated:
-            return Producto.objects.filter(activo=True)
+            return productos.filter(activo=True)
         
         rol = getattr(self.request.user, "rol", None)
         if rol in ["admin"] or self.request.user.is_superuser:
-            return Producto.objects.filter(activo=True)
+            return productos.filter(activo=True)
         if rol == "proveedor":
-            return Producto.objects.filter(proveedor=self.request.user, activo=True)
+            return productos.filter(proveedor=self.request.user, activo=True)
         if rol == "cliente":
-            return Producto.objects.filter(activo=True)
-        return Producto.objects.filter(activo=True)  # Default to all
+            return productos.filter(activo=True)
+        return productos.filter(activo=True)  # Default to all
 
     def get_serializer_class(self):
         if self.action == "list":
             return ProductoListSerializer
         return ProductoSerializer
 
+    def _alcance_catalogo(self):
+        """Parte de la clave de cache que depende de quién consulta."""
+        user = self.request.user
+        if not user.is_authenticated:
+            return "publico"
+        rol = getattr(user, "rol", None)
+        if rol == "proveedor" and not user.is_superuser:
+            # Los proveedores solo ven sus propios productos
+            return f"proveedor:{user.pk}"
+        return f"rol:{rol}"
+
+    def list(self, request, *args, **kwargs):
+        """
+        Listado cacheado con validación condicional (ETag / Last-Modified).
+        Las peticiones repetidas se responden desde cache sin consultar la base
+        de datos, o con 304 si el cliente ya tiene la versión vigente.
+        """
+        ultima, total = ultima_modificacion_catalogo()
+        consulta = urlencode(sorted(request.query_params.lists()), doseq=True)
+        alcance = self._alcance_catalogo()
+
+        version = f"{alcance}|{consulta}|{ultima.isoformat() if ultima else ''}|{total}"
+        etag = f'"{hashlib.md5(version.encode("utf-8")).hexdigest()}"'
+        last_modified = int(ultima.timestamp()) if ultima else None
+
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            datos = get_or_set(
+                f"catalogo:lista:{alcance}:{request.get_host()}:{consulta}",
+                lambda: super(ProductoViewSet, self).list(request, *args, **kwargs).data,
+                tags=(TAG_CATALOGO,),
+            )
+            response = Response(datos)
+
+        response["ETag"] = etag
+        if last_modified is not None:
+            response["Last-Modified"] = http_date(last_modified)
+        patch_vary_headers(response, ["Authorization"])
+        return response
+
     def get_permissions(self):
         if self.action in ["list", "retrieve"]:
             permission_classes = []  # Public access for viewing products
@@ -101,14 +159,14 @@ class ProductoViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
         productos = self.get_queryset().filter(tienda_id=tienda_id)
-        serializer = self.get_serializer(productos, many=True)
-        return Response(serializer.data)
+        return self.listar(productos)
 
     @action(detail=False, methods=["get"], permission_classes=[IsProveedor])
     def mis_productos(self, request):
-        productos = Producto.objects.filter(proveedor=request.user, activo=True)
-        serializer = self.get_serializer(productos, many=True)
-        return Response(serializer.data)
+        productos = Producto.objects.filter(
+            proveedor=request.user, activo=True
+        ).select_related("tienda", "proveedor").prefetch_related("secciones")
+        return self.listar(productos)
 
     @action(detail=True, methods=["post"], permission_classes=[IsAdmin | IsProveedor])
     def ajustar_stock(self, request, pk=None):
@@ -144,6 +202,7 @@ class ProductoViewSet(viewsets.ModelViewSet):
                 mensaje = f"Stock aumentado a {nuevo_stock}"
             elif operacion == "reducir":
                 nuevo_stock = producto.reducir_stock(cantidad)
+                ColaRecargas.detectar({producto.id: cantidad})
                 mensaje = f"Stock reducido a {nuevo_stock}"
             else:
                 return Response(
@@ -161,6 +220,36 @@ class ProductoViewSet(viewsets.ModelViewSet):
         except ValueError as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=False, methods=["post"], permission_classes=[IsAdmin | IsProveedor])
+    def ajustar_stock_masivo(self, request):
+        """
+        Ajusta el stock de varios productos en una transacción. Acepta una
+        lista `[{producto_id, cantidad, operacion}]` o `{"ajustes": [...], "notas"}`.
+        Los proveedores solo pueden ajustar sus productos. Con la cabecera
+        `Idempotency-Key` un reintento no vuelve a aplicar los ajustes.
+        """
+        datos = {"ajustes": request.data} if isinstance(request.data, list) else request.data
+        serializer = AjusteStockMasivoSerializer(data=datos)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        def ajustar():
+            try:
+                ajustados = AjusteStockMasivo.aplicar(
+                    request.user,
+                    serializer.validated_data["ajustes"],
+                    notas=serializer.validated_data.get("notas"),
+                )
+            except PermissionError as e:
+                return status.HTTP_403_FORBIDDEN, {"error": str(e)}
+            except StockInsuficienteError as e:
+                return status.HTTP_400_BAD_REQUEST, {"error": str(e), "fallos": e.fallos}
+            except ValueError as e:
+                return status.HTTP_400_BAD_REQUEST, {"error": str(e)}
+            return status.HTTP_200_OK, {"ajustados": len(ajustados), "productos": ajustados}
+
+        return Idempotencia(request, "ajustar_stock_masivo").ejecutar(ajustar)
+
     @action(detail=True, methods=["post"], permission_classes=[IsAdmin])
     def asignar_proveedor(self, request, pk=None):
         """Asignar o cambiar el proveedor de un producto (solo admin)"""
@@ -293,37 +382,41 @@ class ProductoViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=["get"], permission_classes=[IsAdmin])
     def productos_stock_bajo(self, request):
-        """Listar productos con stock bajo que necesitan recarga"""
-        from .models import StockConfig
-        
-        configs = StockConfig.objects.filter(
-            recarga_automatica_activa=True
-        ).select_related('producto')
-        
-        productos_bajo_stock = []
-        for config in configs:
-            if config.necesita_recarga():
-                productos_bajo_stock.append({
-                    "id": config.producto.id,
-                    "nombre": config.producto.nombre,
-                    "stock_actual": config.producto.stock,
-                    "stock_minimo": config.stock_minimo,
-                    "cantidad_recarga": config.cantidad_recarga,
-                    "proveedor": config.producto.proveedor.nombre if config.producto.proveedor else None,
-                })
-        
-        return Response({
-            "total": len(productos_bajo_stock),
-            "productos": productos_bajo_stock,
-        })
+        """
+        Listar productos con stock bajo que necesitan recarga, paginado.
+        `?orden=deficit` (por defecto, mayor déficit primero), `nombre` o `stock`.
+        """
+        try:
+            configs = RecargaStock.stock_bajo(request.query_params.get("orden", "deficit"))
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        def serializar(configs):
+            return [{
+                "id": config.producto.id,
+                "nombre": config.producto.nombre,
+                "stock_actual": config.producto.stock,
+                "stock_minimo": config.stock_minimo,
+                "deficit": config.deficit,
+                "cantidad_recarga": config.cantidad_recarga,
+                "proveedor": config.producto.proveedor.nombre if config.producto.proveedor else None,
+            } for config in configs]
+
+        return self.listar(configs, serializar=serializar, clave="productos")
     
     @action(detail=True, methods=["get"], permission_classes=[IsAdmin | IsProveedor])
     def historial_recargas(self, request, pk=None):
-        """Ver historial de recargas de un producto"""
-        from .models import HistorialRecarga
+        """
+        Ver historial de recargas de un producto. El detalle cubre la ventana
+        de retención; lo archivado se informa con los resúmenes mensuales.
+        """
+        from .models import HistorialRecarga, ResumenMensualRecargas
         
         producto = self.get_object()
-        historial = HistorialRecarga.objects.filter(producto=producto).order_by('-fecha_creacion')[:20]
+        historial = HistorialRecarga.objects.filter(producto=producto).select_related('usuario')
+        paginador = KeysetPagination()
+        paginador.page_size = 20
+        pagina = paginador.paginate_queryset(historial, request, view=self)
         
         data = [{
             "id": h.id,
@@ -334,12 +427,20 @@ class ProductoViewSet(viewsets.ModelViewSet):
             "usuario": h.usuario.nombre if h.usuario else "Sistema",
             "notas": h.notas,
             "fecha": h.fecha_creacion.strftime("%Y-%m-%d %H:%M:%S"),
-        } for h in historial]
+        } for h in pagina]
+        
+        resumenes = [{
+            "mes": r.mes.strftime("%Y-%m"),
+            "recargas": r.recargas,
+            "cantidad_total": r.cantidad_total,
+        } for r in ResumenMensualRecargas.objects.filter(producto=producto)]
         
         return Response({
             "producto": producto.nombre,
-            "total_recargas": historial.count(),
+            "total_recargas": historial.count() + sum(r["recargas"] for r in resumenes),
             "historial": data,
+            "next": paginador.get_next_link(),
+            "resumen_mensual_archivado": resumenes,
         })
     
     @action(detail=False, methods=["post"], permission_classes=[IsAdmin])
@@ -391,17 +492,28 @@ class ProductoViewSet(viewsets.ModelViewSet):
 # ======================== PEDIDO VIEWSET ========================
 
 
-class PedidoViewSet(viewsets.ModelViewSet):
+class PedidoViewSet(ListadoPaginadoMixin, viewsets.ModelViewSet):
     serializer_class = PedidoSerializer
 
+    @staticmethod
+    def _con_relaciones(pedidos, detalles=False):
+        """Carga las relaciones que serializan PedidoListSerializer / PedidoSerializer."""
+        pedidos = pedidos.select_related("cliente", "tienda", "tienda__administrador")
+        if detalles:
+            pedidos = pedidos.prefetch_related("detalles")
+        return pedidos
+
     def get_queryset(self):
+        pedidos = self._con_relaciones(
+            Pedido.objects.all(), detalles=self.action != "list"
+        )
         rol = getattr(self.request.user, "rol", None)
         if rol in ["admin"] or self.request.user.is_superuser:
-            return Pedido.objects.all()
+            return pedidos
         if rol == "cliente":
-            return Pedido.objects.filter(cliente=self.request.user)
+            return pedidos.filter(cliente=self.request.user)
         if rol == "logistica":
-            return Pedido.objects.filter(estado__in=["pendiente", "preparando", "en_transito", "entregado"])
+            return pedidos.filter(estado__in=["pendiente", "preparando", "en_transito", "entregado"])
         return Pedido.objects.none()
 
     def get_serializer_class(self):
@@ -409,6 +521,8 @@ class PedidoViewSet(viewsets.ModelViewSet):
             return PedidoListSerializer
         if self.action == "crear_pedido":
             return PedidoCreateSerializer
+        if self.action == "crear_pedidos_lote":
+            return PedidoLoteSerializer
         if self.action == "cambiar_estado":
             return PedidoUpdateEstadoSerializer
         return PedidoSerializer
@@ -422,7 +536,7 @@ class PedidoViewSet(viewsets.ModelViewSet):
             "en_preparacion",
         ]:
             permission_classes = [IsAuthenticated]
-        elif self.action == "crear_pedido":
+        elif self.action in ["crear_pedido", "crear_pedidos_lote"]:
             permission_classes = [IsCliente]
         elif self.action == "cambiar_estado":
             permission_classes = [IsAdmin | IsLogistica]
@@ -454,48 +568,33 @@ class PedidoViewSet(viewsets.ModelViewSet):
                 monto_pago = serializer.validated_data["monto_pago"]
 
                 # 1. Validar Método de Pago
-                from apps.pagos.models import MetodoPago, EstadoPago, Pago
+                from apps.pagos.models import MetodoPago, Pago
+                from apps.pagos.cache import metodos_pago, estados_pago
                 try:
-                    metodo_pago = MetodoPago.objects.get(nombre__iexact=metodo_pago_nombre, activo=True)
+                    metodo_pago = metodos_pago.por_nombre(metodo_pago_nombre)
                 except MetodoPago.DoesNotExist:
+                    metodo_pago = None
+                if metodo_pago is None or not metodo_pago.activo:
                     raise ValueError(f"Método de pago '{metodo_pago_nombre}' no válido o inactivo")
 
                 # 2. Obtener Estado de Pago Inicial (Pendiente)
-                estado_pendiente, _ = EstadoPago.objects.get_or_create(nombre="Pendiente")
-
-                # 3. Crear Pedido
-                pedido = Pedido.objects.create(
-                    cliente=request.user, tienda_id=tienda_id, notas=notas
+                estado_pendiente = estados_pago.obtener_o_crear("Pendiente")
+
+                # 3. Crear Pedido, Detalles y Reservar Stock (consultas fijas por pedido)
+                pedido = ConstructorPedido.crear(
+                    cliente=request.user,
+                    tienda_id=tienda_id,
+                    detalles=serializer.validated_data["detalles"],
+                    notas=notas,
                 )
+                total_pedido = pedido.total
 
-                # 4. Crear Detalles y Actualizar Stock
-                detalles_data = serializer.validated_data["detalles"]
-                for detalle_data in detalles_data:
-                    producto_id = detalle_data["producto"]
-                    cantidad = detalle_data["cantidad"]
-                    
-                    try:
-                        producto = Producto.objects.get(id=producto_id)
-                    except Producto.DoesNotExist:
-                        raise ValueError(f"Producto {producto_id} no existe")
-                    
-                    producto.reducir_stock(cantidad)
-                    DetallePedido.objects.create(
-                        pedido=pedido,
-                        producto=producto,
-                        cantidad=cantidad,
-                        precio_unitario=producto.precio,
-                    )
-
-                # 5. Calcular Total del Pedido
-                total_pedido = pedido.calcular_total()
-
-                # 6. Validar Monto del Pago (Debe coincidir con el total)
+                # 4. Validar Monto del Pago (Debe coincidir con el total)
                 # Nota: En un escenario real, esto podría variar (pagos parciales), pero por ahora exigimos exactitud.
                 if float(monto_pago) != float(total_pedido):
                      raise ValueError(f"El monto del pago ({monto_pago}) no coincide con el total del pedido ({total_pedido})")
 
-                # 7. Crear Registro de Pago
+                # 5. Crear Registro de Pago
                 Pago.objects.create(
                     usuario=request.user,
                     pedido=pedido,
@@ -507,9 +606,54 @@ class PedidoViewSet(viewsets.ModelViewSet):
                 return Response(
                     PedidoSerializer(pedido).data, status=status.HTTP_201_CREATED
                 )
+        except StockInsuficienteError as e:
+            return Response(
+                {"error": str(e), "fallos": e.fallos},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=False, methods=["post"], permission_classes=[IsCliente])
+    def crear_pedidos_lote(self, request):
+        """
+        Crea varios pedidos en una sola petición (clientes mayoristas).
+        Retorna el resultado de cada pedido en el orden recibido.
+        """
+        lote = PedidoLoteSerializer(data=request.data)
+        if not lote.is_valid():
+            return Response(lote.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        resultados = [None] * len(lote.validated_data["pedidos"])
+        validos = []
+        indices_validos = []
+        for indice, datos in enumerate(lote.validated_data["pedidos"]):
+            serializer = PedidoCreateSerializer(data=datos, context={"request": request})
+            if serializer.is_valid():
+                validos.append(serializer.validated_data)
+                indices_validos.append(indice)
+            else:
+                resultados[indice] = {
+                    "indice": indice,
+                    "exito": False,
+                    "error": serializer.errors,
+                }
+
+        if validos:
+            for indice, resultado in zip(indices_validos, ConstructorPedido.crear_lote(request.user, validos)):
+                resultado["indice"] = indice
+                resultados[indice] = resultado
+
+        creados = sum(1 for resultado in resultados if resultado["exito"])
+        return Response(
+            {
+                "creados": creados,
+                "fallidos": len(resultados) - creados,
+                "resultados": resultados,
+            },
+            status=status.HTTP_201_CREATED if creados else status.HTTP_400_BAD_REQUEST,
+        )
+
     @action(
         detail=True,
         methods=["post", "put", "patch"],
@@ -545,8 +689,9 @@ class PedidoViewSet(viewsets.ModelViewSet):
         pedido.save()
 
         if nuevo_estado == "cancelado":
-            for detalle in pedido.detalles.all():
-                detalle.producto.aumentar_stock(detalle.cantidad)
+            ReservaStock.liberar(
+                pedido.detalles.values_list("producto_id", "cantidad")
+            )
 
         return Response(
             {
@@ -557,29 +702,30 @@ class PedidoViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=["get"], permission_classes=[IsCliente])
     def mis_pedidos(self, request):
-        pedidos = Pedido.objects.filter(cliente=request.user).order_by(
-            "-fecha_creacion"
+        pedidos = self._con_relaciones(
+            Pedido.objects.filter(cliente=request.user).order_by("-fecha_creacion")
         )
-        serializer = PedidoListSerializer(pedidos, many=True)
-        return Response(serializer.data)
+        return self.listar(pedidos, serializer_class=PedidoListSerializer)
 
     @action(detail=False, methods=["get"], permission_classes=[IsLogistica])
     def pendientes(self, request):
-        pedidos = Pedido.objects.filter(estado="pendiente").order_by("fecha_creacion")
-        serializer = PedidoListSerializer(pedidos, many=True)
-        return Response(serializer.data)
+        pedidos = self._con_relaciones(
+            Pedido.objects.filter(estado="pendiente").order_by("fecha_creacion")
+        )
+        return self.listar(pedidos, serializer_class=PedidoListSerializer)
 
     @action(detail=False, methods=["get"], permission_classes=[IsLogistica])
     def en_preparacion(self, request):
-        pedidos = Pedido.objects.filter(estado="preparando").order_by("fecha_creacion")
-        serializer = PedidoListSerializer(pedidos, many=True)
-        return Response(serializer.data)
+        pedidos = self._con_relaciones(
+            Pedido.objects.filter(estado="preparando").order_by("fecha_creacion")
+        )
+        return self.listar(pedidos, serializer_class=PedidoListSerializer)
 
 
 # ======================== DETALLE PEDIDO VIEWSET ========================
 
 
-class DetallePedidoViewSet(viewsets.ReadOnlyModelViewSet):
+class DetallePedidoViewSet(ListadoPaginadoMixin, viewsets.ReadOnlyModelViewSet):
     serializer_class = DetallePedidoSerializer
     permission_classes = [IsAuthenticated]
 
@@ -613,9 +759,8 @@ class DetallePedidoViewSet(viewsets.ReadOnlyModelViewSet):
                     {"error": "No tiene permiso para ver este pedido"},
                     status=status.HTTP_403_FORBIDDEN,
                 )
-            detalles = DetallePedido.objects.filter(pedido_id=pedido_id)
-            serializer = self.get_serializer(detalles, many=True)
-            return Response(serializer.data)
+            detalles = DetallePedido.objects.filter(pedido_id=pedido_id).order_by("id")
+            return self.listar(detalles)
         except Pedido.DoesNotExist:
             return Response(
                 {"error": "Pedido no encontrado"}, status=status.HTTP_404_NOT_FOUND
@@ -627,7 +772,7 @@ class DetallePedidoViewSet(viewsets.ReadOnlyModelViewSet):
 
 class SeccionViewSet(viewsets.ModelViewSet):
     """ViewSet para gestionar secciones de productos"""
-    queryset = Seccion.objects.filter(activa=True)
+    queryset = Seccion.objects.filter(activa=True).prefetch_related("productos")
     serializer_class = SeccionSerializer
     permission_classes = [IsAuthenticated]
 
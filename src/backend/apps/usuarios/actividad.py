@@ -0,0 +1,201 @@
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.db.models import Case, DateTimeField, Value, When
+from django.utils import timezone
+
+from backend.services.cache import incrementar
+
+logger = logging.getLogger(__name__)
+
+
+class RegistroActividad:
+    """
+    Registro de última actividad de los usuarios sin escribir en cada petición.
+
+    - Cada usuario se registra como máximo una vez por ventana
+      (ACTIVIDAD_VENTANA_SEGUNDOS): primero un filtro en memoria del proceso y
+      luego `cache.add`, que es atómico entre procesos.
+    - Los registros se encolan en la cache en ranuras numeradas con `incr` y
+      `volcar()` los escribe con un único UPDATE ... CASE. Con
+      ACTIVIDAD_VOLCADO_LOCAL (siempre que la cache es por proceso) cada
+      proceso web vuelca cada ventana desde un hilo daemon; si no, lo hace
+      `volcar_actividad_task` desde Celery Beat; `volcar()` se ejecuta de a
+      uno entre procesos. Lo encolado en la última ventana de un proceso que
+      termina se pierde.
+    - `usuarios_activos()` cuenta usuarios distintos vistos en la ventana de
+      actividad actual sin consultar la base de datos.
+    """
+
+    PREFIJO = "actividad"
+    TIMEOUT_PENDIENTE = 60 * 60 * 24
+    TIMEOUT_BLOQUEO = 60
+    MAXIMO_LOCAL = 10000
+
+    _local = {}
+    _lock = threading.Lock()
+    _volcador = None
+
+    @staticmethod
+    def ventana():
+        return getattr(settings, "ACTIVIDAD_VENTANA_SEGUNDOS", 60)
+
+    @staticmethod
+    def ventana_activos():
+        return getattr(settings, "ACTIVIDAD_VENTANA_ACTIVOS_SEGUNDOS", 300)
+
+    @classmethod
+    def _clave(cls, *partes):
+        return ":".join([cls.PREFIJO, *map(str, partes)])
+
+    @classmethod
+    def registrar(cls, usuario_id, ahora=None):
+        """
+        Anota actividad de `usuario_id`. Retorna True si quedó encolada y False
+        si ya se había registrado dentro de la ventana.
+        """
+        ventana = cls.ventana()
+        instante = time.monotonic()
+
+        with cls._lock:
+            ultimo = cls._local.get(usuario_id)
+            if ultimo is not None and instante - ultimo < ventana:
+                return False
+            if len(cls._local) >= cls.MAXIMO_LOCAL:
+                cls._local.clear()
+            cls._local[usuario_id] = instante
+
+        if not cache.add(cls._clave("marca", usuario_id), 1, ventana):
+            # Otro proceso ya lo registró en esta ventana
+            return False
+
+        ahora = ahora or timezone.now()
+        ranura = incrementar(cls._clave("contador"))
+        cache.set(cls._clave("pendiente", ranura), (usuario_id, ahora), cls.TIMEOUT_PENDIENTE)
+
+        cls._contar_activo(usuario_id, ahora)
+        cls._asegurar_volcador()
+        return True
+
+    @classmethod
+    def _asegurar_volcador(cls):
+        if not getattr(settings, "ACTIVIDAD_VOLCADO_LOCAL", True):
+            return
+        with cls._lock:
+            if cls._volcador is None or not cls._volcador.is_alive():
+                cls._volcador = threading.Thread(
+                    target=cls._volcar_periodicamente, name="volcado-actividad", daemon=True
+                )
+                cls._volcador.start()
+
+    @classmethod
+    def _volcar_periodicamente(cls):
+        while True:
+            time.sleep(cls.ventana())
+            try:
+                cls.volcar()
+            except Exception:
+                logger.exception("Error al volcar la actividad de usuarios")
+            finally:
+                close_old_connections()
+
+    @classmethod
+    def _bloque(cls, ahora):
+        return int(ahora.timestamp()) // cls.ventana_activos()
+
+    @classmethod
+    def _contar_activo(cls, usuario_id, ahora):
+        bloque = cls._bloque(ahora)
+        timeout = cls.ventana_activos() * 2
+        if cache.add(cls._clave("visto", bloque, usuario_id), 1, timeout):
+            incrementar(cls._clave("activos", bloque), timeout)
+
+    @classmethod
+    def usuarios_activos(cls, ahora=None):
+        """
+        Usuarios distintos con actividad en el bloque actual de
+        ACTIVIDAD_VENTANA_ACTIVOS_SEGUNDOS (o en el anterior, si el actual
+        recién comienza y aún tiene menos usuarios).
+        """
+        bloque = cls._bloque(ahora or timezone.now())
+        conteos = cache.get_many([cls._clave("activos", bloque), cls._clave("activos", bloque - 1)])
+        return max(conteos.values(), default=0)
+
+    @classmethod
+    def volcar(cls):
+        """
+        Escribe en la base de datos la actividad encolada desde el último
+        volcado, con un único UPDATE. Retorna la cantidad de usuarios actualizados.
+
+        `registrar` toma la ranura con `incr` antes de escribirla, así que el
+        cursor solo avanza por ranuras consecutivas ya escritas: una ranura
+        que falta se espera al siguiente volcado y solo se salta si sigue
+        faltando después de una ventana (el proceso que la tomó terminó).
+        Un volcado a la vez entre procesos (`cache.add`).
+        """
+        clave_bloqueo = cls._clave("volcando")
+        if not cache.add(clave_bloqueo, 1, cls.TIMEOUT_BLOQUEO):
+            return 0
+        try:
+            return cls._volcar()
+        finally:
+            cache.delete(clave_bloqueo)
+
+    @classmethod
+    def _volcar(cls):
+        from .models import Usuario
+
+        clave_cursor = cls._clave("volcado")
+        desde = cache.get(clave_cursor, 0)
+        hasta = cache.get(cls._clave("contador"), 0)
+        if hasta < desde:
+            # El contador se reinició (cache vaciada)
+            desde = 0
+        if hasta == desde:
+            return 0
+
+        claves = {ranura: cls._clave("pendiente", ranura) for ranura in range(desde + 1, hasta + 1)}
+        encontrados = cache.get_many(list(claves.values()))
+        cursor = desde
+        for ranura, clave in claves.items():
+            if clave not in encontrados and not cls._ranura_perdida(ranura):
+                break
+            cursor = ranura
+        if cursor == desde:
+            return 0
+
+        volcadas = [claves[ranura] for ranura in range(desde + 1, cursor + 1)]
+        cache.set(clave_cursor, cursor, None)
+        cache.delete_many(volcadas)
+
+        ultimos = {}
+        for usuario_id, fecha in (encontrados[clave] for clave in volcadas if clave in encontrados):
+            if usuario_id not in ultimos or fecha > ultimos[usuario_id]:
+                ultimos[usuario_id] = fecha
+        if not ultimos:
+            return 0
+
+        return Usuario.objects.filter(pk__in=list(ultimos)).update(
+            last_activity=Case(
+                *[When(pk=usuario_id, then=Value(fecha)) for usuario_id, fecha in ultimos.items()],
+                output_field=DateTimeField(),
+            )
+        )
+
+    @classmethod
+    def _ranura_perdida(cls, ranura):
+        """True si `ranura` lleva al menos una ventana asignada sin escribirse."""
+        clave = cls._clave("hueco", ranura)
+        instante = time.time()
+        cache.add(clave, instante, cls.TIMEOUT_PENDIENTE)
+        return instante - cache.get(clave, instante) >= cls.ventana()
+
+    @classmethod
+    def limpiar(cls):
+        """Vacía el filtro en memoria (útil en tests)."""
+        with cls._lock:
+            cls._local.clear()
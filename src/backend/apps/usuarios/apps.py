@@ -5,3 +5,9 @@ class UsuariosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.usuarios'
     label = 'usuarios'
+
+    def ready(self):
+        from .authentication import EstadoAutorizacion
+        from .estadisticas import EstadisticasUsuarios
+        EstadoAutorizacion.conectar()
+        EstadisticasUsuarios.conectar()
@@ -0,0 +1,199 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.utils.functional import LazyObject, empty
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import Usuario
+
+# Claims firmados en el token que bastan para autenticar y autorizar por rol
+CLAIMS_USUARIO = ("rol", "estado", "is_superuser")
+
+
+def claims_usuario(usuario):
+    return {claim: getattr(usuario, claim) for claim in CLAIMS_USUARIO}
+
+
+def cache_compartida():
+    """
+    La invalidación al guardar un Usuario solo llega a todos los procesos si
+    la cache es compartida; con cache por proceso se consulta la base de datos.
+    """
+    return getattr(settings, "CACHE_COMPARTIDA", False)
+
+
+class TokenUsuario(RefreshToken):
+    """Refresh token que incluye rol, estado e is_superuser (y sus access tokens también)."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for claim, valor in claims_usuario(user).items():
+            token[claim] = valor
+        return token
+
+
+class EstadoAutorizacion:
+    """
+    Cache del estado de autorización vigente de cada usuario (rol, estado,
+    is_superuser). Se consulta en cada petición para rechazar tokens cuyos
+    claims quedaron desactualizados (suspensión, desactivación, cambio de rol).
+
+    Ante un fallo de cache se consulta la base de datos una vez y se guarda
+    por la vida del access token. Guardar o eliminar un Usuario la invalida.
+    Sin cache compartida se consulta la base de datos en cada petición: otro
+    proceso no vería la invalidación.
+    """
+
+    @staticmethod
+    def _clave(usuario_id):
+        return f"auth:estado:{usuario_id}"
+
+    @staticmethod
+    def _timeout():
+        return int(api_settings.ACCESS_TOKEN_LIFETIME.total_seconds())
+
+    @classmethod
+    def obtener(cls, usuario_id):
+        """Retorna el dict de claims vigente, o None si el usuario no existe."""
+        if not cache_compartida():
+            return cls._consultar(usuario_id) or None
+        clave = cls._clave(usuario_id)
+        estado = cache.get(clave)
+        if estado is None:
+            estado = cls._consultar(usuario_id)
+            cache.set(clave, estado, cls._timeout())
+        return estado or None
+
+    @staticmethod
+    def _consultar(usuario_id):
+        return Usuario.objects.filter(pk=usuario_id).values(*CLAIMS_USUARIO).first() or {}
+
+    @classmethod
+    def invalidar(cls, usuario_id):
+        """Descarta el estado cacheado de inmediato y de nuevo al confirmar la transacción."""
+        clave = cls._clave(usuario_id)
+        cache.delete(clave)
+        transaction.on_commit(lambda: cache.delete(clave))
+
+    @classmethod
+    def _al_guardar(cls, sender, instance, update_fields=None, **kwargs):
+        # Un guardado acotado que no toca los claims (p. ej. ultimo_ingreso) no revoca nada
+        if update_fields is not None and not set(update_fields) & set(CLAIMS_USUARIO):
+            return
+        cls.invalidar(instance.pk)
+
+    @classmethod
+    def conectar(cls):
+        post_save.connect(cls._al_guardar, sender=Usuario, weak=False, dispatch_uid="auth:estado:invalidar")
+        post_delete.connect(cls._al_guardar, sender=Usuario, weak=False, dispatch_uid="auth:estado:invalidar")
+
+
+class UsuarioToken(LazyObject):
+    """
+    Usuario construido a partir de los claims del token.
+
+    `pk`, `id`, `rol`, `estado` e `is_superuser` se leen del token sin
+    consultar la base de datos; cualquier otro atributo (o usarlo como
+    instancia de Usuario, p. ej. en un filtro por FK) carga el Usuario
+    completo de la base de datos, una vez por petición. No se cachea entre
+    peticiones: la instancia incluye el hash de la contraseña.
+    """
+
+    def __init__(self, token):
+        self.__dict__["token"] = token
+        super().__init__()
+
+    def _setup(self):
+        try:
+            self._wrapped = Usuario.objects.get(pk=self.pk)
+        except Usuario.DoesNotExist:
+            raise AuthenticationFailed("Usuario no encontrado", code="user_not_found")
+
+    @property
+    def cargado(self):
+        return self._wrapped is not empty
+
+    @property
+    def pk(self):
+        return self.token[api_settings.USER_ID_CLAIM]
+
+    id = pk
+
+    @property
+    def rol(self):
+        return self.token["rol"]
+
+    @property
+    def estado(self):
+        return self.token["estado"]
+
+    is_active = estado
+
+    @property
+    def is_superuser(self):
+        return self.token["is_superuser"]
+
+    @property
+    def is_authenticated(self):
+        return True
+
+    @property
+    def is_anonymous(self):
+        return False
+
+    def __bool__(self):
+        return True
+
+
+class JWTUsuarioAuthentication(JWTAuthentication):
+    """
+    Autenticación JWT sin consultar el Usuario por clave primaria en cada
+    petición: el usuario se arma con los claims del token (UsuarioToken) y la
+    revocación se verifica contra EstadoAutorizacion (cache compartida, o una
+    consulta de solo esos tres campos si la cache es por proceso).
+
+    Los tokens emitidos antes de incluir los claims se resuelven como siempre.
+    """
+
+    def get_user(self, validated_token):
+        if any(claim not in validated_token for claim in CLAIMS_USUARIO):
+            return super().get_user(validated_token)
+
+        try:
+            usuario_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("El token no contiene identificación de usuario")
+
+        vigente = EstadoAutorizacion.obtener(usuario_id)
+        if vigente is None:
+            raise AuthenticationFailed("Usuario no encontrado", code="user_not_found")
+        if not vigente["estado"]:
+            raise AuthenticationFailed("Usuario inactivo", code="user_inactive")
+        if vigente != {claim: validated_token[claim] for claim in CLAIMS_USUARIO}:
+            raise AuthenticationFailed(
+                "Los datos de la cuenta cambiaron. Renueve el token o inicie sesión nuevamente.",
+                code="token_outdated",
+            )
+
+        return UsuarioToken(validated_token)
+
+
+class TokenRefreshUsuarioSerializer(TokenRefreshSerializer):
+    """Renueva el access token con los claims vigentes del usuario."""
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+        vigente = EstadoAutorizacion.obtener(refresh[api_settings.USER_ID_CLAIM])
+        if vigente is None or not vigente["estado"]:
+            raise InvalidToken("Usuario inactivo o inexistente")
+
+        for claim, valor in vigente.items():
+            refresh[claim] = valor
+        return super().validate({**attrs, "refresh": str(refresh)})
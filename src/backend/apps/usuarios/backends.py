@@ -1,6 +1,7 @@
 # usuarios/backends.py
 from django.contrib.auth.backends import ModelBackend
 from django.contrib.auth import get_user_model
+from backend.services.hashing import generar_hash
 
 class EmailBackend(ModelBackend):
     """
@@ -22,9 +23,10 @@ class EmailBackend(ModelBackend):
         except UserModel.DoesNotExist:
             # Run the default password hasher once to reduce the timing
             # difference between an existing and a nonexistent user
-            UserModel().set_password(password)
+            generar_hash(password)
             return None
         
+        # check_password runs the hasher in the hashing pool (services/hashing.py)
         if user.check_password(password) and self.user_can_authenticate(user):
             return user
         
@@ -0,0 +1,189 @@
+import datetime
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from .models import AltasDiariasUsuarios, EstadisticaUsuarios, Usuario
+
+
+class EstadisticasUsuarios:
+    """
+    Contadores precalculados de usuarios para el dashboard de administración.
+
+    - EstadisticaUsuarios: total por (rol, estado).
+    - AltasDiariasUsuarios: registros por día (fecha local).
+
+    Se mantienen en forma incremental con post_save/post_delete de Usuario
+    (los cambios de rol/estado se detectan con la foto tomada al cargar la
+    instancia) y `registrar_altas()` para los `bulk_create`. Lo que escape a
+    las señales (UPDATE directos, instancias sin foto) lo corrige
+    `reconciliar()`, que se ejecuta a diario con Celery Beat.
+    """
+
+    @staticmethod
+    def _sumar(modelo, claves, delta):
+        """Suma `delta` al total de la fila `claves`, creándola si no existe."""
+        if not delta:
+            return
+        if modelo.objects.filter(**claves).update(total=F("total") + delta):
+            return
+        try:
+            with transaction.atomic():
+                modelo.objects.create(total=delta, **claves)
+        except IntegrityError:
+            # Otro proceso creó la fila entre el UPDATE y el INSERT
+            modelo.objects.filter(**claves).update(total=F("total") + delta)
+
+    @classmethod
+    def _sumar_segmento(cls, rol, estado, delta):
+        cls._sumar(EstadisticaUsuarios, {"rol": rol, "estado": estado}, delta)
+
+    @classmethod
+    def _sumar_altas(cls, fecha_creacion, delta):
+        fecha = timezone.localdate(fecha_creacion) if fecha_creacion else timezone.localdate()
+        cls._sumar(AltasDiariasUsuarios, {"fecha": fecha}, delta)
+
+    @classmethod
+    def registrar_altas(cls, usuarios):
+        """Cuenta usuarios creados sin señales (p. ej. con `bulk_create`)."""
+        segmentos = Counter((usuario.rol, usuario.estado) for usuario in usuarios)
+        fechas = Counter(
+            timezone.localdate(usuario.fecha_creacion) if usuario.fecha_creacion else timezone.localdate()
+            for usuario in usuarios
+        )
+        for (rol, estado), cantidad in segmentos.items():
+            cls._sumar_segmento(rol, estado, cantidad)
+        for fecha, cantidad in fechas.items():
+            cls._sumar(AltasDiariasUsuarios, {"fecha": fecha}, cantidad)
+
+    @classmethod
+    def _al_guardar(cls, sender, instance, created, update_fields=None, raw=False, **kwargs):
+        if raw:
+            return
+        if created:
+            cls._sumar_segmento(instance.rol, instance.estado, 1)
+            cls._sumar_altas(instance.fecha_creacion, 1)
+            return
+        if update_fields is not None and not {"rol", "estado"} & set(update_fields):
+            return
+        anterior = getattr(instance, "_segmento_guardado", None)
+        actual = instance._segmento()
+        if anterior is None or actual is None or anterior == actual:
+            return
+        cls._sumar_segmento(*anterior, -1)
+        cls._sumar_segmento(*actual, 1)
+
+    @classmethod
+    def _al_eliminar(cls, sender, instance, **kwargs):
+        segmento = getattr(instance, "_segmento_guardado", None) or instance._segmento()
+        if segmento:
+            cls._sumar_segmento(*segmento, -1)
+        cls._sumar_altas(instance.fecha_creacion, -1)
+
+    @classmethod
+    def conectar(cls):
+        post_save.connect(cls._al_guardar, sender=Usuario, weak=False, dispatch_uid="estadisticas:usuarios:guardar")
+        post_delete.connect(cls._al_eliminar, sender=Usuario, weak=False, dispatch_uid="estadisticas:usuarios:eliminar")
+
+    @staticmethod
+    def _inicio_dia_siguiente(fecha_hora):
+        dia = timezone.localtime(fecha_hora).date() + datetime.timedelta(days=1)
+        return timezone.make_aware(datetime.datetime.combine(dia, datetime.time.min))
+
+    @classmethod
+    def nuevos_desde(cls, desde):
+        """
+        Usuarios registrados desde `desde`: los días completos salen de
+        AltasDiariasUsuarios y solo el tramo del primer día se cuenta sobre
+        Usuario (acotado por el índice de fecha_creacion).
+        """
+        corte = cls._inicio_dia_siguiente(desde)
+        parcial = Usuario.objects.filter(fecha_creacion__gte=desde, fecha_creacion__lt=corte).count()
+        completos = AltasDiariasUsuarios.objects.filter(
+            fecha__gt=timezone.localtime(desde).date()
+        ).aggregate(total=Sum("total"))["total"] or 0
+        return parcial + completos
+
+    @staticmethod
+    def por_segmento():
+        """{(rol, estado): total} leído de la tabla precalculada."""
+        return {
+            (fila["rol"], fila["estado"]): fila["total"]
+            for fila in EstadisticaUsuarios.objects.values("rol", "estado", "total")
+        }
+
+    @classmethod
+    def resumen(cls, desde):
+        segmentos = cls.por_segmento()
+        por_rol = Counter()
+        for (rol, estado), total in segmentos.items():
+            if estado:
+                por_rol[rol] += total
+        return {
+            "active": sum(total for (_, estado), total in segmentos.items() if estado),
+            "inactive": sum(total for (_, estado), total in segmentos.items() if not estado),
+            "new_users": cls.nuevos_desde(desde),
+            "active_by_role": dict(por_rol),
+        }
+
+    @classmethod
+    def reconciliar(cls):
+        """
+        Recalcula ambas tablas desde Usuario. Retorna la cantidad de filas corregidas.
+
+        Las filas de contadores se bloquean antes de contar: una señal que
+        quiera sumar espera al commit y suma sobre el total ya corregido, y
+        una que sumó antes termina antes de que se cuente.
+        """
+        with transaction.atomic():
+            segmentos_guardados = {
+                (fila.rol, fila.estado): fila for fila in EstadisticaUsuarios.objects.select_for_update()
+            }
+            altas_guardadas = {fila.fecha: fila for fila in AltasDiariasUsuarios.objects.select_for_update()}
+
+            segmentos = {
+                (fila["rol"], fila["estado"]): fila["total"]
+                for fila in Usuario.objects.order_by().values("rol", "estado").annotate(total=Count("id"))
+            }
+            altas = {
+                fila["fecha"]: fila["total"]
+                for fila in Usuario.objects.order_by()
+                .annotate(fecha=TruncDate("fecha_creacion", tzinfo=timezone.get_current_timezone()))
+                .values("fecha")
+                .annotate(total=Count("id"))
+            }
+
+            corregidas = cls._reemplazar(
+                EstadisticaUsuarios, segmentos_guardados, segmentos,
+                lambda clave, total: EstadisticaUsuarios(rol=clave[0], estado=clave[1], total=total),
+            )
+            corregidas += cls._reemplazar(
+                AltasDiariasUsuarios, altas_guardadas, altas,
+                lambda clave, total: AltasDiariasUsuarios(fecha=clave, total=total),
+            )
+        return corregidas
+
+    @staticmethod
+    def _reemplazar(modelo, existentes, esperados, construir):
+        """
+        Ajusta las filas bloqueadas `existentes` ({clave: fila}) a `esperados`
+        tocando solo las que difieren.
+        """
+        actualizar, nuevas = [], []
+        for clave, total in esperados.items():
+            fila = existentes.pop(clave, None)
+            if fila is None:
+                nuevas.append(construir(clave, total))
+            elif fila.total != total:
+                fila.total = total
+                actualizar.append(fila)
+        # Lo que quedó en `existentes` ya no corresponde a ningún usuario
+        sobrantes = list(existentes.values())
+        modelo.objects.filter(pk__in=[fila.pk for fila in sobrantes]).delete()
+        modelo.objects.bulk_update(actualizar, ["total"])
+        modelo.objects.bulk_create(nuevas)
+        return len(actualizar) + len(nuevas) + sum(1 for fila in sobrantes if fila.total)
@@ -0,0 +1,72 @@
+"""
+Comando de gestión para el alta masiva de usuarios desde CSV o JSONL.
+
+Columnas / claves: email, nombre, password (opcional), rol (opcional),
+telefono (opcional), direccion (opcional).
+
+Uso:
+    python manage.py importar_usuarios clientes.csv
+    python manage.py importar_usuarios clientes.jsonl --lote 1000 --procesos 4
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.usuarios.services import ProvisionUsuarios, ROLES_VALIDOS
+
+
+class Command(BaseCommand):
+    help = 'Importa usuarios por lotes desde un archivo CSV o JSONL'
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help='Ruta del archivo .csv o .jsonl')
+        parser.add_argument(
+            '--formato',
+            choices=['csv', 'jsonl'],
+            help='Formato del archivo (por defecto se deduce de la extensión)',
+        )
+        parser.add_argument('--lote', type=int, default=500, help='Usuarios por lote (default: 500)')
+        parser.add_argument(
+            '--procesos',
+            type=int,
+            default=None,
+            help='Procesos para hashear contraseñas (default: uno por núcleo)',
+        )
+        parser.add_argument(
+            '--rol',
+            default='cliente',
+            choices=sorted(ROLES_VALIDOS),
+            help='Rol para las filas sin rol (default: cliente)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Valida el archivo sin crear usuarios',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        if dry_run:
+            self.stdout.write(self.style.WARNING('🔍 Modo DRY RUN - No se harán cambios reales'))
+
+        provision = ProvisionUsuarios(
+            rol_por_defecto=options['rol'],
+            tamano_lote=options['lote'],
+            procesos=options['procesos'],
+        )
+
+        def al_procesar_lote(creados, errores):
+            self.stdout.write(f'  Lote procesado: {creados} válidos, {len(errores)} con errores')
+
+        try:
+            filas = provision.leer_ruta(options['archivo'], options['formato'])
+            resultado = provision.importar(filas, dry_run=dry_run, al_procesar_lote=al_procesar_lote)
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        for error in resultado['errores']:
+            self.stdout.write(self.style.ERROR(f"  ✗ Fila {error['fila']}: {error['error']}"))
+
+        accion = 'válidos para crear' if dry_run else 'creados'
+        self.stdout.write(self.style.SUCCESS(
+            f"\n✅ Usuarios {accion}: {resultado['creados']} | Errores: {len(resultado['errores'])}"
+        ))
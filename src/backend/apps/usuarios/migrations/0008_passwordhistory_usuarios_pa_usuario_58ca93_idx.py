@@ -0,0 +1,17 @@
+# Generated by Django 5.0.4 on 2026-10-18 10:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0007_merge_20251201_1601'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='passwordhistory',
+            index=models.Index(fields=['usuario', '-fecha_creacion'], name='usuarios_pa_usuario_58ca93_idx'),
+        ),
+    ]
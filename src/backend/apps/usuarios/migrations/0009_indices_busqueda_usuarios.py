@@ -0,0 +1,47 @@
+"""
+Índices para la búsqueda del directorio de usuarios (email y nombre).
+
+Django traduce `istartswith`/`icontains` en PostgreSQL a
+`UPPER(col::text) LIKE UPPER(...)`, así que los índices se crean sobre esa
+misma expresión:
+
+- GIN con pg_trgm: búsqueda por subcadena (3+ caracteres) y por prefijo.
+- B-tree con text_pattern_ops: búsqueda por prefijo.
+
+Solo aplica en PostgreSQL; en SQLite (desarrollo y tests) no hace nada.
+"""
+
+from django.db import migrations
+
+INDICES = [
+    ("usuarios_email_trgm_idx", "USING gin (UPPER(email::text) gin_trgm_ops)"),
+    ("usuarios_nombre_trgm_idx", "USING gin (UPPER(nombre::text) gin_trgm_ops)"),
+    ("usuarios_email_prefijo_idx", "(UPPER(email::text) text_pattern_ops)"),
+    ("usuarios_nombre_prefijo_idx", "(UPPER(nombre::text) text_pattern_ops)"),
+]
+
+
+def crear_indices(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for nombre, definicion in INDICES:
+        schema_editor.execute(f"CREATE INDEX IF NOT EXISTS {nombre} ON usuarios_usuario {definicion}")
+
+
+def eliminar_indices(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for nombre, _ in INDICES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {nombre}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0008_passwordhistory_usuarios_pa_usuario_58ca93_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indices, eliminar_indices),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 5.0.4 on 2026-10-18 11:17
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+
+def poblar_estadisticas(apps, schema_editor):
+    """Carga los contadores iniciales a partir de los usuarios existentes."""
+    Usuario = apps.get_model('usuarios', 'Usuario')
+    EstadisticaUsuarios = apps.get_model('usuarios', 'EstadisticaUsuarios')
+    AltasDiariasUsuarios = apps.get_model('usuarios', 'AltasDiariasUsuarios')
+
+    EstadisticaUsuarios.objects.bulk_create([
+        EstadisticaUsuarios(rol=fila['rol'], estado=fila['estado'], total=fila['total'])
+        for fila in Usuario.objects.order_by().values('rol', 'estado').annotate(total=Count('id'))
+    ])
+    AltasDiariasUsuarios.objects.bulk_create([
+        AltasDiariasUsuarios(fecha=fila['fecha'], total=fila['total'])
+        for fila in Usuario.objects.order_by()
+        .annotate(fecha=TruncDate('fecha_creacion', tzinfo=timezone.get_current_timezone()))
+        .values('fecha')
+        .annotate(total=Count('id'))
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0009_indices_busqueda_usuarios'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AltasDiariasUsuarios',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(unique=True)),
+                ('total', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Altas Diarias de Usuarios',
+                'verbose_name_plural': 'Altas Diarias de Usuarios',
+                'ordering': ['-fecha'],
+            },
+        ),
+        migrations.CreateModel(
+            name='EstadisticaUsuarios',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rol', models.CharField(max_length=20)),
+                ('estado', models.BooleanField()),
+                ('total', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Estadística de Usuarios',
+                'verbose_name_plural': 'Estadísticas de Usuarios',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='estadisticausuarios',
+            constraint=models.UniqueConstraint(fields=('rol', 'estado'), name='estadistica_usuarios_rol_estado_unica'),
+        ),
+        migrations.RunPython(poblar_estadisticas, migrations.RunPython.noop),
+    ]
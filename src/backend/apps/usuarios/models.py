@@ -1,9 +1,11 @@
+from django.conf import settings
 from django.db import models
 from django.contrib.auth.models import (
     AbstractBaseUser,
     BaseUserManager,
     PermissionsMixin,
 )
+from backend.services.hashing import generar_hash, preparar_password, verificar_password
 
 
 # =======================
@@ -91,40 +93,83 @@ class Usuario(AbstractBaseUser, PermissionsMixin):
     def __str__(self):
         return f"{self.nombre} - {self.get_rol_display()}"
 
+    @staticmethod
+    def profundidad_historial():
+        """Cantidad de contraseñas recientes que no se pueden reutilizar."""
+        return max(getattr(settings, "PASSWORD_HISTORY_DEPTH", 5), 1)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Valores persistidos, para detectar cambios en save() sin volver a consultar
+        instance._password_guardado = instance.__dict__.get("password")
+        instance._segmento_guardado = instance._segmento()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        if fields is None or "password" in fields:
+            self._password_guardado = self.password
+        self._segmento_guardado = self._segmento()
+
+    def _segmento(self):
+        """(rol, estado) cargados en memoria, o None si alguno está diferido."""
+        if "rol" not in self.__dict__ or "estado" not in self.__dict__:
+            return None
+        return self.rol, self.estado
+
     def set_password(self, raw_password):
-        from django.contrib.auth.hashers import check_password
-        
-        # Si la contraseña es la misma que la actual, permitirlo (para actualizaciones de hash)
-        if self.pk and self.password and check_password(raw_password, self.password):
+        if raw_password is None:
             super().set_password(raw_password)
             return
 
-        # Verificar si la contraseña ya existe en el historial
-        if self.pk:
-            for history in self.password_history.all():
-                if check_password(raw_password, history.password_hash):
-                    raise ValueError("Esta contraseña ya ha sido utilizada anteriormente. Por favor elija una diferente.")
-        
-        super().set_password(raw_password)
+        if not self.pk:
+            self.password = generar_hash(raw_password)
+            self._password = raw_password
+            return
+
+        # Primero la contraseña actual (si coincide se permite, para actualizaciones
+        # de hash) y luego el historial reciente (solo las últimas N: cada
+        # verificación es un hash completo). Todo en una sola tarea del pool.
+        recientes = self.password_history.values_list("password_hash", flat=True)[
+            :self.profundidad_historial()
+        ]
+        coincidencia, nuevo_hash = preparar_password(raw_password, [self.password or "", *recientes])
+        if coincidencia:
+            raise ValueError("Esta contraseña ya ha sido utilizada anteriormente. Por favor elija una diferente.")
+
+        self.password = nuevo_hash
+        self._password = raw_password
+
+    def check_password(self, raw_password):
+        valida, actualizar = verificar_password(raw_password, self.password)
+        if valida and actualizar:
+            # El hasher cambió: se guarda el hash nuevo (como AbstractBaseUser)
+            self.password = generar_hash(raw_password)
+            self._password = None
+            self.save(update_fields=["password"])
+        return valida
+
+    def _password_cambio(self):
+        if not self.pk or self._state.adding:
+            return True
+        if not hasattr(self, "_password_guardado"):
+            # Instancia armada a mano con pk: se compara contra la base de datos
+            anterior = Usuario.objects.filter(pk=self.pk).values_list("password", flat=True).first()
+            return anterior != self.password
+        return self._password_guardado != self.password
 
     def save(self, *args, **kwargs):
-        is_new_password = False
-        if self.pk:
-            # Verificar si la contraseña ha cambiado
-            try:
-                old_user = Usuario.objects.get(pk=self.pk)
-                if old_user.password != self.password:
-                    is_new_password = True
-            except Usuario.DoesNotExist:
-                is_new_password = True
-        else:
-            is_new_password = True
+        is_new_password = self._password_cambio()
             
         super().save(*args, **kwargs)
         
         # Guardar en historial si es nueva contraseña
         if is_new_password and self.password:
             PasswordHistory.objects.create(usuario=self, password_hash=self.password)
+            PasswordHistory.recortar(self)
+        self._password_guardado = self.password
+        self._segmento_guardado = self._segmento()
 
 
 class PasswordHistory(models.Model):
@@ -136,3 +181,42 @@ class PasswordHistory(models.Model):
         ordering = ['-fecha_creacion']
         verbose_name = "Historial de Contraseña"
         verbose_name_plural = "Historial de Contraseñas"
+        indexes = [
+            models.Index(fields=['usuario', '-fecha_creacion']),
+        ]
+
+    @classmethod
+    def recortar(cls, usuario):
+        """Elimina las entradas más antiguas que la profundidad configurada."""
+        antiguas = list(
+            cls.objects.filter(usuario=usuario)
+            .order_by('-fecha_creacion', '-id')
+            .values_list('id', flat=True)[usuario.profundidad_historial():]
+        )
+        if antiguas:
+            cls.objects.filter(id__in=antiguas).delete()
+
+
+class EstadisticaUsuarios(models.Model):
+    """Cantidad de usuarios por rol y estado, mantenida por señales (ver estadisticas.py)."""
+    rol = models.CharField(max_length=20)
+    estado = models.BooleanField()
+    total = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['rol', 'estado'], name='estadistica_usuarios_rol_estado_unica'),
+        ]
+        verbose_name = "Estadística de Usuarios"
+        verbose_name_plural = "Estadísticas de Usuarios"
+
+
+class AltasDiariasUsuarios(models.Model):
+    """Usuarios registrados por día (fecha local), mantenida por señales."""
+    fecha = models.DateField(unique=True)
+    total = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ['-fecha']
+        verbose_name = "Altas Diarias de Usuarios"
+        verbose_name_plural = "Altas Diarias de Usuarios"
@@ -112,7 +112,9 @@ class UserTokenSerializer(serializers.ModelSerializer):
 
 
 def generate_tokens_for_user(user):
-    refresh = RefreshToken.for_user(user)
+    from .authentication import TokenUsuario
+
+    refresh = TokenUsuario.for_user(user)
     return {
         "refresh": str(refresh),
         "access": str(refresh.access_token),
@@ -0,0 +1,195 @@
+import csv
+import io
+import json
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Count, Q
+
+from backend.services.hashing import generar_hashes
+
+from .estadisticas import EstadisticasUsuarios
+from .models import Usuario, PasswordHistory
+
+ROLES_VALIDOS = {rol for rol, _ in Usuario.ROLES}
+CAMPOS_OPCIONALES = ("telefono", "direccion")
+
+
+class ProvisionUsuarios:
+    """
+    Alta masiva de usuarios por lotes, con un número fijo de consultas por lote:
+
+    1. un SELECT de los emails del lote que ya existen
+    2. un `bulk_create` de los Usuario (contraseñas hasheadas en paralelo)
+    3. un `bulk_create` de su PasswordHistory
+    4. la actualización de los contadores de EstadisticasUsuarios
+
+    Las filas inválidas o repetidas no detienen la importación: se reportan
+    en el resultado con su número de fila. Sin contraseña, el usuario se crea
+    con contraseña no utilizable (deberá usar "olvidé mi contraseña").
+    """
+
+    def __init__(self, rol_por_defecto="cliente", tamano_lote=500, procesos=None):
+        self.rol_por_defecto = rol_por_defecto
+        self.tamano_lote = tamano_lote
+        self.procesos = procesos
+
+    @staticmethod
+    def leer(archivo, formato):
+        """Itera las filas (dicts) de un archivo de texto CSV o JSONL."""
+        if formato == "csv":
+            yield from csv.DictReader(archivo)
+        elif formato == "jsonl":
+            for linea in archivo:
+                if linea.strip():
+                    yield json.loads(linea)
+        else:
+            raise ValueError(f"Formato no soportado: {formato}")
+
+    @classmethod
+    def leer_ruta(cls, ruta, formato=None):
+        formato = formato or ruta.rsplit(".", 1)[-1].lower()
+        with io.open(ruta, encoding="utf-8-sig", newline="") as archivo:
+            yield from cls.leer(archivo, formato)
+
+    def _normalizar(self, fila):
+        email = Usuario.objects.normalize_email((fila.get("email") or "").strip())
+        nombre = (fila.get("nombre") or "").strip()
+        rol = (fila.get("rol") or self.rol_por_defecto).strip()
+        if not email:
+            raise ValueError("El usuario debe tener un correo electrónico.")
+        if not nombre:
+            raise ValueError("El usuario debe tener un nombre.")
+        if rol not in ROLES_VALIDOS:
+            raise ValueError(f"Rol inválido: {rol}")
+        datos = {"email": email, "nombre": nombre, "rol": rol}
+        for campo in CAMPOS_OPCIONALES:
+            if fila.get(campo):
+                datos[campo] = str(fila[campo]).strip()
+        return datos, fila.get("password") or None
+
+    def importar_lote(self, filas, dry_run=False):
+        """
+        Importa una lista de pares (número de fila, dict). Retorna
+        (creados, errores) donde errores es una lista de {"fila", "error"}.
+        """
+        errores = []
+        validas = {}
+        for numero, fila in filas:
+            try:
+                datos, password = self._normalizar(fila)
+            except ValueError as e:
+                errores.append({"fila": numero, "error": str(e)})
+                continue
+            if datos["email"] in validas:
+                errores.append({"fila": numero, "error": f"Email repetido en el archivo: {datos['email']}"})
+                continue
+            validas[datos["email"]] = (numero, datos, password)
+
+        existentes = set(
+            Usuario.objects.filter(email__in=list(validas)).values_list("email", flat=True)
+        )
+        for email in existentes:
+            numero, _, _ = validas.pop(email)
+            errores.append({"fila": numero, "error": f"Ya existe un usuario con el email {email}"})
+
+        if dry_run or not validas:
+            return len(validas) if dry_run else 0, errores
+
+        # Solo se hashean las contraseñas presentes; el resto queda no utilizable
+        con_password = [(email, password) for email, (_, _, password) in validas.items() if password]
+        hashes = dict(zip(
+            (email for email, _ in con_password),
+            generar_hashes((password for _, password in con_password), self.procesos),
+        ))
+
+        usuarios = [
+            Usuario(password=hashes.get(email) or make_password(None), **datos)
+            for email, (_, datos, _) in validas.items()
+        ]
+        with transaction.atomic():
+            Usuario.objects.bulk_create(usuarios)
+            PasswordHistory.objects.bulk_create([
+                PasswordHistory(usuario=usuario, password_hash=usuario.password)
+                for usuario in usuarios if usuario.email in hashes
+            ])
+            # bulk_create no emite post_save
+            EstadisticasUsuarios.registrar_altas(usuarios)
+        return len(usuarios), errores
+
+    def importar(self, filas, dry_run=False, al_procesar_lote=None):
+        """
+        Importa un iterable de dicts por lotes de `tamano_lote`. Cada lote se
+        confirma por separado. Retorna {"creados", "errores"}.
+        """
+        numeradas = enumerate(filas, start=1)
+        creados = 0
+        errores = []
+        while True:
+            lote = list(islice(numeradas, self.tamano_lote))
+            if not lote:
+                break
+            creados_lote, errores_lote = self.importar_lote(lote, dry_run=dry_run)
+            creados += creados_lote
+            errores.extend(errores_lote)
+            if al_procesar_lote:
+                al_procesar_lote(creados_lote, errores_lote)
+        return {"creados": creados, "errores": errores}
+
+
+class DirectorioUsuarios:
+    """
+    Búsqueda del directorio de usuarios para administración.
+
+    - `buscar()` filtra por prefijo (por defecto) o por subcadena en email y
+      nombre; en PostgreSQL ambos modos usan los índices de la migración
+      0009 (B-tree por prefijo y GIN pg_trgm).
+    - `facetas()` cuenta usuarios por rol y estado con una sola consulta
+      agrupada sobre (rol, estado).
+    """
+
+    MODOS = ("prefijo", "contiene")
+    MINIMO_CONTIENE = 3  # pg_trgm necesita al menos un trigrama
+
+    @classmethod
+    def buscar(cls, queryset, q=None, modo="prefijo"):
+        q = (q or "").strip()
+        if not q:
+            return queryset
+        if modo not in cls.MODOS:
+            raise ValueError(f"Modo de búsqueda inválido. Opciones: {', '.join(cls.MODOS)}")
+        if modo == "contiene":
+            if len(q) < cls.MINIMO_CONTIENE:
+                raise ValueError(f"La búsqueda por contenido requiere al menos {cls.MINIMO_CONTIENE} caracteres")
+            return queryset.filter(Q(email__icontains=q) | Q(nombre__icontains=q))
+        return queryset.filter(Q(email__istartswith=q) | Q(nombre__istartswith=q))
+
+    @staticmethod
+    def filtrar(queryset, rol=None, estado=None):
+        if rol:
+            queryset = queryset.filter(rol=rol)
+        if estado is not None:
+            queryset = queryset.filter(estado=estado)
+        return queryset
+
+    @staticmethod
+    def facetas(queryset, rol=None, estado=None):
+        """
+        Conteos por rol (respetando el filtro de estado) y por estado
+        (respetando el filtro de rol), a partir de un único GROUP BY.
+        """
+        grupos = queryset.order_by().values("rol", "estado").annotate(total=Count("id"))
+        por_rol = {codigo: 0 for codigo, _ in Usuario.ROLES}
+        por_estado = {"activos": 0, "inactivos": 0}
+        total = 0
+        for grupo in grupos:
+            coincide_rol = not rol or grupo["rol"] == rol
+            coincide_estado = estado is None or grupo["estado"] == estado
+            if coincide_estado:
+                por_rol[grupo["rol"]] = por_rol.get(grupo["rol"], 0) + grupo["total"]
+            if coincide_rol:
+                por_estado["activos" if grupo["estado"] else "inactivos"] += grupo["total"]
+            if coincide_rol and coincide_estado:
+                total += grupo["total"]
+        return {"total": total, "rol": por_rol, "estado": por_estado}
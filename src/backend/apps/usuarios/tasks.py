@@ -0,0 +1,44 @@
+from celery import shared_task
+from django.conf import settings
+
+from backend.services.correo import ConexionCorreo, EnvioIncompleto, espera_reintento
+
+from .actividad import RegistroActividad
+from .estadisticas import EstadisticasUsuarios
+
+
+@shared_task
+def volcar_actividad_task():
+    """
+    Ejecutado por Celery Beat cada ACTIVIDAD_VENTANA_SEGUNDOS:
+    escribe en lote la última actividad encolada por ActiveUserMiddleware.
+    Con cache compartida reemplaza al volcado local (ACTIVIDAD_VOLCADO_LOCAL=False).
+    """
+    actualizados = RegistroActividad.volcar()
+    return f"Actividad volcada: {actualizados} usuarios"
+
+
+@shared_task
+def reconciliar_estadisticas_usuarios_task():
+    """
+    Ejecutado por Celery Beat una vez al día: corrige los contadores de
+    EstadisticasUsuarios que hayan quedado desfasados.
+    """
+    corregidas = EstadisticasUsuarios.reconciliar()
+    return f"Estadísticas de usuarios reconciliadas: {corregidas} filas corregidas"
+
+
+@shared_task(bind=True, max_retries=getattr(settings, "CORREO_REINTENTOS", 3))
+def enviar_correos_task(self, mensajes):
+    """
+    Envía un lote de correos encolados con `encolar_correo` (agrupados por
+    LoteCorreo) por la conexión SMTP del worker. Si falla, reintenta con
+    backoff exponencial solo los correos que no se enviaron.
+    """
+    try:
+        enviados = ConexionCorreo.enviar(mensajes)
+    except Exception as exc:
+        if isinstance(exc, EnvioIncompleto):
+            mensajes = mensajes[exc.enviados:]
+        raise self.retry(args=[mensajes], exc=exc, countdown=espera_reintento(self.request.retries))
+    return f"Correos enviados: {enviados}"
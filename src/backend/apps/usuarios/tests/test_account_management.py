@@ -0,0 +1,87 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+
+from apps.usuarios.views.view_account_management import (
+    admin_reactivate_user,
+    admin_suspend_user,
+    get_account_status,
+    self_deactivate_account,
+)
+
+User = get_user_model()
+
+
+class TestEscriturasAcotadas(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email="cliente@test.com", nombre="Cliente", password="client123", rol="cliente"
+        )
+        self.admin = User.objects.create_superuser(
+            email="admin@test.com", nombre="Admin", password="admin123"
+        )
+
+    def _post(self, vista, usuario=None, token=None, datos=None, **kwargs):
+        # Las vistas de gestión de cuenta no están enrutadas: se llaman directamente
+        cabeceras = {"HTTP_AUTHORIZATION": f"Bearer {token}"} if token else {}
+        request = APIRequestFactory().post("/", datos or {}, format="json", **cabeceras)
+        if usuario is not None:
+            force_authenticate(request, user=usuario)
+        return vista(request, **kwargs)
+
+    def _updates(self, consultas):
+        return [q["sql"] for q in consultas.captured_queries if q["sql"].startswith("UPDATE")]
+
+    def test_login_actualiza_solo_ultimo_ingreso(self):
+        """Test that login issues one narrow UPDATE and no extra user SELECT"""
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.post(
+                reverse("login"), {"email": "cliente@test.com", "password": "client123"}
+            )
+        self.assertEqual(response.status_code, 200)
+
+        updates = self._updates(consultas)
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"ultimo_ingreso"', updates[0])
+        self.assertNotIn('"password"', updates[0])
+        selects = [q["sql"] for q in consultas.captured_queries
+                   if q["sql"].startswith("SELECT") and '"usuarios_usuario"' in q["sql"]]
+        self.assertEqual(len(selects), 1)
+
+        self.user.refresh_from_db()
+        self.assertIsNotNone(self.user.ultimo_ingreso)
+
+    def test_autodesactivar_revoca_token(self):
+        """Test that self deactivation writes only state columns and revokes the token"""
+        login = self.client.post(reverse("login"), {"email": "cliente@test.com", "password": "client123"})
+        access = login.data["access"]
+
+        with CaptureQueriesContext(connection) as consultas:
+            response = self._post(self_deactivate_account, token=access)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('"password"', self._updates(consultas)[0])
+
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.self_deactivated)
+        self.assertFalse(self.user.estado)
+        request = APIRequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {access}")
+        self.assertEqual(get_account_status(request).status_code, 401)
+
+    def test_suspension_y_reactivacion_por_admin(self):
+        """Test that admin suspension and reactivation update the account state"""
+        response = self._post(
+            admin_suspend_user, usuario=self.admin, datos={"reason": "Fraude"}, user_id=self.user.pk
+        )
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.admin_suspended)
+        self.assertEqual(self.user.suspension_reason, "Fraude")
+
+        self._post(admin_reactivate_user, usuario=self.admin, user_id=self.user.pk)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.estado)
+        self.assertIsNone(self.user.suspension_date)
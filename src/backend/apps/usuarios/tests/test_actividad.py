@@ -0,0 +1,133 @@
+import threading
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.usuarios.actividad import RegistroActividad
+
+User = get_user_model()
+
+
+class TestRegistroActividad(TestCase):
+    def setUp(self):
+        self.user1 = User.objects.create_user(
+            email="uno@test.com", nombre="Uno", password="pass12345", rol="cliente"
+        )
+        self.user2 = User.objects.create_user(
+            email="dos@test.com", nombre="Dos", password="pass12345", rol="cliente"
+        )
+
+    def test_registra_una_vez_por_ventana(self):
+        """Test that repeated activity within the window is coalesced"""
+        self.assertTrue(RegistroActividad.registrar(self.user1.pk))
+        self.assertFalse(RegistroActividad.registrar(self.user1.pk))
+
+        # Otro proceso (filtro local vacío) tampoco vuelve a registrar
+        RegistroActividad.limpiar()
+        self.assertFalse(RegistroActividad.registrar(self.user1.pk))
+
+    def test_registrar_no_escribe_en_base_de_datos(self):
+        """Test that recording activity does not touch the database"""
+        with self.assertNumQueries(0):
+            RegistroActividad.registrar(self.user1.pk)
+        self.user1.refresh_from_db()
+        self.assertIsNone(self.user1.last_activity)
+
+    def test_volcar_actualiza_en_un_solo_update(self):
+        """Test that the flush writes all pending users with one UPDATE"""
+        ahora = timezone.now()
+        RegistroActividad.registrar(self.user1.pk, ahora)
+        RegistroActividad.registrar(self.user2.pk, ahora - timedelta(seconds=5))
+
+        with self.assertNumQueries(1):
+            self.assertEqual(RegistroActividad.volcar(), 2)
+
+        self.user1.refresh_from_db()
+        self.user2.refresh_from_db()
+        self.assertEqual(self.user1.last_activity, ahora)
+        self.assertEqual(self.user2.last_activity, ahora - timedelta(seconds=5))
+
+        # Nada pendiente tras el volcado
+        with self.assertNumQueries(0):
+            self.assertEqual(RegistroActividad.volcar(), 0)
+
+    def test_volcar_entre_contador_y_ranura(self):
+        """Test that a flush between taking a slot and writing it does not lose the slot"""
+        from apps.usuarios import actividad
+
+        incrementar = actividad.incrementar
+        volcados = []
+
+        def incrementar_y_volcar(clave, *args):
+            ranura = incrementar(clave, *args)
+            if clave == RegistroActividad._clave("contador"):
+                volcados.append(RegistroActividad.volcar())
+            return ranura
+
+        with mock.patch.object(actividad, "incrementar", side_effect=incrementar_y_volcar):
+            RegistroActividad.registrar(self.user1.pk)
+        self.assertEqual(volcados, [0])
+
+        self.assertEqual(RegistroActividad.volcar(), 1)
+        self.user1.refresh_from_db()
+        self.assertIsNotNone(self.user1.last_activity)
+
+    def test_volcar_salta_ranura_abandonada(self):
+        """Test that a slot never written is skipped after one window"""
+        from django.core.cache import cache
+        from backend.services.cache import incrementar
+
+        incrementar(RegistroActividad._clave("contador"))  # proceso que terminó sin escribir
+        RegistroActividad.registrar(self.user1.pk)
+        self.assertEqual(RegistroActividad.volcar(), 0)
+
+        cache.set(RegistroActividad._clave("hueco", 1), 0, None)
+        self.assertEqual(RegistroActividad.volcar(), 1)
+
+    def test_volcar_de_a_uno(self):
+        """Test that a flush in progress elsewhere makes other flushes return immediately"""
+        from django.core.cache import cache
+
+        RegistroActividad.registrar(self.user1.pk)
+        cache.add(RegistroActividad._clave("volcando"), 1, 60)
+        with self.assertNumQueries(0):
+            self.assertEqual(RegistroActividad.volcar(), 0)
+        cache.delete(RegistroActividad._clave("volcando"))
+        self.assertEqual(RegistroActividad.volcar(), 1)
+
+    def test_usuarios_activos(self):
+        """Test that the active users count is distinct per user"""
+        RegistroActividad.registrar(self.user1.pk)
+        RegistroActividad.registrar(self.user1.pk)
+        RegistroActividad.registrar(self.user2.pk)
+        self.assertEqual(RegistroActividad.usuarios_activos(), 2)
+
+    def test_volcado_local_en_hilo(self):
+        """Test that recording activity starts the in-process flush thread"""
+        iniciado = threading.Event()
+        with mock.patch.object(RegistroActividad, "_volcar_periodicamente", side_effect=iniciado.set):
+            with self.settings(ACTIVIDAD_VOLCADO_LOCAL=False):
+                RegistroActividad.registrar(self.user1.pk)
+            self.assertFalse(iniciado.wait(0.2))
+
+            with self.settings(ACTIVIDAD_VOLCADO_LOCAL=True):
+                RegistroActividad.registrar(self.user2.pk)
+            self.assertTrue(iniciado.wait(5))
+
+    def test_middleware_registra_usuario_jwt(self):
+        """Test that JWT-authenticated requests are recorded by the middleware"""
+        client = APIClient()
+        login = client.post(reverse("login"), {"email": "uno@test.com", "password": "pass12345"})
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {login.data['access']}")
+        RegistroActividad.limpiar()
+
+        client.get(reverse("pedido-list"))
+        RegistroActividad.volcar()
+
+        self.user1.refresh_from_db()
+        self.assertIsNotNone(self.user1.last_activity)
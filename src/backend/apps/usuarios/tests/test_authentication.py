@@ -0,0 +1,125 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.usuarios.authentication import JWTUsuarioAuthentication, TokenUsuario, UsuarioToken
+from apps.usuarios.serializers import generate_tokens_for_user
+
+User = get_user_model()
+
+
+@override_settings(CACHE_COMPARTIDA=True)
+class TestJWTUsuarioAuthentication(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="cliente@test.com", nombre="Cliente", password="client123", rol="cliente"
+        )
+        self.factory = APIRequestFactory()
+        self.auth = JWTUsuarioAuthentication()
+
+    def _autenticar(self, access):
+        request = self.factory.get("/", HTTP_AUTHORIZATION=f"Bearer {access}")
+        return self.auth.authenticate(request)
+
+    def test_token_incluye_claims(self):
+        """Test that issued tokens carry rol, estado and is_superuser"""
+        access = AccessToken(generate_tokens_for_user(self.user)["access"])
+        self.assertEqual(access["rol"], "cliente")
+        self.assertTrue(access["estado"])
+        self.assertFalse(access["is_superuser"])
+
+    def test_autentica_sin_consultar_usuario(self):
+        """Test that a warm request builds the user from claims without queries"""
+        access = generate_tokens_for_user(self.user)["access"]
+        self._autenticar(access)
+
+        with self.assertNumQueries(0):
+            user, _ = self._autenticar(access)
+            self.assertIsInstance(user, UsuarioToken)
+            self.assertEqual(user.pk, self.user.pk)
+            self.assertEqual(user.rol, "cliente")
+            self.assertTrue(user.is_authenticated)
+        self.assertFalse(user.cargado)
+
+    def test_usuario_completo_bajo_demanda(self):
+        """Test that other attributes load the full Usuario once per request without caching it"""
+        from django.core.cache import cache
+
+        access = generate_tokens_for_user(self.user)["access"]
+        user, _ = self._autenticar(access)
+        with self.assertNumQueries(1):
+            self.assertEqual(user.email, "cliente@test.com")
+            self.assertEqual(user.nombre, "Cliente")
+        self.assertIsInstance(user, User)
+        self.assertIsNone(cache.get(f"auth:usuario:{self.user.pk}"))
+
+    def test_usuario_suspendido_rechazado(self):
+        """Test that deactivating the account revokes existing tokens"""
+        access = generate_tokens_for_user(self.user)["access"]
+        self._autenticar(access)
+
+        self.user.estado = False
+        self.user.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            self._autenticar(access)
+
+    def test_cambio_de_rol_invalida_token(self):
+        """Test that a role change rejects tokens with the old role claim"""
+        access = generate_tokens_for_user(self.user)["access"]
+        self.user.rol = "admin"
+        self.user.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            self._autenticar(access)
+
+    def test_token_sin_claims_usa_base_de_datos(self):
+        """Test that tokens issued without claims still authenticate"""
+        access = str(AccessToken.for_user(self.user))
+        user, _ = self._autenticar(access)
+        self.assertIsInstance(user, User)
+
+    def test_refresh_actualiza_claims(self):
+        """Test that refreshing issues an access token with the current role"""
+        refresh = str(TokenUsuario.for_user(self.user))
+        self.user.rol = "proveedor"
+        self.user.save()
+
+        response = APIClient().post(reverse("token_refresh"), {"refresh": refresh})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(AccessToken(response.data["access"])["rol"], "proveedor")
+        user, _ = self._autenticar(response.data["access"])
+        self.assertEqual(user.rol, "proveedor")
+
+
+@override_settings(CACHE_COMPARTIDA=False)
+class TestJWTUsuarioAuthenticationCacheLocal(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="cliente@test.com", nombre="Cliente", password="client123", rol="cliente"
+        )
+        self.auth = JWTUsuarioAuthentication()
+        self.access = generate_tokens_for_user(self.user)["access"]
+
+    def _autenticar(self):
+        request = APIRequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {self.access}")
+        return self.auth.authenticate(request)
+
+    def test_consulta_estado_en_cada_peticion(self):
+        """Test that a per-process cache falls back to one claims query per request"""
+        self._autenticar()
+        with self.assertNumQueries(1):
+            user, _ = self._autenticar()
+        self.assertIsInstance(user, UsuarioToken)
+
+    def test_suspension_en_otro_proceso_rechazada(self):
+        """Test that a suspension not invalidated in this process is still seen"""
+        self._autenticar()
+        # Sin señales: simula el guardado hecho por otro worker
+        User.objects.filter(pk=self.user.pk).update(estado=False)
+
+        with self.assertRaises(AuthenticationFailed):
+            self._autenticar()
@@ -0,0 +1,71 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+User = get_user_model()
+
+
+class TestDirectorioUsuarios(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(email="admin@test.com", nombre="Admin", password="admin123")
+        User.objects.create_user(email="ana@test.com", nombre="Ana Pérez", password="x", rol="cliente")
+        User.objects.create_user(email="andres@test.com", nombre="Andrés", password="x", rol="proveedor")
+        User.objects.create_user(email="beto@test.com", nombre="Roberto Anaya", password="x", rol="cliente")
+        inactivo = User.objects.create_user(email="anibal@test.com", nombre="Aníbal", password="x", rol="cliente")
+        inactivo.estado = False
+        inactivo.save()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+        self.url = reverse("usuario-directorio")
+
+    def _emails(self, response):
+        return sorted(usuario["email"] for usuario in response.data["results"])
+
+    def test_busqueda_por_prefijo(self):
+        """Test that the default search matches email or nombre prefixes"""
+        response = self.client.get(self.url, {"q": "an"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._emails(response), ["ana@test.com", "andres@test.com", "anibal@test.com"])
+
+    def test_busqueda_por_contenido(self):
+        """Test that modo=contiene matches substrings and requires three characters"""
+        response = self.client.get(self.url, {"q": "anay", "modo": "contiene"})
+        self.assertEqual(self._emails(response), ["beto@test.com"])
+        self.assertEqual(self.client.get(self.url, {"q": "an", "modo": "contiene"}).status_code, 400)
+
+    def test_facetas_en_una_consulta(self):
+        """Test that facets come from one grouped query and respect the other filter"""
+        response = self.client.get(self.url, {"q": "an", "rol": "cliente", "estado": "true"})
+        self.assertEqual(self._emails(response), ["ana@test.com"])
+        facetas = response.data["facetas"]
+        self.assertEqual(facetas["total"], 1)
+        self.assertEqual(facetas["rol"]["cliente"], 1)
+        self.assertEqual(facetas["rol"]["proveedor"], 1)
+        self.assertEqual(facetas["estado"], {"activos": 1, "inactivos": 1})
+
+        grupos = [q for q in self._consultas({"q": "an"}) if "GROUP BY" in q["sql"]]
+        self.assertEqual(len(grupos), 1)
+
+    def _consultas(self, params):
+        with CaptureQueriesContext(connection) as consultas:
+            self.client.get(self.url, params)
+        return consultas.captured_queries
+
+    def test_paginacion_por_cursor(self):
+        """Test that the directory pages with a cursor and no COUNT"""
+        response = self.client.get(self.url, {"page_size": 2})
+        vistos = [usuario["id"] for usuario in response.data["results"]]
+        while response.data["next"]:
+            response = self.client.get(response.data["next"])
+            vistos.extend(usuario["id"] for usuario in response.data["results"])
+        self.assertEqual(sorted(vistos), sorted(User.objects.values_list("id", flat=True)))
+        self.assertNotIn("count", response.data)
+
+    def test_solo_admin(self):
+        """Test that non-admin users cannot browse the directory"""
+        cliente = User.objects.get(email="ana@test.com")
+        self.client.force_authenticate(user=cliente)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
@@ -0,0 +1,106 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.usuarios.estadisticas import EstadisticasUsuarios
+from apps.usuarios.models import AltasDiariasUsuarios
+from apps.usuarios.services import ProvisionUsuarios
+
+User = get_user_model()
+
+
+class TestEstadisticasUsuarios(TestCase):
+    def setUp(self):
+        self.cliente = User.objects.create_user(email="c@test.com", nombre="C", password="x", rol="cliente")
+        self.proveedor = User.objects.create_user(email="p@test.com", nombre="P", password="x", rol="proveedor")
+
+    def test_altas_incrementan_contadores(self):
+        """Test that creating users updates role/state and daily counters"""
+        segmentos = EstadisticasUsuarios.por_segmento()
+        self.assertEqual(segmentos[("cliente", True)], 1)
+        self.assertEqual(segmentos[("proveedor", True)], 1)
+        self.assertEqual(AltasDiariasUsuarios.objects.get(fecha=timezone.localdate()).total, 2)
+
+    def test_cambio_de_estado_y_rol(self):
+        """Test that estado and rol changes move the user between segments"""
+        usuario = User.objects.get(pk=self.cliente.pk)
+        usuario.estado = False
+        usuario.save(update_fields=["estado"])
+        usuario.rol = "logistica"
+        usuario.save()
+
+        segmentos = EstadisticasUsuarios.por_segmento()
+        self.assertEqual(segmentos[("cliente", True)], 0)
+        self.assertEqual(segmentos[("cliente", False)], 0)
+        self.assertEqual(segmentos[("logistica", False)], 1)
+
+    def test_guardado_sin_cambios_no_consulta_contadores(self):
+        """Test that saves not touching rol or estado skip the counters"""
+        usuario = User.objects.get(pk=self.cliente.pk)
+        with CaptureQueriesContext(connection) as consultas:
+            usuario.nombre = "Otro"
+            usuario.save()
+        self.assertFalse(any("estadistica" in q["sql"] for q in consultas.captured_queries))
+
+    def test_eliminar_decrementa(self):
+        """Test that deleting a user decrements its counters"""
+        self.proveedor.delete()
+        self.assertEqual(EstadisticasUsuarios.por_segmento()[("proveedor", True)], 0)
+        self.assertEqual(AltasDiariasUsuarios.objects.get(fecha=timezone.localdate()).total, 1)
+
+    def test_provision_masiva_cuenta_altas(self):
+        """Test that bulk provisioning updates the counters without signals"""
+        ProvisionUsuarios(procesos=1).importar([
+            {"email": f"n{i}@test.com", "nombre": f"N{i}"} for i in range(3)
+        ])
+        self.assertEqual(EstadisticasUsuarios.por_segmento()[("cliente", True)], 4)
+
+    def test_reconciliar_corrige_desfases(self):
+        """Test that reconciliation fixes counters missed by direct UPDATEs"""
+        User.objects.filter(pk=self.cliente.pk).update(estado=False)
+        self.assertEqual(EstadisticasUsuarios.reconciliar(), 2)
+        segmentos = EstadisticasUsuarios.por_segmento()
+        self.assertEqual(segmentos[("cliente", False)], 1)
+        self.assertNotIn(("cliente", True), segmentos)
+        self.assertEqual(EstadisticasUsuarios.reconciliar(), 0)
+
+    def test_reconciliar_bloquea_antes_de_contar(self):
+        """Test that reconciliation locks the counter rows before recounting users"""
+        with CaptureQueriesContext(connection) as consultas:
+            EstadisticasUsuarios.reconciliar()
+        sql = [q["sql"] for q in consultas.captured_queries]
+        primer_conteo = next(i for i, q in enumerate(sql) if 'FROM "usuarios_usuario"' in q)
+        bloqueos = [i for i, q in enumerate(sql) if q.startswith("SELECT") and "usuarios_usuario" not in q]
+        self.assertEqual(len(bloqueos), 2)
+        self.assertTrue(all(i < primer_conteo for i in bloqueos))
+
+    def test_nuevos_desde_combina_dias_y_tramo(self):
+        """Test that new users combine the first partial day with daily buckets"""
+        viejo = User.objects.create_user(email="v@test.com", nombre="V", password="x")
+        User.objects.filter(pk=viejo.pk).update(fecha_creacion=timezone.now() - timedelta(days=10))
+        EstadisticasUsuarios.reconciliar()
+
+        self.assertEqual(EstadisticasUsuarios.nuevos_desde(timezone.now() - timedelta(days=3)), 2)
+        self.assertEqual(EstadisticasUsuarios.nuevos_desde(timezone.now() - timedelta(days=30)), 3)
+
+    def test_metricas_sin_count_sobre_usuarios(self):
+        """Test that the admin dashboard reads user totals from the counters"""
+        admin = User.objects.create_superuser(email="admin@test.com", nombre="Admin", password="admin123")
+        client = APIClient()
+        client.force_authenticate(user=admin)
+
+        with CaptureQueriesContext(connection) as consultas:
+            response = client.get(reverse("admin-metrics"), {"range": "1w"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["users"]["active"], 3)
+        conteos = [q["sql"] for q in consultas.captured_queries
+                   if "COUNT(" in q["sql"] and 'FROM "usuarios_usuario"' in q["sql"]]
+        # Solo el tramo del primer día, acotado por fecha_creacion
+        self.assertEqual(len(conteos), 1)
+        self.assertIn('"fecha_creacion" <', conteos[0])
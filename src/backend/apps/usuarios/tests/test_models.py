@@ -1,6 +1,6 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
-from apps.usuarios.models import Usuario
+from apps.usuarios.models import Usuario, PasswordHistory
 
 User = get_user_model()
 
@@ -141,3 +141,48 @@ class TestUsuarioModel(TestCase):
         # But should validate correctly
         self.assertTrue(user.check_password("plaintext123"))
         self.assertFalse(user.check_password("wrongpassword"))
+
+
+@override_settings(PASSWORD_HISTORY_DEPTH=2)
+class TestPasswordHistory(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="hist@test.com",
+            nombre="Historial",
+            password="clave-0"
+        )
+
+    def _cambiar(self, password):
+        self.user.set_password(password)
+        self.user.save()
+
+    def test_save_sin_cambio_de_password_una_consulta(self):
+        """Test that saving without a password change issues a single query"""
+        user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(1):
+            user.nombre = "Otro nombre"
+            user.save(update_fields=["nombre"])
+        with self.assertNumQueries(1):
+            user.save()
+        self.assertEqual(PasswordHistory.objects.filter(usuario=user).count(), 1)
+
+    def test_historial_acotado_a_la_profundidad(self):
+        """Test that password history keeps only the configured depth"""
+        for i in range(1, 5):
+            self._cambiar(f"clave-{i}")
+        hashes = list(self.user.password_history.values_list("password_hash", flat=True))
+        self.assertEqual(len(hashes), 2)
+        self.assertIn(self.user.password, hashes)
+
+    def test_reutilizar_password_reciente_falla(self):
+        """Test that a password within the depth cannot be reused"""
+        self._cambiar("clave-1")
+        with self.assertRaises(ValueError):
+            self.user.set_password("clave-0")
+
+    def test_reutilizar_password_fuera_de_profundidad(self):
+        """Test that a password older than the depth can be used again"""
+        self._cambiar("clave-1")
+        self._cambiar("clave-2")
+        self._cambiar("clave-0")
+        self.assertTrue(User.objects.get(pk=self.user.pk).check_password("clave-0"))
@@ -0,0 +1,80 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from apps.usuarios.models import PasswordHistory
+from apps.usuarios.services import ProvisionUsuarios
+
+User = get_user_model()
+
+
+class TestProvisionUsuarios(TestCase):
+    def _filas(self, cantidad, inicio=0):
+        return [
+            {"email": f"cliente{i}@test.com", "nombre": f"Cliente {i}", "password": f"Clave{i}123"}
+            for i in range(inicio, inicio + cantidad)
+        ]
+
+    def test_importa_por_lotes_con_historial(self):
+        """Test that users and their password history are bulk created per chunk"""
+        resultado = ProvisionUsuarios(tamano_lote=2, procesos=2).importar(self._filas(5))
+        self.assertEqual(resultado, {"creados": 5, "errores": []})
+
+        user = User.objects.get(email="cliente3@test.com")
+        self.assertTrue(user.check_password("Clave3123"))
+        self.assertEqual(user.rol, "cliente")
+        self.assertEqual(PasswordHistory.objects.filter(usuario__email__startswith="cliente").count(), 5)
+
+    def test_consultas_constantes_por_lote(self):
+        """Test that a chunk costs the same queries regardless of its size"""
+        provision = ProvisionUsuarios(procesos=1)
+        provision.importar(self._filas(1))
+        with CaptureQueriesContext(connection) as consultas:
+            provision.importar(self._filas(2, inicio=1))
+        with self.assertNumQueries(len(consultas.captured_queries)):
+            provision.importar(self._filas(6, inicio=3))
+
+    def test_reporta_filas_invalidas_y_repetidas(self):
+        """Test that invalid, duplicated and existing rows are reported without aborting"""
+        User.objects.create_user(email="existe@test.com", nombre="Existe", password="Clave123")
+        filas = [
+            {"email": "nuevo@test.com", "nombre": "Nuevo"},
+            {"email": "nuevo@test.com", "nombre": "Otra vez"},
+            {"email": "existe@test.com", "nombre": "Existe"},
+            {"email": "", "nombre": "Sin email"},
+            {"email": "rol@test.com", "nombre": "Rol", "rol": "jefe"},
+        ]
+        resultado = ProvisionUsuarios(procesos=1).importar(filas)
+
+        self.assertEqual(resultado["creados"], 1)
+        self.assertEqual([error["fila"] for error in resultado["errores"]], [2, 4, 5, 3])
+        # Sin contraseña se crea con contraseña no utilizable y sin historial
+        nuevo = User.objects.get(email="nuevo@test.com")
+        self.assertFalse(nuevo.has_usable_password())
+        self.assertFalse(nuevo.password_history.exists())
+
+    def test_comando_importa_csv_y_jsonl(self):
+        """Test that the management command imports CSV and JSONL files"""
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta_csv = os.path.join(directorio, "usuarios.csv")
+            with open(ruta_csv, "w", encoding="utf-8") as archivo:
+                archivo.write("email,nombre,password,rol\n")
+                archivo.write("csv@test.com,Desde CSV,Clave123,proveedor\n")
+            ruta_jsonl = os.path.join(directorio, "usuarios.jsonl")
+            with open(ruta_jsonl, "w", encoding="utf-8") as archivo:
+                archivo.write(json.dumps({"email": "jsonl@test.com", "nombre": "Desde JSONL"}) + "\n")
+
+            salida = StringIO()
+            call_command("importar_usuarios", ruta_csv, "--procesos", "1", stdout=salida)
+            call_command("importar_usuarios", ruta_jsonl, stdout=salida)
+
+        self.assertEqual(User.objects.get(email="csv@test.com").rol, "proveedor")
+        self.assertTrue(User.objects.filter(email="jsonl@test.com").exists())
+        self.assertIn("Usuarios creados: 1", salida.getvalue())
@@ -3,7 +3,11 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.exceptions import Throttled
+from django.conf import settings
 from django.utils import timezone
+from backend.services.correo import enviar_correo
+from backend.services.limites import LimiteIntentos
 from ..models import Usuario
 from ..serializers import UsuarioSerializer
 
@@ -26,15 +30,10 @@ def self_deactivate_account(request):
     # Desactivar cuenta
     user.self_deactivated = True
     user.estado = False
-    user.save()
+    user.save(update_fields=['self_deactivated', 'estado'])
 
-    # Enviar correo de desactivación
-    try:
-        from django.core.mail import send_mail
-        from django.conf import settings
-        
-        subject = 'Desactivación de Cuenta - PREXCOL'
-        message = f'''Hola {user.nombre},
+    # Enviar correo de desactivación (encolado, fuera de la petición)
+    message = f'''Hola {user.nombre},
 
 Tu cuenta en PREXCOL ha sido desactivada exitosamente a tu solicitud.
 
@@ -44,16 +43,7 @@ Esperamos verte pronto.
 
 Saludos,
 El equipo de PREXCOL'''
-        
-        send_mail(
-            subject,
-            message,
-            settings.DEFAULT_FROM_EMAIL,
-            [user.email],
-            fail_silently=True,
-        )
-    except Exception as e:
-        print(f"Error enviando correo de desactivación: {e}")
+    enviar_correo('Desactivación de Cuenta - PREXCOL', message, [user.email])
 
     
     return Response({
@@ -75,6 +65,11 @@ def self_reactivate_account(request):
         return Response({
             'error': 'Email y contraseña son requeridos'
         }, status=status.HTTP_400_BAD_REQUEST)
+
+    limite = LimiteIntentos.para('reactivar_cuenta')
+    espera = limite.consumir(request, email)
+    if espera:
+        raise Throttled(wait=espera, detail='Demasiados intentos. Intenta más tarde.')
     
     try:
         user = Usuario.objects.get(email=email)
@@ -85,6 +80,7 @@ def self_reactivate_account(request):
     
     # Verificar contraseña
     if not user.check_password(password):
+        limite.registrar_fallo(email)
         return Response({
             'error': 'Contraseña incorrecta'
         }, status=status.HTTP_401_UNAUTHORIZED)
@@ -103,9 +99,10 @@ def self_reactivate_account(request):
             }, status=status.HTTP_400_BAD_REQUEST)
     
     # Reactivar cuenta
+    limite.reiniciar(email)
     user.self_deactivated = False
     user.estado = True
-    user.save()
+    user.save(update_fields=['self_deactivated', 'estado'])
     
     return Response({
         'message': 'Tu cuenta ha sido reactivada exitosamente. Ya puedes iniciar sesión.',
@@ -140,7 +137,7 @@ def admin_suspend_user(request, user_id):
     user.estado = False
     user.suspension_reason = reason
     user.suspension_date = timezone.now()
-    user.save()
+    user.save(update_fields=['admin_suspended', 'estado', 'suspension_reason', 'suspension_date'])
     
     return Response({
         'message': f'Usuario {user.nombre} ha sido suspendido',
@@ -167,7 +164,9 @@ def admin_reactivate_user(request, user_id):
     user.estado = True
     user.suspension_reason = None
     user.suspension_date = None
-    user.save()
+    user.save(update_fields=[
+        'admin_suspended', 'self_deactivated', 'estado', 'suspension_reason', 'suspension_date'
+    ])
     
     return Response({
         'message': f'Usuario {user.nombre} ha sido reactivado',
@@ -203,10 +202,7 @@ def request_support(request):
     message = request.data.get('message', '')
     issue_type = request.data.get('issue_type', 'general')
     
-    # Implementación básica de envío de correo a soporte
-    from django.core.mail import send_mail
-    from django.conf import settings
-
+    # Correo al equipo de soporte (encolado, fuera de la petición)
     subject = f"Solicitud de Soporte: {issue_type} - Usuario {user.email}"
     email_message = f"""
     Usuario: {user.nombre} ({user.email})
@@ -215,17 +211,7 @@ def request_support(request):
     {message}
     """
     
-    try:
-        send_mail(
-            subject,
-            email_message,
-            settings.DEFAULT_FROM_EMAIL,
-            [settings.DEFAULT_FROM_EMAIL], # Enviar al admin (mismo correo por ahora)
-            fail_silently=False,
-        )
-    except Exception as e:
-        print(f"Error enviando correo de soporte: {e}")
-        # No fallamos la request, pero logueamos el error
+    enviar_correo(subject, email_message, [settings.DEFAULT_FROM_EMAIL])  # Al admin (mismo correo por ahora)
     
     return Response({
         'message': 'Tu solicitud ha sido enviada al equipo de soporte. Te contactaremos pronto.',
@@ -4,9 +4,11 @@ from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.utils.encoding import force_bytes
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
 from django.views.decorators.csrf import csrf_exempt
-from django.core.mail import EmailMultiAlternatives
 from django.conf import settings
 from apps.usuarios.models import Usuario  # Use custom Usuario model
+from backend.services.correo import enviar_correo
+from backend.services.hashing import HashSaturado
+from backend.services.limites import LimiteIntentos
 
 token_generator = PasswordResetTokenGenerator()
 
@@ -19,6 +21,11 @@ def forgot_password(request):
     data = json.loads(request.body.decode('utf-8'))
     email = data.get("email")
 
+    espera = LimiteIntentos.para("forgot_password").consumir(request, email)
+    if espera:
+        response = JsonResponse({"error": "Demasiadas solicitudes. Intenta más tarde."}, status=429)
+        response["Retry-After"] = str(espera)
+        return response
 
     try:
         user = Usuario.objects.get(email=email)
@@ -229,9 +236,8 @@ def forgot_password(request):
 </html>
 """
 
-    email_msg = EmailMultiAlternatives(subject, text, settings.DEFAULT_FROM_EMAIL, [email])
-    email_msg.attach_alternative(html, "text/html")
-    email_msg.send()
+    # Encolado: la respuesta no espera al servidor SMTP
+    enviar_correo(subject, text, [email], html=html)
 
     return JsonResponse({"message": "Si el correo existe, enviaremos un mensaje."})
 
@@ -272,7 +278,14 @@ def reset_password(request, uidb64, token):
     if not token_generator.check_token(user, token):
         return JsonResponse({"error": "Token inválido o expirado"}, status=400)
 
-    user.set_password(password)
+    try:
+        user.set_password(password)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    except HashSaturado as e:
+        response = JsonResponse({"error": str(e.detail)}, status=e.status_code)
+        response["Retry-After"] = str(e.wait)
+        return response
     user.save()
 
     return JsonResponse({"message": "Contraseña actualizada correctamente"})
@@ -1,7 +1,7 @@
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
-from django.db.models import Count, Sum, F
+from django.db.models import Sum
 from django.utils import timezone
 from datetime import timedelta
 try:
@@ -10,14 +10,20 @@ except ImportError:
     psutil = None
 import datetime
 
+from backend.services.cache import get_or_set
+from apps.usuarios.actividad import RegistroActividad
+from apps.usuarios.estadisticas import EstadisticasUsuarios
+
 # Imports from other apps
-from apps.usuarios.models import Usuario
 try:
-    from apps.ventas.models import Pedido, DetallePedido
+    from apps.productos.models import Pedido, DetallePedido
 except ImportError:
     Pedido = None
     DetallePedido = None
 
+METRICAS_CACHE_TIMEOUT = 10
+
+
 @api_view(["GET"])
 @permission_classes([IsAdminUser])
 def get_advanced_metrics(request):
@@ -44,36 +50,15 @@ def get_advanced_metrics(request):
     elif time_range == '1y': start_date = now - timedelta(days=365)
     else: start_date = now - timedelta(weeks=1) # Default
 
-    # --- SALES METRICS ---
-    sales_data = {
-        'total_orders': 0,
-        'total_revenue': 0,
-        'top_products': [],
-        'bottom_products': []
-    }
-    
-    if Pedido and DetallePedido:
-        # Filter orders in range
-        orders_query = Pedido.objects.filter(fecha_creacion__gte=start_date)
-        sales_data['total_orders'] = orders_query.count()
-        sales_data['total_revenue'] = orders_query.aggregate(Sum('total'))['total__sum'] or 0
-
-        # Top Products
-        product_stats = DetallePedido.objects.filter(pedido__fecha_creacion__gte=start_date)\
-            .values('producto__nombre')\
-            .annotate(qty=Sum('cantidad'))\
-            .order_by('-qty')
-            
-        sales_data['top_products'] = list(product_stats[:5])
-        sales_data['bottom_products'] = list(product_stats.order_by('qty')[:5])
-
-    # --- USER METRICS ---
-    users_data = {
-        'active': Usuario.objects.filter(estado=True).count(),
-        'inactive': Usuario.objects.filter(estado=False).count(),
-        'new_users': Usuario.objects.filter(fecha_creacion__gte=start_date).count(),
-        'top_buyers': [] # TODO: Aggregate from Pedido if linked
-    }
+    # Las métricas de ventas se sirven desde cache por unos segundos: el
+    # dashboard consulta cada pocos segundos y los pedidos nuevos invalidan el tag.
+    # Las de usuarios salen de los contadores precalculados (EstadisticasUsuarios).
+    datos = get_or_set(
+        f"metricas:ventas:{time_range}",
+        lambda: _metricas_base_datos(start_date),
+        timeout=METRICAS_CACHE_TIMEOUT,
+        tags=("pedidos",),
+    )
 
     # --- PLATFORM METRICS ---
     try:
@@ -98,7 +83,39 @@ def get_advanced_metrics(request):
 
     return Response({
         'range': time_range,
-        'sales': sales_data,
-        'users': users_data,
+        'sales': datos,
+        'users': {
+            **EstadisticasUsuarios.resumen(start_date),
+            'online': RegistroActividad.usuarios_activos(),
+            'top_buyers': [],  # TODO: Aggregate from Pedido if linked
+        },
         'platform': platform_data
     })
+
+
+def _metricas_base_datos(start_date):
+    """Calcula las métricas de ventas desde `start_date`."""
+    # --- SALES METRICS ---
+    sales_data = {
+        'total_orders': 0,
+        'total_revenue': 0,
+        'top_products': [],
+        'bottom_products': []
+    }
+    
+    if Pedido and DetallePedido:
+        # Filter orders in range
+        orders_query = Pedido.objects.filter(fecha_creacion__gte=start_date)
+        sales_data['total_orders'] = orders_query.count()
+        sales_data['total_revenue'] = orders_query.aggregate(Sum('total'))['total__sum'] or 0
+
+        # Top Products
+        product_stats = DetallePedido.objects.filter(pedido__fecha_creacion__gte=start_date)\
+            .values('producto__nombre')\
+            .annotate(qty=Sum('cantidad'))\
+            .order_by('-qty')
+            
+        sales_data['top_products'] = list(product_stats[:5])
+        sales_data['bottom_products'] = list(product_stats.order_by('qty')[:5])
+
+    return sales_data
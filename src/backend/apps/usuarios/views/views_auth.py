@@ -2,8 +2,9 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import generics, status
+from rest_framework.exceptions import Throttled
 from django.utils import timezone
-from django_ratelimit.decorators import ratelimit
+from backend.services.limites import LimiteIntentos
 from ..models import Usuario
 from ..serializers import (
     UsuarioSerializer, 
@@ -40,13 +41,20 @@ def register_user(request):
 # ------------------------------------------------------------
 #   LOGIN
 # ------------------------------------------------------------
-@ratelimit(key='ip', rate='5/m', method='POST', block=True)
 @api_view(["POST"])
 @permission_classes([AllowAny])
 def login_user(request):
+    # Límite por IP y por email antes de verificar el hash (costoso en CPU)
+    limite = LimiteIntentos.para("login")
+    email = request.data.get("email")
+    espera = limite.consumir(request, email)
+    if espera:
+        raise Throttled(wait=espera, detail="Demasiados intentos de inicio de sesión. Intente más tarde.")
+
     serializer = LoginSerializer(data=request.data)
 
     if not serializer.is_valid():
+        limite.registrar_fallo(email)
         return Response(
             {"error": "Credenciales inválidas"},
             status=status.HTTP_401_UNAUTHORIZED,
@@ -54,7 +62,6 @@ def login_user(request):
 
     user = serializer.validated_data["user"]
 
-    # Verificar que el usuario esté activo
     # Verificar que el usuario esté activo
     if not user.estado:
         # Security: Return generic error to prevent user enumeration, 
@@ -65,9 +72,11 @@ def login_user(request):
             status=status.HTTP_401_UNAUTHORIZED,
         )
 
-    # Actualizar último ingreso
+    limite.reiniciar(email)
+
+    # Actualizar último ingreso (solo esa columna: sin reescribir la fila completa)
     user.ultimo_ingreso = timezone.now()
-    user.save()
+    user.save(update_fields=["ultimo_ingreso"])
 
     tokens = generate_tokens_for_user(user)
 
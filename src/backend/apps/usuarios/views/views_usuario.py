@@ -6,7 +6,9 @@ from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from django.contrib.auth import get_user_model
 from django.contrib.auth.hashers import make_password
+from pagination import KeysetPagination
 from ..serializers import UsuarioSerializer
+from ..services import DirectorioUsuarios
 
 
 User = get_user_model()
@@ -52,3 +54,43 @@ class UsuarioViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(proveedores, many=True)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
+    def directorio(self, request):
+        """
+        Directorio de usuarios para administración.
+
+        Parámetros: `q` (búsqueda en email y nombre), `modo` (prefijo | contiene),
+        `rol`, `estado` (true | false), `cursor` y `page_size`. Retorna las
+        facetas por rol y estado y una página por cursor (más recientes primero).
+        """
+        if not (request.user.is_superuser or request.user.rol == 'admin'):
+            return Response(
+                {"error": "No tiene permisos para ver esta información"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        rol = request.query_params.get('rol') or None
+        estado = request.query_params.get('estado')
+        if estado is not None:
+            estado = estado.lower() in ('true', '1', 'si', 'activo')
+
+        try:
+            usuarios = DirectorioUsuarios.buscar(
+                User.objects.all(),
+                q=request.query_params.get('q'),
+                modo=request.query_params.get('modo', 'prefijo'),
+            )
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        facetas = DirectorioUsuarios.facetas(usuarios, rol=rol, estado=estado)
+
+        paginator = KeysetPagination()
+        pagina = paginator.paginate_queryset(
+            DirectorioUsuarios.filtrar(usuarios, rol=rol, estado=estado), request, view=self
+        )
+        return Response({
+            'facetas': facetas,
+            'next': paginator.get_next_link(),
+            'results': self.get_serializer(pagina, many=True).data,
+        })
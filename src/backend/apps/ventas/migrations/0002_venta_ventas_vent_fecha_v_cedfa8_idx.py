@@ -0,0 +1,20 @@
+# Generated by Django 5.0.4 on 2026-10-18 10:24
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0006_historialrecarga_productos_h_fecha_c_2215b1_idx_and_more'),
+        ('ventas', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='venta',
+            index=models.Index(fields=['-fecha_venta', '-id'], name='ventas_vent_fecha_v_cedfa8_idx'),
+        ),
+    ]
@@ -21,6 +21,7 @@ class Venta(models.Model):
         verbose_name_plural = "Ventas"
         indexes = [
             models.Index(fields=['fecha_venta']),
+            models.Index(fields=['-fecha_venta', '-id']),
         ]
 
     def __str__(self):
@@ -2,6 +2,7 @@ from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.db import transaction
 from apps.pagos.models import Pago
+from apps.pagos.cache import estados_pago
 from apps.productos.models import Pedido
 from .models import Venta, DetalleVenta
 
@@ -12,7 +13,9 @@ def crear_venta_al_aprobar_pago(sender, instance, created, **kwargs):
     """
     # Asumimos que el estado aprobado tiene ID o nombre específico.
     # Ajustar según la implementación real de EstadoPago.
-    if instance.estado.nombre.lower() in ['aprobado', 'completado', 'pagado']:
+    # El estado se resuelve desde el cache de catálogos para evitar una consulta por guardado
+    estado = estados_pago.por_id(instance.estado_id)
+    if estado.nombre.lower() in ['aprobado', 'completado', 'pagado']:
         pedido = instance.pedido
         
         # Verificar si ya existe venta para este pedido
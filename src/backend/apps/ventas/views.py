@@ -7,15 +7,17 @@ from django.db.models import Sum
 from .models import Venta
 from .serializers import VentaSerializer
 from apps.usuarios.permissions import IsAdmin
+from pagination import ListadoPaginadoMixin
 
-class VentaViewSet(viewsets.ReadOnlyModelViewSet):
+class VentaViewSet(ListadoPaginadoMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet para visualizar ventas. Solo lectura.
     Acceso restringido a administradores.
     """
-    queryset = Venta.objects.all()
+    queryset = Venta.objects.select_related("cliente").prefetch_related("detalles__producto")
     serializer_class = VentaSerializer
     permission_classes = [IsAdmin]
+    campo_cursor = 'fecha_venta'
     
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -38,12 +40,13 @@ class VentaViewSet(viewsets.ReadOnlyModelViewSet):
         total_vendido = ventas_hoy.aggregate(Sum('total'))['total__sum'] or 0
         cantidad_ventas = ventas_hoy.count()
         
-        return Response({
-            'fecha': hoy,
-            'total_vendido': total_vendido,
-            'cantidad_ventas': cantidad_ventas,
-            'ventas': VentaSerializer(ventas_hoy, many=True).data
-        })
+        return self.listar(
+            ventas_hoy,
+            clave='ventas',
+            fecha=hoy,
+            total_vendido=total_vendido,
+            cantidad_ventas=cantidad_ventas,
+        )
 
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
     def mis_ventas_proveedor(self, request):
@@ -57,15 +60,16 @@ class VentaViewSet(viewsets.ReadOnlyModelViewSet):
         if user.rol != 'proveedor':
             return Response({'error': 'No eres proveedor'}, status=403)
             
-        detalles = DetalleVenta.objects.filter(producto__proveedor=user).order_by('-venta__fecha_venta')
+        detalles = DetalleVenta.objects.filter(producto__proveedor=user).select_related(
+            'producto', 'venta__cliente'
+        ).order_by('-venta__fecha_venta', '-id')
         
         # Calcular total vendido histórico
         total_historico = detalles.aggregate(Sum('subtotal'))['subtotal__sum'] or 0
         
         # Serializar
-        data = []
-        for d in detalles:
-            data.append({
+        def serializar(detalles):
+            return [{
                 'id': d.id,
                 'fecha': d.venta.fecha_venta,
                 'producto': d.producto.nombre,
@@ -73,9 +77,11 @@ class VentaViewSet(viewsets.ReadOnlyModelViewSet):
                 'precio_unitario': d.precio_unitario,
                 'subtotal': d.subtotal,
                 'cliente': d.venta.cliente.nombre
-            })
+            } for d in detalles]
             
-        return Response({
-            'total_historico': total_historico,
-            'ventas': data
-        })
+        return self.listar(
+            detalles,
+            serializar=serializar,
+            clave='ventas',
+            total_historico=total_historico,
+        )
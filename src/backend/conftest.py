@@ -0,0 +1,20 @@
+import pytest
+from django.core.cache import cache
+
+from apps.usuarios.actividad import RegistroActividad
+from backend.services.catalogos import CatalogoCache
+
+
+@pytest.fixture(autouse=True)
+def limpiar_cache():
+    """Evita que valores cacheados sobrevivan al rollback de la base de datos entre tests."""
+    cache.clear()
+    CatalogoCache.limpiar_todo()
+    RegistroActividad.limpiar()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def sin_volcado_de_actividad(settings):
+    """El hilo de volcado de RegistroActividad no debe escribir durante otros tests."""
+    settings.ACTIVIDAD_VOLCADO_LOCAL = False
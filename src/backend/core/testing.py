@@ -0,0 +1,31 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from backend.services.catalogos import CatalogoCache
+
+
+class ConsultasConstantesMixin:
+    """
+    Mixin para TestCase/APITestCase que detecta consultas N+1 en endpoints
+    de listado: la cantidad de consultas no debe crecer con el tamaño de página.
+    """
+
+    def assertConsultasConstantes(self, url, tamanos=(1, 10), params=None):
+        """
+        Pide `url` con cada `page_size` de `tamanos` y falla si la cantidad de
+        consultas varía. Los datos de prueba deben cubrir el mayor tamaño.
+        """
+        conteos = {}
+        for tamano in tamanos:
+            # Se limpia la cache para medir siempre el camino completo
+            cache.clear()
+            CatalogoCache.limpiar_todo()
+            with CaptureQueriesContext(connection) as consultas:
+                response = self.client.get(url, {**(params or {}), "page_size": tamano})
+            self.assertEqual(response.status_code, 200, f"{url} respondió {response.status_code}")
+            conteos[tamano] = len(consultas)
+
+        if len(set(conteos.values())) > 1:
+            detalle = ", ".join(f"page_size={tamano}: {n}" for tamano, n in conteos.items())
+            self.fail(f"Las consultas de {url} crecen con el tamaño de página ({detalle})")
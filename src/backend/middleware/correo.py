@@ -0,0 +1,11 @@
+from backend.services.correo import LoteCorreo
+
+class CorreoMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        # Los correos confirmados durante la petición se publican juntos al
+        # terminarla (ver LoteCorreo) en lugar de una tarea por correo.
+        with LoteCorreo.agrupar():
+            return self.get_response(request)
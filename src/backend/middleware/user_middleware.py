@@ -1,16 +1,17 @@
-from django.utils import timezone
+from apps.usuarios.actividad import RegistroActividad
 
 class ActiveUserMiddleware:
     def __init__(self, get_response):
         self.get_response = get_response
 
     def __call__(self, request):
-        if request.user.is_authenticated:
-            # Actualizamos la última actividad
-            # Usamos update_fields para evitar sobrescribir otros cambios concurrentes
-            # y mejorar el rendimiento
-            request.user.last_activity = timezone.now()
-            request.user.save(update_fields=['last_activity'])
-            
         response = self.get_response(request)
+
+        # Se revisa después de la vista: DRF asigna aquí el usuario autenticado
+        # por JWT. La actividad se encola y se escribe en lote (ver RegistroActividad)
+        # en lugar de hacer un UPDATE por petición.
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            RegistroActividad.registrar(user.pk)
+
         return response
@@ -1,11 +1,230 @@
 # backend/pagination.py
-from rest_framework.pagination import PageNumberPagination
+import base64
+import binascii
+import json
+
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginación por cursor (keyset) sobre (fecha, id), de más reciente a más
+    antiguo. Si el queryset ya viene ordenado de forma ascendente por el campo
+    de fecha (colas de trabajo como `pendientes`), se conserva ese orden.
+
+    Cada página filtra `(fecha, id) < cursor` en lugar de usar OFFSET, así el
+    costo no crece con la profundidad, no se ejecuta COUNT(*) y los registros
+    insertados mientras se recorre no desplazan las páginas siguientes.
+
+    El campo de fecha es `fecha_creacion`, o el que indique `campo_cursor`
+    en la vista.
+    """
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    cursor_query_param = 'cursor'
+    campo_fecha = 'fecha_creacion'
+    invalid_cursor_message = 'Cursor inválido'
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                return _positive_int(
+                    request.query_params[self.page_size_query_param],
+                    strict=True,
+                    cutoff=self.max_page_size
+                )
+            except (KeyError, ValueError):
+                pass
+        return self.page_size
+
+    def get_campo(self, view):
+        return getattr(view, 'campo_cursor', self.campo_fecha)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            fecha, pk = base64.urlsafe_b64decode(encoded.encode('ascii')).decode('ascii').split('|')
+            fecha = parse_datetime(fecha)
+            pk = int(pk)
+        except (TypeError, ValueError, UnicodeError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+        if fecha is None:
+            raise NotFound(self.invalid_cursor_message)
+        return fecha, pk
+
+    def encode_cursor(self, instancia):
+        valor = f"{getattr(instancia, self.campo).isoformat()}|{instancia.pk}"
+        return base64.urlsafe_b64encode(valor.encode('ascii')).decode('ascii')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.campo = self.get_campo(view)
+        page_size = self.get_page_size(request)
+
+        orden = queryset.query.order_by
+        ascendente = bool(orden) and orden[0] == self.campo
+        if ascendente:
+            queryset = queryset.order_by(self.campo, 'pk')
+        else:
+            queryset = queryset.order_by(f'-{self.campo}', '-pk')
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            fecha, pk = cursor
+            sentido = 'gt' if ascendente else 'lt'
+            queryset = queryset.filter(
+                Q(**{f'{self.campo}__{sentido}': fecha}) | Q(**{self.campo: fecha, f'pk__{sentido}': pk})
+            )
+
+        # Se pide una fila extra para saber si hay página siguiente sin contar
+        filas = list(queryset[:page_size + 1])
+        self.has_next = len(filas) > page_size
+        self.page = filas[:page_size]
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
 
 
 class CustomPageNumberPagination(PageNumberPagination):
     """
-    Paginación personalizada que permite al cliente especificar el tamaño de página
+    Paginación personalizada que permite al cliente especificar el tamaño de página.
+
+    Con `?paginacion=cursor` (o al enviar `cursor`) usa KeysetPagination en los
+    modelos que tienen el campo de fecha del cursor.
     """
     page_size = 10  # Tamaño por defecto
     page_size_query_param = 'page_size'  # Permite ?page_size=10000
     max_page_size = 10000  # Máximo permitido (10,000 registros)
+    modo_query_param = 'paginacion'
+
+    def _usar_cursor(self, queryset, request, view):
+        if request.query_params.get(self.modo_query_param) != 'cursor' \
+                and KeysetPagination.cursor_query_param not in request.query_params:
+            return False
+        campo = KeysetPagination().get_campo(view)
+        return any(field.name == campo for field in queryset.model._meta.concrete_fields)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self._usar_cursor(queryset, request, view):
+            self.keyset = KeysetPagination()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+def respuesta_json_streaming(queryset, serializar, chunk_size=500, clave=None, extra=None):
+    """
+    Serializa `queryset` completo como JSON sin cargarlo entero en memoria.
+
+    Las filas se leen con `iterator(chunk_size=...)` y se serializan por
+    lotes con `serializar(objetos) -> list`. Sin `clave` se emite un arreglo;
+    con `clave` se emite un objeto con `extra` y la lista bajo esa clave.
+    """
+    def volcar(lote):
+        return ', '.join(json.dumps(item, cls=JSONEncoder) for item in serializar(lote))
+
+    def generar():
+        if clave is None:
+            yield '['
+        else:
+            cabecera = {**(extra or {}), clave: []}
+            yield json.dumps(cabecera, cls=JSONEncoder)[:-len('[]}')] + '['
+
+        escrito = False
+        lote = []
+        for objeto in queryset.iterator(chunk_size=chunk_size):
+            lote.append(objeto)
+            if len(lote) >= chunk_size:
+                yield (', ' if escrito else '') + volcar(lote)
+                escrito = True
+                lote = []
+        if lote:
+            yield (', ' if escrito else '') + volcar(lote)
+
+        yield ']' if clave is None else ']}'
+
+    return StreamingHttpResponse(generar(), content_type='application/json')
+
+
+class ListadoPaginadoMixin:
+    """
+    Mixin para ViewSets con acciones de listado propias (`mis_pedidos`, ...).
+
+    `listar()` pasa el queryset por el paginador configurado, o lo transmite
+    completo con `respuesta_json_streaming` si la petición incluye `?stream=true`.
+    """
+    stream_query_param = 'stream'
+    stream_chunk_size = 500
+
+    def quiere_stream(self):
+        return self.request.query_params.get(self.stream_query_param, '').lower() in ('1', 'true')
+
+    def listar(self, queryset, serializer_class=None, serializar=None, clave='results', **extra):
+        """
+        Responde con una página de `queryset`.
+
+        - `serializer_class`: serializer a usar en lugar de `get_serializer_class()`.
+        - `serializar`: callable que recibe los objetos y retorna la lista ya serializada.
+        - `clave`: nombre de la lista en la respuesta (por defecto `results`).
+        - `extra`: campos adicionales de la respuesta (totales, fecha, ...).
+        """
+        if serializar is None:
+            serializer_class = serializer_class or self.get_serializer_class()
+            contexto = self.get_serializer_context()
+
+            def serializar(objetos):
+                return serializer_class(objetos, many=True, context=contexto).data
+
+        if self.quiere_stream():
+            return respuesta_json_streaming(
+                queryset, serializar,
+                chunk_size=self.stream_chunk_size,
+                clave=clave if extra or clave != 'results' else None,
+                extra=extra,
+            )
+
+        pagina = self.paginate_queryset(queryset)
+        if pagina is None:
+            datos = serializar(queryset)
+            return Response({**extra, clave: datos} if extra or clave != 'results' else datos)
+
+        response = self.get_paginated_response(serializar(pagina))
+        if extra or clave != 'results':
+            datos = dict(response.data)
+            datos[clave] = datos.pop('results')
+            response.data = {**extra, **datos}
+        return response
@@ -0,0 +1,103 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+_SIN_VALOR = object()
+
+PREFIJO = "v1"
+LONGITUD_MAXIMA_CLAVE = 200
+
+
+def _clave_tag(tag):
+    return f"tag:{tag}"
+
+
+def versiones_tags(tags):
+    """
+    Retorna la versión vigente de cada tag. Los tags sin versión reciben una
+    nueva (basada en el reloj), así nunca coinciden con claves viejas.
+    """
+    tags = list(tags)
+    if not tags:
+        return []
+    claves = [_clave_tag(tag) for tag in tags]
+    encontradas = cache.get_many(claves)
+    faltantes = {clave: time.time_ns() for clave in claves if clave not in encontradas}
+    for clave, version in faltantes.items():
+        # add() no pisa la versión si otro proceso la creó primero
+        if not cache.add(clave, version, None):
+            faltantes[clave] = cache.get(clave, version)
+    encontradas.update(faltantes)
+    return [encontradas[clave] for clave in claves]
+
+
+def construir_clave(clave, tags=()):
+    """
+    Arma la clave final: prefijo + clave + versión de cada tag.
+    Invalidar un tag cambia su versión y vuelve inalcanzables las claves anteriores.
+    """
+    tags = sorted(set(tags))
+    versiones = ".".join(str(version) for version in versiones_tags(tags))
+    final = f"{PREFIJO}:{clave}:{versiones}" if versiones else f"{PREFIJO}:{clave}"
+    if len(final) > LONGITUD_MAXIMA_CLAVE:
+        final = f"{PREFIJO}:h:{hashlib.md5(final.encode('utf-8')).hexdigest()}"
+    return final
+
+
+def get_or_set(clave, calcular, timeout=None, tags=()):
+    """
+    Retorna el valor cacheado de `clave` o lo calcula con `calcular()` y lo guarda.
+    `timeout=None` usa el TIMEOUT configurado en CACHES.
+    """
+    clave_final = construir_clave(clave, tags)
+    valor = cache.get(clave_final, _SIN_VALOR)
+    if valor is _SIN_VALOR:
+        valor = calcular()
+        if timeout is None:
+            cache.set(clave_final, valor)
+        else:
+            cache.set(clave_final, valor, timeout)
+    return valor
+
+
+def incrementar(clave, timeout=None):
+    """
+    Incrementa atómicamente el contador `clave` (creándolo en 0 si no existe)
+    y retorna el nuevo valor. `timeout` solo aplica al crearlo.
+    """
+    cache.add(clave, 0, timeout)
+    try:
+        return cache.incr(clave)
+    except ValueError:
+        # La clave expiró entre add() e incr()
+        cache.add(clave, 1, timeout)
+        return 1
+
+
+def invalidar_tags(*tags):
+    """Invalida todas las claves asociadas a los tags dados."""
+    if tags:
+        cache.set_many({_clave_tag(tag): time.time_ns() for tag in tags}, None)
+
+
+def invalidar_tags_al_confirmar(*tags):
+    """
+    Invalida `tags` de inmediato y otra vez al confirmar la transacción, para
+    que un lector concurrente no deje en cache datos previos al commit.
+    """
+    invalidar_tags(*tags)
+    transaction.on_commit(lambda: invalidar_tags(*tags))
+
+
+def invalidar_al_guardar(model, *tags):
+    """Conecta post_save/post_delete de `model` para invalidar `tags`."""
+    def _invalidar(**kwargs):
+        invalidar_tags_al_confirmar(*tags)
+
+    uid = f"cache:{model._meta.label_lower}:{','.join(tags)}"
+    post_save.connect(_invalidar, sender=model, weak=False, dispatch_uid=uid)
+    post_delete.connect(_invalidar, sender=model, weak=False, dispatch_uid=uid)
+    return _invalidar
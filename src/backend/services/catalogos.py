@@ -0,0 +1,102 @@
+import copy
+import threading
+import time
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from backend.services.cache import get_or_set, invalidar_tags
+
+
+class CatalogoCache:
+    """
+    Cache de dos niveles para tablas de referencia (métodos de pago, estados, tipos...).
+
+    - Nivel local: dict en memoria del proceso, con expiración corta.
+    - Nivel compartido: backend de cache de Django, con claves versionadas por tag.
+
+    Las búsquedas se hacen por id o por nombre normalizado. Al guardar o
+    eliminar una fila (post_save/post_delete) se descarta el nivel local y se
+    cambia la versión compartida, de modo que los demás procesos dejan de ver
+    valores viejos en cuanto expira su nivel local.
+    """
+
+    TIMEOUT = 60 * 60
+    TIMEOUT_LOCAL = 60
+
+    _instancias = []
+
+    def __init__(self, model, campo_nombre="nombre"):
+        self.model = model
+        self.campo_nombre = campo_nombre
+        self._prefijo = f"catalogo:{model._meta.label_lower}"
+        self._local = {}
+        self._lock = threading.Lock()
+        CatalogoCache._instancias.append(self)
+
+    @staticmethod
+    def normalizar(nombre):
+        return str(nombre).strip().lower()
+
+    def _obtener(self, tipo, valor, cargar):
+        clave = f"{tipo}:{valor}"
+        ahora = time.monotonic()
+
+        entrada = self._local.get(clave)
+        if entrada is not None and entrada[0] > ahora:
+            return copy.copy(entrada[1])
+
+        instancia = get_or_set(
+            f"{self._prefijo}:{clave}", cargar, self.TIMEOUT, tags=[self._prefijo]
+        )
+
+        with self._lock:
+            self._local[clave] = (ahora + self.TIMEOUT_LOCAL, instancia)
+        return copy.copy(instancia)
+
+    def por_id(self, pk):
+        """Retorna la fila con `pk`; lanza `model.DoesNotExist` si no existe."""
+        return self._obtener("id", int(pk), lambda: self.model.objects.get(pk=pk))
+
+    def por_nombre(self, nombre):
+        """Busca por nombre sin distinguir mayúsculas; lanza `model.DoesNotExist` si no existe."""
+        nombre = self.normalizar(nombre)
+        return self._obtener(
+            "nombre",
+            nombre,
+            lambda: self.model.objects.get(**{f"{self.campo_nombre}__iexact": nombre}),
+        )
+
+    def obtener_o_crear(self, nombre, defaults=None):
+        """Equivalente cacheado de `get_or_create(nombre=...)`."""
+        try:
+            return self.por_nombre(nombre)
+        except self.model.DoesNotExist:
+            instancia, _ = self.model.objects.get_or_create(
+                defaults=defaults, **{self.campo_nombre: nombre}
+            )
+            return instancia
+
+    def invalidar(self, **kwargs):
+        with self._lock:
+            self._local.clear()
+        invalidar_tags(self._prefijo)
+
+    def _invalidar_al_confirmar(self, **kwargs):
+        # Se invalida de inmediato y de nuevo al confirmar la transacción, para
+        # que ningún lector concurrente deje en cache el valor anterior.
+        self.invalidar()
+        transaction.on_commit(self.invalidar)
+
+    def conectar(self):
+        """Registra la invalidación en post_save/post_delete del modelo."""
+        uid = f"{self._prefijo}:invalidar"
+        post_save.connect(self._invalidar_al_confirmar, sender=self.model, weak=False, dispatch_uid=uid)
+        post_delete.connect(self._invalidar_al_confirmar, sender=self.model, weak=False, dispatch_uid=uid)
+
+    @classmethod
+    def limpiar_todo(cls):
+        """Vacía el nivel local de todos los catálogos (útil en tests)."""
+        for instancia in cls._instancias:
+            with instancia._lock:
+                instancia._local.clear()
@@ -0,0 +1,243 @@
+import logging
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+
+def serializar(mensaje):
+    """EmailMessage -> dict apto para JSON (argumento de la tarea de Celery)."""
+    return {
+        "subject": mensaje.subject,
+        "body": mensaje.body,
+        "from_email": mensaje.from_email,
+        "to": list(mensaje.to),
+        "cc": list(mensaje.cc),
+        "bcc": list(mensaje.bcc),
+        "reply_to": list(mensaje.reply_to),
+        "alternatives": [list(alternativa) for alternativa in getattr(mensaje, "alternatives", [])],
+    }
+
+
+def deserializar(datos):
+    mensaje = EmailMultiAlternatives(
+        subject=datos["subject"],
+        body=datos["body"],
+        from_email=datos.get("from_email"),
+        to=datos.get("to"),
+        cc=datos.get("cc"),
+        bcc=datos.get("bcc"),
+        reply_to=datos.get("reply_to"),
+    )
+    for contenido, tipo in datos.get("alternatives", []):
+        mensaje.attach_alternative(contenido, tipo)
+    return mensaje
+
+
+class EnvioIncompleto(Exception):
+    """Falló el envío de un lote después de enviar los primeros `enviados` correos."""
+
+    def __init__(self, enviados, error):
+        super().__init__(str(error))
+        self.enviados = enviados
+
+
+class ConexionCorreo:
+    """
+    Conexión SMTP reutilizada por proceso (worker de Celery o hilo de la cola
+    local): se abre una vez y se envían los lotes con `send_messages`, en vez
+    de un handshake SMTP por correo. Se recicla tras CORREO_CONEXION_SEGUNDOS
+    o cuando falla un envío.
+    """
+
+    _conexion = None
+    _backend = None
+    _abierta_desde = 0.0
+    _lock = threading.Lock()
+
+    @classmethod
+    def _obtener(cls):
+        vencida = time.monotonic() - cls._abierta_desde > getattr(settings, "CORREO_CONEXION_SEGUNDOS", 60)
+        if cls._conexion is None or cls._backend != settings.EMAIL_BACKEND or vencida:
+            cls._cerrar()
+            conexion = get_connection(fail_silently=False)
+            # Abierta aquí para que send_messages no la cierre al terminar
+            conexion.open()
+            cls._conexion, cls._backend, cls._abierta_desde = conexion, settings.EMAIL_BACKEND, time.monotonic()
+        return cls._conexion
+
+    @classmethod
+    def _cerrar(cls):
+        if cls._conexion is not None:
+            try:
+                cls._conexion.close()
+            except Exception:
+                pass
+        cls._conexion = cls._backend = None
+
+    @classmethod
+    def cerrar(cls):
+        with cls._lock:
+            cls._cerrar()
+
+    @classmethod
+    def enviar(cls, mensajes):
+        """
+        Envía un lote de dicts serializados por la misma conexión. Retorna la
+        cantidad enviada; si uno falla lanza EnvioIncompleto con los enviados
+        hasta ahí, para reintentar solo el resto.
+        """
+        with cls._lock:
+            conexion = cls._obtener()
+            for indice, datos in enumerate(mensajes):
+                try:
+                    conexion.send_messages([deserializar(datos)])
+                except Exception as e:
+                    cls._cerrar()
+                    raise EnvioIncompleto(indice, e) from e
+            return len(mensajes)
+
+
+def espera_reintento(intento):
+    """Backoff exponencial: CORREO_ESPERA_BASE * 2^intento segundos."""
+    return getattr(settings, "CORREO_ESPERA_BASE", 2) * (2 ** intento)
+
+
+class ColaCorreo:
+    """
+    Cola en memoria del proceso, para cuando no hay broker de Celery.
+
+    Un hilo daemon toma los correos pendientes en lotes de hasta CORREO_LOTE,
+    los envía por la conexión de ConexionCorreo y reintenta el lote con
+    backoff hasta CORREO_REINTENTOS veces. Los correos pendientes se pierden
+    si el proceso termina: en producción conviene CORREO_COLA=celery.
+    """
+
+    _cola = queue.Queue()
+    _hilo = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def encolar(cls, mensajes):
+        for datos in mensajes:
+            cls._cola.put(datos)
+        with cls._lock:
+            if cls._hilo is None or not cls._hilo.is_alive():
+                cls._hilo = threading.Thread(target=cls._procesar, name="cola-correo", daemon=True)
+                cls._hilo.start()
+
+    @classmethod
+    def _procesar(cls):
+        while True:
+            lote = [cls._cola.get()]
+            while len(lote) < getattr(settings, "CORREO_LOTE", 50):
+                try:
+                    lote.append(cls._cola.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                cls._enviar_con_reintentos(lote)
+            finally:
+                for _ in lote:
+                    cls._cola.task_done()
+
+    @staticmethod
+    def _enviar_con_reintentos(lote):
+        reintentos = getattr(settings, "CORREO_REINTENTOS", 3)
+        for intento in range(reintentos + 1):
+            try:
+                ConexionCorreo.enviar(lote)
+                return
+            except Exception as e:
+                if isinstance(e, EnvioIncompleto):
+                    lote = lote[e.enviados:]
+                if intento == reintentos:
+                    logger.error("No se pudieron enviar %s correos: %s", len(lote), e)
+                    return
+                time.sleep(espera_reintento(intento))
+
+    @classmethod
+    def esperar(cls, timeout=5):
+        """Espera a que la cola se vacíe. Retorna False si vence el timeout."""
+        fin = time.monotonic() + timeout
+        with cls._cola.all_tasks_done:
+            while cls._cola.unfinished_tasks:
+                restante = fin - time.monotonic()
+                if restante <= 0:
+                    return False
+                cls._cola.all_tasks_done.wait(restante)
+        return True
+
+
+def _despachar(mensajes):
+    if getattr(settings, "CORREO_COLA", "local") == "celery":
+        from apps.usuarios.tasks import enviar_correos_task
+        tamano = getattr(settings, "CORREO_LOTE", 50)
+        for inicio in range(0, len(mensajes), tamano):
+            try:
+                # Sin reintentos de publicación: si el broker no responde, cola local
+                enviar_correos_task.apply_async(args=[mensajes[inicio:inicio + tamano]], retry=False)
+            except Exception as e:
+                logger.warning("Broker de Celery no disponible, se usa la cola local: %s", e)
+                mensajes = mensajes[inicio:]
+                break
+        else:
+            return
+    ColaCorreo.encolar(mensajes)
+
+
+class LoteCorreo:
+    """
+    Agrupa los correos confirmados dentro de `agrupar()` (CorreoMiddleware lo
+    abre por petición) y los publica juntos al salir: una tarea de Celery por
+    cada CORREO_LOTE correos en vez de una por correo. Fuera de `agrupar()`
+    cada correo se publica al confirmarse su transacción.
+    """
+
+    _local = threading.local()
+
+    @classmethod
+    @contextmanager
+    def agrupar(cls):
+        if getattr(cls._local, "pendientes", None) is not None:
+            yield
+            return
+        cls._local.pendientes = []
+        try:
+            yield
+        finally:
+            pendientes, cls._local.pendientes = cls._local.pendientes, None
+            if pendientes:
+                _despachar(pendientes)
+
+    @classmethod
+    def agregar(cls, datos):
+        pendientes = getattr(cls._local, "pendientes", None)
+        if pendientes is None:
+            _despachar([datos])
+        else:
+            pendientes.append(datos)
+
+
+def encolar_correo(mensaje):
+    """
+    Encola un EmailMessage para enviarlo fuera de la petición, una vez
+    confirmada la transacción en curso. Nunca bloquea ni falla por el
+    servidor SMTP.
+    """
+    datos = serializar(mensaje)
+    transaction.on_commit(lambda: LoteCorreo.agregar(datos))
+
+
+def enviar_correo(asunto, mensaje, destinatarios, html=None, from_email=None):
+    """Atajo equivalente a send_mail, pero encolado."""
+    correo = EmailMultiAlternatives(asunto, mensaje, from_email or settings.DEFAULT_FROM_EMAIL, destinatarios)
+    if html:
+        correo.attach_alternative(html, "text/html")
+    encolar_correo(correo)
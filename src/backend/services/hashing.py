@@ -0,0 +1,144 @@
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from src.services.observability import MetricsCollector
+
+
+class HashSaturado(APIException):
+    """No hay cupo para calcular el hash: se rechaza de inmediato en lugar de encolar."""
+
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "El servicio de autenticación está saturado. Intente nuevamente en unos segundos."
+    default_code = "hash_saturado"
+    wait = 1
+
+
+# --- Funciones que se ejecutan en los procesos del pool ---
+
+def _verificar(raw_password, encoded):
+    if not hashers.check_password(raw_password, encoded):
+        return False, False
+    return True, hashers.identify_hasher(encoded).must_update(encoded)
+
+
+def _generar(raw_password):
+    return hashers.make_password(raw_password)
+
+
+def _preparar(raw_password, hashes):
+    """Índice del primer hash que coincide (o None) y el hash nuevo de la contraseña."""
+    coincidencia = next(
+        (indice for indice, encoded in enumerate(hashes) if hashers.check_password(raw_password, encoded)),
+        None,
+    )
+    return coincidencia, hashers.make_password(raw_password)
+
+
+class EjecutorHash:
+    """
+    Pool de procesos para PBKDF2, separado de los hilos que atienden peticiones.
+
+    El pool es por proceso web y se crea en el primer uso (después del fork de
+    gunicorn). Admite HASH_WORKERS hashes en curso más HASH_COLA_MAXIMA en
+    espera; si no hay cupo tras HASH_ESPERA_SEGUNDOS se lanza HashSaturado
+    (503), así una ráfaga de logins no ocupa todos los hilos del worker.
+    HASH_WORKERS=0 calcula el hash en el hilo de la petición.
+    """
+
+    _ejecutor = None
+    _cupos = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def workers():
+        return getattr(settings, "HASH_WORKERS", 1)
+
+    @classmethod
+    def _obtener(cls):
+        with cls._lock:
+            if cls._ejecutor is None:
+                cls._ejecutor = ProcessPoolExecutor(max_workers=cls.workers())
+                cls._cupos = threading.BoundedSemaphore(
+                    cls.workers() + getattr(settings, "HASH_COLA_MAXIMA", 2)
+                )
+            return cls._ejecutor, cls._cupos
+
+    @classmethod
+    def cerrar(cls):
+        with cls._lock:
+            if cls._ejecutor is not None:
+                cls._ejecutor.shutdown(wait=False, cancel_futures=True)
+            cls._ejecutor = cls._cupos = None
+
+    @classmethod
+    def ejecutar(cls, operacion, funcion, *args):
+        if cls.workers() <= 0:
+            return cls._medir(operacion, funcion, *args)
+
+        ejecutor, cupos = cls._obtener()
+        if not cupos.acquire(timeout=getattr(settings, "HASH_ESPERA_SEGUNDOS", 0.5)):
+            MetricsCollector.record_hash(operacion, 0, saturado=True)
+            raise HashSaturado()
+        try:
+            return cls._medir(operacion, lambda: ejecutor.submit(funcion, *args).result())
+        except BrokenProcessPool:
+            # Un proceso del pool murió: se recrea en el próximo uso
+            cls.cerrar()
+            return cls._medir(operacion, funcion, *args)
+        finally:
+            cupos.release()
+
+    @staticmethod
+    def _medir(operacion, funcion, *args):
+        inicio = time.perf_counter()
+        try:
+            return funcion(*args)
+        finally:
+            MetricsCollector.record_hash(operacion, time.perf_counter() - inicio)
+
+
+def verificar_password(raw_password, encoded):
+    """Retorna (válida, requiere_actualizar_hash)."""
+    if raw_password is None or not encoded:
+        return False, False
+    return EjecutorHash.ejecutar("verificar", _verificar, raw_password, encoded)
+
+
+def generar_hash(raw_password):
+    if raw_password is None:
+        return hashers.make_password(None)
+    return EjecutorHash.ejecutar("generar", _generar, raw_password)
+
+
+def preparar_password(raw_password, hashes):
+    """
+    Compara `raw_password` contra `hashes` y calcula su hash nuevo en una sola
+    tarea del pool. Retorna (índice de la primera coincidencia o None, hash).
+    """
+    return EjecutorHash.ejecutar("preparar", _preparar, raw_password, list(hashes))
+
+
+def generar_hashes(passwords, procesos=None):
+    """
+    Hashea una lista de contraseñas en paralelo para importaciones masivas
+    (comando importar_usuarios). Usa su propio pool (`procesos`, por defecto
+    uno por núcleo): no debe llamarse desde un proceso web, que usa EjecutorHash.
+    """
+    passwords = list(passwords)
+    procesos = procesos or os.cpu_count() or 1
+    if procesos <= 1 or len(passwords) <= 1:
+        return [_generar(password) for password in passwords]
+
+    inicio = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=min(procesos, len(passwords))) as ejecutor:
+        hashes = list(ejecutor.map(_generar, passwords, chunksize=max(1, len(passwords) // (procesos * 4))))
+    MetricsCollector.record_hash("generar_lote", time.perf_counter() - inicio)
+    return hashes
@@ -0,0 +1,119 @@
+import hashlib
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from backend.services.cache import incrementar
+
+# Valores por defecto; LIMITES_INTENTOS en settings los sobrescribe por acción
+LIMITES_POR_DEFECTO = {
+    "login": {"limite": 5, "ventana": 60, "bloqueo_intentos": 10, "bloqueo_segundos": 900},
+    "forgot_password": {"limite": 3, "ventana": 300},
+    "reactivar_cuenta": {"limite": 5, "ventana": 300, "bloqueo_intentos": 10, "bloqueo_segundos": 900},
+}
+
+
+class LimiteIntentos:
+    """
+    Límite de intentos compartido entre workers, guardado en la cache.
+
+    - `consumir()` cuenta el intento por IP y por email en una ventana
+      deslizante (bloque actual + parte proporcional del anterior) con
+      incrementos atómicos, antes de ejecutar trabajo costoso como verificar
+      un hash de contraseña.
+    - `registrar_fallo()` acumula credenciales incorrectas por email y, al
+      llegar a `bloqueo_intentos`, bloquea ese email por `bloqueo_segundos`.
+      `reiniciar()` limpia los fallos tras un ingreso correcto.
+
+    Requiere una cache compartida (Redis) para que el límite sea global; con
+    la cache en memoria cada proceso cuenta por separado.
+    """
+
+    PREFIJO = "limite"
+
+    def __init__(self, accion, limite, ventana, bloqueo_intentos=None, bloqueo_segundos=None):
+        self.accion = accion
+        self.limite = limite
+        self.ventana = ventana
+        self.bloqueo_intentos = bloqueo_intentos
+        self.bloqueo_segundos = bloqueo_segundos
+
+    @classmethod
+    def para(cls, accion):
+        """Construye el límite de `accion` según LIMITES_INTENTOS."""
+        config = {**LIMITES_POR_DEFECTO.get(accion, {})}
+        config.update(getattr(settings, "LIMITES_INTENTOS", {}).get(accion, {}))
+        return cls(accion, **config)
+
+    @staticmethod
+    def _hash_email(email):
+        return hashlib.md5(str(email).strip().lower().encode("utf-8")).hexdigest()
+
+    @classmethod
+    def _identidades(cls, request, email=None):
+        identidades = []
+        ip = request.META.get("REMOTE_ADDR")
+        if ip:
+            identidades.append(("ip", ip))
+        if email:
+            identidades.append(("email", cls._hash_email(email)))
+        return identidades
+
+    def _clave(self, *partes):
+        return ":".join([self.PREFIJO, self.accion, *map(str, partes)])
+
+    def _clave_email(self, email, tipo):
+        return self._clave(tipo, self._hash_email(email))
+
+    def _espera(self, anterior, actual, transcurrido):
+        """Segundos hasta que el conteo estimado vuelva a quedar dentro del límite."""
+        if actual > self.limite or not anterior:
+            return self.ventana - transcurrido
+        # anterior * (1 - t / ventana) + actual <= limite
+        t = self.ventana * (1 - (self.limite - actual) / anterior)
+        return max(t - transcurrido, 0)
+
+    def consumir(self, request, email=None, ahora=None):
+        """
+        Registra un intento. Retorna 0 si está permitido, o los segundos a
+        esperar si la IP o el email superaron el límite o el email está bloqueado.
+        """
+        ahora = time.time() if ahora is None else ahora
+        esperas = []
+
+        if email and self.bloqueo_intentos:
+            hasta = cache.get(self._clave_email(email, "bloqueo"))
+            if hasta and hasta > ahora:
+                esperas.append(hasta - ahora)
+
+        bloque = int(ahora // self.ventana)
+        transcurrido = ahora - bloque * self.ventana
+        for tipo, valor in self._identidades(request, email):
+            actual = incrementar(self._clave(tipo, valor, bloque), self.ventana * 2)
+            anterior = cache.get(self._clave(tipo, valor, bloque - 1), 0)
+            estimado = anterior * (1 - transcurrido / self.ventana) + actual
+            if estimado > self.limite:
+                esperas.append(self._espera(anterior, actual, transcurrido))
+
+        if not esperas:
+            return 0
+        return max(1, math.ceil(max(esperas)))
+
+    def registrar_fallo(self, email, ahora=None):
+        """Cuenta un fallo de credenciales y bloquea el email al superar el umbral."""
+        if not email or not self.bloqueo_intentos:
+            return False
+        fallos = incrementar(self._clave_email(email, "fallos"), self.bloqueo_segundos)
+        if fallos < self.bloqueo_intentos:
+            return False
+        ahora = time.time() if ahora is None else ahora
+        cache.set(self._clave_email(email, "bloqueo"), ahora + self.bloqueo_segundos, self.bloqueo_segundos)
+        cache.delete(self._clave_email(email, "fallos"))
+        return True
+
+    def reiniciar(self, email):
+        """Descarta los fallos acumulados del email (ingreso correcto)."""
+        if email and self.bloqueo_intentos:
+            cache.delete(self._clave_email(email, "fallos"))
@@ -1,3 +1,4 @@
+import logging
 import os
 from celery.schedules import crontab
 import sys
@@ -77,6 +78,7 @@ if not DEBUG:
 MIDDLEWARE.extend([
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "middleware.correo.CorreoMiddleware",
     "middleware.user_middleware.ActiveUserMiddleware",
     "middleware.observability.ObservabilityMiddleware", # Observability
     "django.contrib.messages.middleware.MessageMiddleware",
@@ -189,7 +191,7 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # REST Framework
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "apps.usuarios.authentication.JWTUsuarioAuthentication",
     ),
     "DEFAULT_PAGINATION_CLASS": "pagination.CustomPageNumberPagination",
     "PAGE_SIZE": 10,
@@ -201,6 +203,28 @@ SIMPLE_JWT = {
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
     "ALGORITHM": "HS256",
     "SIGNING_KEY": SECRET_KEY,
+    "TOKEN_REFRESH_SERIALIZER": "apps.usuarios.authentication.TokenRefreshUsuarioSerializer",
+}
+
+# Contraseñas recientes que no se pueden reutilizar (y que se conservan en el historial)
+PASSWORD_HISTORY_DEPTH = int(os.getenv("PASSWORD_HISTORY_DEPTH", 5))
+
+# Pool de procesos para hashear contraseñas (services/hashing.py), uno por
+# proceso web: con gunicorn hay workers × HASH_WORKERS procesos de hash.
+# Sin cupo tras HASH_ESPERA_SEGUNDOS se responde 503. HASH_WORKERS=0 lo desactiva.
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", 1))
+HASH_COLA_MAXIMA = int(os.getenv("HASH_COLA_MAXIMA", 2))
+HASH_ESPERA_SEGUNDOS = float(os.getenv("HASH_ESPERA_SEGUNDOS", 0.5))
+
+# Límites de intentos por IP/email (services/limites.py). Las acciones no
+# listadas aquí usan los valores por defecto de LIMITES_POR_DEFECTO.
+LIMITES_INTENTOS = {
+    "login": {
+        "limite": int(os.getenv("LOGIN_LIMITE_INTENTOS", 5)),
+        "ventana": int(os.getenv("LOGIN_VENTANA_SEGUNDOS", 60)),
+        "bloqueo_intentos": int(os.getenv("LOGIN_BLOQUEO_INTENTOS", 10)),
+        "bloqueo_segundos": int(os.getenv("LOGIN_BLOQUEO_SEGUNDOS", 900)),
+    },
 }
 
 # Celery Configuration
@@ -211,6 +235,110 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
 
+# Actividad de usuarios (ActiveUserMiddleware)
+# Cada usuario se registra como máximo una vez por ventana y se vuelca en lote.
+ACTIVIDAD_VENTANA_SEGUNDOS = int(os.getenv("ACTIVIDAD_VENTANA_SEGUNDOS", 60))
+ACTIVIDAD_VENTANA_ACTIVOS_SEGUNDOS = int(os.getenv("ACTIVIDAD_VENTANA_ACTIVOS_SEGUNDOS", 300))
+
+# Recarga automática de stock (apps/productos/recargas.py)
+# Espera desde el primer producto bajo el mínimo hasta recargar el lote acumulado.
+RECARGA_ESPERA_SEGUNDOS = int(os.getenv("RECARGA_ESPERA_SEGUNDOS", 30))
+# Retención de HistorialRecarga: lo anterior se archiva en .jsonl.gz por mes y
+# se borra de la tabla. Desactivado por defecto; HISTORIAL_RECARGAS_DIR debe ser
+# un disco persistente (no el directorio de la app, que se pierde al redesplegar).
+HISTORIAL_RECARGAS_ARCHIVAR = os.getenv("HISTORIAL_RECARGAS_ARCHIVAR", "False") == "True"
+HISTORIAL_RECARGAS_RETENCION_DIAS = int(os.getenv("HISTORIAL_RECARGAS_RETENCION_DIAS", 365))
+HISTORIAL_RECARGAS_DIR = os.getenv("HISTORIAL_RECARGAS_DIR", "")
+# Vigencia de las claves Idempotency-Key (ajustar_stock_masivo)
+IDEMPOTENCIA_HORAS = int(os.getenv("IDEMPOTENCIA_HORAS", 24))
+
+CELERY_BEAT_SCHEDULE = {
+    "volcar-actividad-usuarios": {
+        "task": "apps.usuarios.tasks.volcar_actividad_task",
+        "schedule": ACTIVIDAD_VENTANA_SEGUNDOS,
+    },
+    "reconciliar-estadisticas-usuarios": {
+        "task": "apps.usuarios.tasks.reconciliar_estadisticas_usuarios_task",
+        "schedule": 60 * 60 * 24,
+    },
+    "recargar-stock-automatico": {
+        "task": "apps.productos.tasks.recargar_stock_automatico_task",
+        "schedule": 60 * 60 * 24,
+    },
+    "purgar-idempotencia": {
+        "task": "apps.productos.tasks.purgar_idempotencia_task",
+        "schedule": 60 * 60 * 24,
+    },
+}
+if HISTORIAL_RECARGAS_ARCHIVAR:
+    CELERY_BEAT_SCHEDULE["archivar-historial-recargas"] = {
+        "task": "apps.productos.tasks.archivar_historial_recargas_task",
+        "schedule": 60 * 60 * 24,
+    }
+
+# Cache
+# Redis compartido entre workers: CACHE_URL, REDIS_URL o el broker de Celery si
+# es Redis. Sin Redis, cache en disco (CACHE_DIR, compartida solo entre los
+# procesos de un mismo nodo) o en memoria de cada proceso (desarrollo y tests).
+_BROKER_REDIS = os.getenv("CELERY_BROKER_URL", "")
+if not _BROKER_REDIS.startswith(("redis://", "rediss://")):
+    _BROKER_REDIS = ""
+CACHE_URL = os.getenv("CACHE_URL") or os.getenv("REDIS_URL") or _BROKER_REDIS
+CACHE_DIR = os.getenv("CACHE_DIR", "")
+CACHE_DEFAULT_TIMEOUT = int(os.getenv("CACHE_DEFAULT_TIMEOUT", 300))
+# Tope de claves de las caches de respaldo (disco y memoria)
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", 10000))
+
+try:
+    import redis  # noqa: F401
+    HAS_REDIS = True
+except ImportError:
+    HAS_REDIS = False
+
+if CACHE_URL and HAS_REDIS:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CACHE_URL,
+            "TIMEOUT": CACHE_DEFAULT_TIMEOUT,
+            "KEY_PREFIX": "prexcol",
+        }
+    }
+elif CACHE_DIR:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": CACHE_DIR,
+            "TIMEOUT": CACHE_DEFAULT_TIMEOUT,
+            "KEY_PREFIX": "prexcol",
+            "OPTIONS": {"MAX_ENTRIES": CACHE_MAX_ENTRIES},
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "prexcol",
+            "TIMEOUT": CACHE_DEFAULT_TIMEOUT,
+            "KEY_PREFIX": "prexcol",
+            "OPTIONS": {"MAX_ENTRIES": CACHE_MAX_ENTRIES},
+        }
+    }
+
+# Si la cache la ven todos los procesos web. Con cache por proceso, la
+# revocación de tokens, los límites de intentos y las colas en cache usan
+# sus alternativas locales (ver cada módulo).
+CACHE_COMPARTIDA = CACHES["default"]["BACKEND"] != "django.core.cache.backends.locmem.LocMemCache"
+if not CACHE_COMPARTIDA and not DEBUG:
+    logging.getLogger(__name__).warning(
+        "Sin cache compartida (CACHE_URL/REDIS_URL/CELERY_BROKER_URL de Redis o CACHE_DIR): "
+        "cada worker usa su propia cache en memoria."
+    )
+
+# Volcado de la actividad desde cada proceso web (RegistroActividad). Poner
+# False solo si Celery Beat ejecuta volcar_actividad_task con cache compartida.
+ACTIVIDAD_VOLCADO_LOCAL = os.getenv("ACTIVIDAD_VOLCADO_LOCAL", "True") == "True" or not CACHE_COMPARTIDA
+
 # CORS / CSRF
 CORS_ALLOW_CREDENTIALS = True
 CORS_ALLOWED_ORIGINS = os.getenv("CORS_ALLOWED_ORIGINS", "http://localhost:5175,http://127.0.0.1:5175,http://localhost:5174,http://127.0.0.1:5174").split(",")
@@ -228,6 +356,7 @@ CORS_ALLOW_HEADERS = [
     'authorization',
     'content-type',
     'dnt',
+    'idempotency-key',
     'origin',
     'user-agent',
     'x-csrftoken',
@@ -251,6 +380,19 @@ else:
     EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
     DEFAULT_FROM_EMAIL = "noreply@prexcol.local"
 
+# Cola de correos salientes (backend/services/correo.py)
+# "celery" publica en el broker (cola local si el broker no responde);
+# "local" usa un hilo del proceso web. Por defecto celery si hay broker configurado.
+CORREO_COLA = os.getenv(
+    "CORREO_COLA", "celery" if os.getenv("CELERY_BROKER_URL") or os.getenv("REDIS_URL") else "local"
+)
+CORREO_LOTE = int(os.getenv("CORREO_LOTE", 50))
+CORREO_REINTENTOS = int(os.getenv("CORREO_REINTENTOS", 3))
+CORREO_ESPERA_BASE = float(os.getenv("CORREO_ESPERA_BASE", 2))
+CORREO_CONEXION_SEGUNDOS = int(os.getenv("CORREO_CONEXION_SEGUNDOS", 60))
+# Timeout de SMTP para que una conexión colgada no bloquee la cola indefinidamente
+EMAIL_TIMEOUT = int(os.getenv("EMAIL_TIMEOUT", 10))
+
 FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:5175")
 
 # Media files (uploads)
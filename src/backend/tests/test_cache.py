@@ -0,0 +1,47 @@
+"""
+Tests para el helper de cache con claves versionadas por tag.
+"""
+from django.test import TestCase
+
+from backend.services.cache import construir_clave, get_or_set, invalidar_tags
+
+
+class CacheHelperTestCase(TestCase):
+    """Tests para get_or_set e invalidación por tags."""
+
+    def setUp(self):
+        self.llamadas = 0
+
+    def _calcular(self):
+        self.llamadas += 1
+        return {"valor": self.llamadas}
+
+    def test_get_or_set_calcula_una_vez(self):
+        """Test that the value is computed only on the first call"""
+        self.assertEqual(get_or_set("prueba", self._calcular, tags=("a",)), {"valor": 1})
+        self.assertEqual(get_or_set("prueba", self._calcular, tags=("a",)), {"valor": 1})
+        self.assertEqual(self.llamadas, 1)
+
+    def test_invalidar_tag_recalcula(self):
+        """Test that invalidating a tag forces recomputation"""
+        get_or_set("prueba", self._calcular, tags=("a", "b"))
+        invalidar_tags("b")
+        self.assertEqual(get_or_set("prueba", self._calcular, tags=("a", "b")), {"valor": 2})
+
+    def test_otros_tags_no_se_invalidan(self):
+        """Test that keys without the invalidated tag survive"""
+        get_or_set("prueba", self._calcular, tags=("a",))
+        invalidar_tags("b")
+        get_or_set("prueba", self._calcular, tags=("a",))
+        self.assertEqual(self.llamadas, 1)
+
+    def test_valores_falsy_se_cachean(self):
+        """Test that None and empty values are cached too"""
+        self.assertIsNone(get_or_set("vacio", lambda: None))
+        self.assertIsNone(get_or_set("vacio", self._calcular))
+        self.assertEqual(self.llamadas, 0)
+
+    def test_claves_largas_se_acortan(self):
+        """Test that long keys are hashed under the backend limit"""
+        clave = construir_clave("x" * 500, tags=("a",))
+        self.assertLessEqual(len(clave), 200)
@@ -0,0 +1,91 @@
+"""
+Tests de cantidad de consultas en los endpoints de listado (N+1).
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from backend.core.testing import ConsultasConstantesMixin
+from apps.productos.models import Tienda, Producto, Pedido, DetallePedido, Seccion
+from apps.ventas.models import Venta, DetalleVenta
+from apps.pagos.models import Pago, MetodoPago, EstadoPago, Transaccion
+from apps.notificaciones.models import Notificacion, TipoNotificacion, EstadoNotificacion
+
+Usuario = get_user_model()
+
+
+class ListadosSinNMas1TestCase(ConsultasConstantesMixin, APITestCase):
+    """Los listados deben usar un número fijo de consultas por página."""
+
+    CANTIDAD = 10
+
+    def setUp(self):
+        self.admin = Usuario.objects.create_user(
+            email='admin@test.com', nombre='Admin', password='admin123', rol='admin'
+        )
+        self.proveedor = Usuario.objects.create_user(
+            email='prov@test.com', nombre='Proveedor', password='prov123', rol='proveedor'
+        )
+        metodo = MetodoPago.objects.create(nombre='Efectivo')
+        estado_pago = EstadoPago.objects.create(nombre='Pendiente')
+        tipo = TipoNotificacion.objects.create(nombre='EMAIL')
+        estado_notificacion = EstadoNotificacion.objects.create(nombre='ENVIADA')
+        seccion = Seccion.objects.create(nombre='Seccion')
+
+        for i in range(self.CANTIDAD):
+            cliente = Usuario.objects.create_user(
+                email=f'cliente{i}@test.com', nombre=f'Cliente {i}', password='client123', rol='cliente'
+            )
+            tienda = Tienda.objects.create(
+                nombre=f'Tienda {i}', direccion='Calle 123', administrador=self.admin
+            )
+            producto = Producto.objects.create(
+                nombre=f'Producto {i}', descripcion='Desc', precio=Decimal('10.00'),
+                stock=100, tienda=tienda, proveedor=self.proveedor
+            )
+            seccion.productos.add(producto)
+            Seccion.objects.create(nombre=f'Seccion {i}').productos.add(producto)
+
+            pedido = Pedido.objects.create(cliente=cliente, tienda=tienda)
+            DetallePedido.objects.create(
+                pedido=pedido, producto=producto, cantidad=1, precio_unitario=Decimal('10.00')
+            )
+            venta = Venta.objects.create(pedido=pedido, cliente=cliente, total=Decimal('10.00'))
+            DetalleVenta.objects.create(
+                venta=venta, producto=producto, cantidad=1,
+                precio_unitario=Decimal('10.00'), subtotal=Decimal('10.00')
+            )
+            pago = Pago.objects.create(
+                usuario=cliente, pedido=pedido, monto=Decimal('10.00'),
+                estado=estado_pago, metodo_pago=metodo
+            )
+            Transaccion.objects.create(pago=pago, monto=Decimal('10.00'), estado='aprobado')
+            Notificacion.objects.create(
+                usuario=self.admin, tipo=tipo, estado=estado_notificacion,
+                mensaje='Hola', destino='admin@test.com'
+            )
+
+        self.client.force_authenticate(user=self.admin)
+
+    def test_listado_productos(self):
+        self.assertConsultasConstantes(reverse('producto-list'))
+
+    def test_listado_tiendas(self):
+        self.assertConsultasConstantes(reverse('tienda-list'))
+
+    def test_listado_secciones(self):
+        self.assertConsultasConstantes(reverse('seccion-list'))
+
+    def test_listado_pedidos(self):
+        self.assertConsultasConstantes(reverse('pedido-list'))
+
+    def test_listado_ventas(self):
+        self.assertConsultasConstantes(reverse('venta-list'))
+
+    def test_listado_pagos(self):
+        self.assertConsultasConstantes(reverse('pago-list'))
+
+    def test_listado_notificaciones(self):
+        self.assertConsultasConstantes(reverse('notificacion-list'))
@@ -0,0 +1,175 @@
+"""
+Tests para la cola de correos salientes.
+"""
+import threading
+from unittest import mock
+
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIRequestFactory, APITestCase, force_authenticate
+
+from apps.usuarios.models import Usuario
+from apps.usuarios.tasks import enviar_correos_task
+from apps.usuarios.views.view_account_management import self_deactivate_account
+from backend.services.correo import ColaCorreo, ConexionCorreo, LoteCorreo, enviar_correo, serializar
+
+liberar_smtp = threading.Event()
+
+
+class BackendLento(EmailBackend):
+    """Simula un servidor SMTP que no responde hasta que se libera."""
+
+    def send_messages(self, messages):
+        liberar_smtp.wait(5)
+        return super().send_messages(messages)
+
+
+class BackendInestable(EmailBackend):
+    """Falla en el primer envío y cuenta las conexiones abiertas."""
+
+    fallos = 1
+    aperturas = 0
+
+    def open(self):
+        BackendInestable.aperturas += 1
+        return True
+
+    def send_messages(self, messages):
+        if BackendInestable.fallos:
+            BackendInestable.fallos -= 1
+            raise OSError("SMTP no disponible")
+        return super().send_messages(messages)
+
+
+class BackendFallaUnaVez(EmailBackend):
+    """Falla una vez al enviar el correo con asunto "Falla"."""
+
+    fallos = 1
+
+    def send_messages(self, messages):
+        if BackendFallaUnaVez.fallos and messages[0].subject == "Falla":
+            BackendFallaUnaVez.fallos -= 1
+            raise OSError("SMTP no disponible")
+        return super().send_messages(messages)
+
+
+@override_settings(CORREO_COLA="local", CORREO_ESPERA_BASE=0)
+class ColaCorreoTestCase(TestCase):
+    """Tests para el envío en lote fuera de la petición."""
+
+    def setUp(self):
+        ConexionCorreo.cerrar()
+        BackendInestable.fallos, BackendInestable.aperturas = 1, 0
+
+    def tearDown(self):
+        ColaCorreo.esperar()
+        ConexionCorreo.cerrar()
+
+    def test_envia_despues_del_commit(self):
+        """Test that queued mail is sent only once the transaction commits"""
+        with self.captureOnCommitCallbacks() as callbacks:
+            enviar_correo("Asunto", "Cuerpo", ["a@test.com"], html="<p>Cuerpo</p>")
+        self.assertEqual(len(callbacks), 1)
+        self.assertTrue(ColaCorreo.esperar())
+        self.assertEqual(mail.outbox, [])
+
+        callbacks[0]()
+        self.assertTrue(ColaCorreo.esperar())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].alternatives[0][1], "text/html")
+
+    @override_settings(EMAIL_BACKEND=f"{__name__}.BackendInestable")
+    def test_reintenta_y_reutiliza_conexion(self):
+        """Test that a failed batch is retried and later batches reuse the connection"""
+        with self.captureOnCommitCallbacks(execute=True):
+            enviar_correo("Uno", "Cuerpo", ["a@test.com"])
+        self.assertTrue(ColaCorreo.esperar())
+        with self.captureOnCommitCallbacks(execute=True):
+            enviar_correo("Dos", "Cuerpo", ["b@test.com"])
+            enviar_correo("Tres", "Cuerpo", ["c@test.com"])
+        self.assertTrue(ColaCorreo.esperar())
+
+        self.assertEqual([m.subject for m in mail.outbox], ["Uno", "Dos", "Tres"])
+        # Una conexión descartada por el fallo y una reutilizada por el resto
+        self.assertEqual(BackendInestable.aperturas, 2)
+
+    @override_settings(CORREO_COLA="celery")
+    def test_sin_broker_usa_cola_local(self):
+        """Test that an unreachable broker falls back to the in-process queue"""
+        with mock.patch.object(enviar_correos_task, "apply_async", side_effect=OSError("sin broker")):
+            with self.captureOnCommitCallbacks(execute=True):
+                enviar_correo("Asunto", "Cuerpo", ["a@test.com"])
+        self.assertTrue(ColaCorreo.esperar())
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_tarea_celery_envia_lote(self):
+        """Test that the Celery task sends a serialized batch"""
+        from django.core.mail import EmailMessage
+        lote = [serializar(EmailMessage("Lote", "Cuerpo", "x@test.com", [f"{i}@test.com"])) for i in range(3)]
+        resultado = enviar_correos_task.apply(args=[lote]).get()
+        self.assertEqual(resultado, "Correos enviados: 3")
+        self.assertEqual(len(mail.outbox), 3)
+
+    @override_settings(EMAIL_BACKEND=f"{__name__}.BackendFallaUnaVez")
+    def test_tarea_celery_reintenta_solo_pendientes(self):
+        """Test that a retried batch does not resend the mail already delivered"""
+        from django.core.mail import EmailMessage
+        BackendFallaUnaVez.fallos = 1
+        lote = [serializar(EmailMessage(asunto, "Cuerpo", "x@test.com", ["a@test.com"])) for asunto in ("Uno", "Falla", "Tres")]
+        enviar_correos_task.apply(args=[lote])
+        self.assertEqual([m.subject for m in mail.outbox], ["Uno", "Falla", "Tres"])
+
+    @override_settings(CORREO_COLA="celery")
+    def test_lote_publica_una_tarea(self):
+        """Test that mail confirmed inside a grouped block is published as one task"""
+        with mock.patch.object(enviar_correos_task, "apply_async") as apply_async:
+            with LoteCorreo.agrupar():
+                with self.captureOnCommitCallbacks(execute=True):
+                    enviar_correo("Uno", "Cuerpo", ["a@test.com"])
+                    enviar_correo("Dos", "Cuerpo", ["b@test.com"])
+                apply_async.assert_not_called()
+        apply_async.assert_called_once()
+        self.assertEqual([m["subject"] for m in apply_async.call_args.kwargs["args"][0]], ["Uno", "Dos"])
+
+
+@override_settings(CORREO_COLA="local", EMAIL_BACKEND=f"{__name__}.BackendLento")
+class CorreoFueraDeLaPeticionTestCase(APITestCase):
+    """Tests para las vistas que envían correo."""
+
+    def setUp(self):
+        ConexionCorreo.cerrar()
+        liberar_smtp.clear()
+        Usuario.objects.create_user(email="user@test.com", nombre="User", password="user1234", rol="cliente")
+
+    def tearDown(self):
+        liberar_smtp.set()
+        ColaCorreo.esperar()
+        ConexionCorreo.cerrar()
+
+    def test_forgot_password_no_espera_smtp(self):
+        """Test that forgot_password responds while the SMTP server is still blocked"""
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("forgot-password"), {"email": "user@test.com"}, format="json"
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(mail.outbox, [])
+
+        liberar_smtp.set()
+        self.assertTrue(ColaCorreo.esperar())
+        self.assertEqual(mail.outbox[0].to, ["user@test.com"])
+
+    def test_self_deactivate_no_espera_smtp(self):
+        """Test that self deactivation responds while the SMTP server is still blocked"""
+        request = APIRequestFactory().post("/")
+        force_authenticate(request, user=Usuario.objects.get(email="user@test.com"))
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self_deactivate_account(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(mail.outbox, [])
+
+        liberar_smtp.set()
+        self.assertTrue(ColaCorreo.esperar())
+        self.assertIn("Desactivación", mail.outbox[0].subject)
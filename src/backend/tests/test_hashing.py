@@ -0,0 +1,70 @@
+"""
+Tests para el pool de procesos de hash de contraseñas.
+"""
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from apps.usuarios.models import Usuario
+from backend.services.hashing import EjecutorHash, HashSaturado, generar_hash, verificar_password
+from src.services.observability import MetricsCollector
+
+
+@override_settings(HASH_WORKERS=1, HASH_COLA_MAXIMA=0, HASH_ESPERA_SEGUNDOS=0)
+class EjecutorHashTestCase(TestCase):
+    """Tests para EjecutorHash y sus métricas."""
+
+    def setUp(self):
+        EjecutorHash.cerrar()
+
+    def tearDown(self):
+        EjecutorHash.cerrar()
+
+    def test_hash_en_el_pool(self):
+        """Test that hashing and verification run in the process pool"""
+        encoded = generar_hash('Secreta123')
+        self.assertEqual(verificar_password('Secreta123', encoded), (True, False))
+        self.assertEqual(verificar_password('otra', encoded), (False, False))
+        self.assertIsNotNone(EjecutorHash._ejecutor)
+
+    def test_saturado_falla_rapido(self):
+        """Test that a full pool raises HashSaturado instead of queueing"""
+        _, cupos = EjecutorHash._obtener()
+        cupos.acquire()
+        try:
+            with self.assertRaises(HashSaturado):
+                generar_hash('Secreta123')
+        finally:
+            cupos.release()
+        self.assertGreater(MetricsCollector.get_metrics()['HASH generar']['error_rate_pct'], 0)
+
+    @override_settings(HASH_WORKERS=0)
+    def test_sin_pool(self):
+        """Test that HASH_WORKERS=0 hashes in the calling thread"""
+        encoded = generar_hash('Secreta123')
+        self.assertTrue(verificar_password('Secreta123', encoded)[0])
+        self.assertIsNone(EjecutorHash._ejecutor)
+
+
+@override_settings(HASH_WORKERS=1, HASH_COLA_MAXIMA=0, HASH_ESPERA_SEGUNDOS=0)
+class LoginSaturadoTestCase(APITestCase):
+    """Tests para la respuesta de login cuando el pool está lleno."""
+
+    def setUp(self):
+        EjecutorHash.cerrar()
+        Usuario.objects.create_user(email='user@test.com', nombre='User', password='user1234', rol='cliente')
+
+    def tearDown(self):
+        EjecutorHash.cerrar()
+
+    def test_login_503_con_retry_after(self):
+        """Test that login answers 503 with Retry-After while hashing is saturated"""
+        _, cupos = EjecutorHash._obtener()
+        cupos.acquire()
+        try:
+            response = self.client.post(reverse('login'), {'email': 'user@test.com', 'password': 'user1234'})
+        finally:
+            cupos.release()
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertIn('Retry-After', response)
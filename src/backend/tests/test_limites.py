@@ -0,0 +1,80 @@
+"""
+Tests para el límite de intentos compartido (ventana deslizante y bloqueo).
+"""
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from apps.usuarios.models import Usuario
+from backend.services.limites import LimiteIntentos
+
+
+class LimiteIntentosTestCase(TestCase):
+    """Tests para LimiteIntentos.consumir y el bloqueo por email."""
+
+    def setUp(self):
+        self.limite = LimiteIntentos("prueba", limite=3, ventana=60, bloqueo_intentos=2, bloqueo_segundos=300)
+        self.request = RequestFactory().post("/", REMOTE_ADDR="10.0.0.1")
+        self.otra_ip = RequestFactory().post("/", REMOTE_ADDR="10.0.0.2")
+
+    def test_permite_hasta_el_limite(self):
+        """Test that attempts up to the limit pass and the next one waits"""
+        for _ in range(3):
+            self.assertEqual(self.limite.consumir(self.request, ahora=1000), 0)
+        self.assertGreater(self.limite.consumir(self.request, ahora=1000), 0)
+
+    def test_ventana_deslizante_cuenta_bloque_anterior(self):
+        """Test that attempts at the end of a window still count just after it"""
+        for _ in range(3):
+            self.limite.consumir(self.request, ahora=1019)
+        # 1 s después de cambiar de bloque el anterior pesa casi por completo
+        self.assertGreater(self.limite.consumir(self.request, ahora=1021), 0)
+        # Pasada una ventana completa vuelve a permitir
+        self.assertEqual(self.limite.consumir(self.request, ahora=1081), 0)
+
+    def test_limite_por_email_entre_ips(self):
+        """Test that the same email is limited across different IPs"""
+        for request in (self.request, self.otra_ip, self.request):
+            self.assertEqual(self.limite.consumir(request, "a@test.com", ahora=1000), 0)
+        self.assertGreater(self.limite.consumir(self.otra_ip, "A@test.com", ahora=1000), 0)
+
+    def test_bloqueo_tras_fallos(self):
+        """Test that repeated failures lock the email until the lockout expires"""
+        self.assertFalse(self.limite.registrar_fallo("a@test.com", ahora=1000))
+        self.assertTrue(self.limite.registrar_fallo("a@test.com", ahora=1000))
+        self.assertGreater(self.limite.consumir(self.otra_ip, "a@test.com", ahora=1100), 0)
+        self.assertEqual(self.limite.consumir(self.otra_ip, "a@test.com", ahora=1400), 0)
+
+    def test_reiniciar_descarta_fallos(self):
+        """Test that a successful login clears accumulated failures"""
+        self.limite.registrar_fallo("a@test.com")
+        self.limite.reiniciar("a@test.com")
+        self.assertFalse(self.limite.registrar_fallo("a@test.com"))
+
+
+class LoginLimiteTestCase(APITestCase):
+    """Tests para el límite aplicado en login y forgot_password."""
+
+    def setUp(self):
+        self.user = Usuario.objects.create_user(
+            email='user@test.com', nombre='User', password='user1234', rol='cliente'
+        )
+
+    def test_login_limitado_con_retry_after(self):
+        """Test that login returns 429 with Retry-After once the limit is reached"""
+        for _ in range(5):
+            self.client.post(reverse('login'), {'email': 'user@test.com', 'password': 'mala'})
+        response = self.client.post(reverse('login'), {'email': 'user@test.com', 'password': 'user1234'})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', response)
+
+    def test_forgot_password_limitado(self):
+        """Test that password reset requests are limited per email"""
+        for _ in range(3):
+            response = self.client.post(
+                reverse('forgot-password'), {'email': 'nadie@test.com'}, format='json'
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.post(reverse('forgot-password'), {'email': 'nadie@test.com'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
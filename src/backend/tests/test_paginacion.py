@@ -0,0 +1,124 @@
+"""
+Tests para la paginación por cursor (keyset).
+"""
+import json
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from apps.notificaciones.models import Notificacion, TipoNotificacion, EstadoNotificacion
+from apps.productos.models import Tienda, Pedido
+from apps.ventas.models import Venta
+
+Usuario = get_user_model()
+
+
+class KeysetPaginationTestCase(APITestCase):
+    """Tests para ?paginacion=cursor en los listados."""
+
+    def setUp(self):
+        self.user = Usuario.objects.create_user(
+            email='user@test.com', nombre='User', password='user123', rol='cliente'
+        )
+        self.tipo = TipoNotificacion.objects.create(nombre='EMAIL')
+        self.estado = EstadoNotificacion.objects.create(nombre='ENVIADA')
+        self.notificaciones = [self._crear(i) for i in range(7)]
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('notificacion-list')
+
+    def _crear(self, i):
+        return Notificacion.objects.create(
+            usuario=self.user, tipo=self.tipo, estado=self.estado,
+            mensaje=f'Mensaje {i}', destino='user@test.com'
+        )
+
+    def _recorrer(self, url, params=None):
+        ids = []
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids.extend(item['id'] for item in response.data['results'])
+            if not response.data['next']:
+                return ids
+            response = self.client.get(response.data['next'])
+
+    def test_recorre_todas_las_filas_en_orden(self):
+        """Test that following next links returns every row newest first"""
+        ids = self._recorrer(self.url, {'paginacion': 'cursor', 'page_size': 3})
+        esperados = [n.id for n in sorted(self.notificaciones, key=lambda n: (n.fecha_creacion, n.id), reverse=True)]
+        self.assertEqual(ids, esperados)
+
+    def test_no_ejecuta_count(self):
+        """Test that cursor pages skip the COUNT query"""
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(self.url, {'paginacion': 'cursor', 'page_size': 3})
+        self.assertNotIn('count', response.data)
+        self.assertFalse(any('COUNT(' in q['sql'].upper() for q in consultas.captured_queries))
+
+    def test_inserciones_no_desplazan_paginas(self):
+        """Test that rows inserted while paging do not repeat or skip rows"""
+        primera = self.client.get(self.url, {'paginacion': 'cursor', 'page_size': 3})
+        self._crear('nueva')
+        restantes = self._recorrer(primera.data['next'])
+        ids = [item['id'] for item in primera.data['results']] + restantes
+        self.assertEqual(sorted(ids), sorted(n.id for n in self.notificaciones))
+
+    def test_cursor_invalido(self):
+        """Test that a malformed cursor returns 404"""
+        response = self.client.get(self.url, {'cursor': 'no-es-un-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_paginacion_por_defecto_sin_cambios(self):
+        """Test that page number pagination stays the default"""
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['count'], 7)
+
+    def test_cola_de_trabajo_conserva_orden_ascendente(self):
+        """Test that cursor paging keeps oldest-first order on work queues"""
+        logistica = Usuario.objects.create_user(
+            email='log@test.com', nombre='Log', password='log12345', rol='logistica'
+        )
+        tienda = Tienda.objects.create(nombre='Tienda', direccion='Calle 1', administrador=self.user)
+        pedidos = [Pedido.objects.create(cliente=self.user, tienda=tienda) for _ in range(5)]
+        self.client.force_authenticate(user=logistica)
+
+        ids = self._recorrer(reverse('pedido-pendientes'), {'paginacion': 'cursor', 'page_size': 2})
+        self.assertEqual(ids, [p.id for p in sorted(pedidos, key=lambda p: (p.fecha_creacion, p.id))])
+
+
+class ReporteDiarioTestCase(APITestCase):
+    """Tests para la paginación y el streaming de reporte_diario."""
+
+    def setUp(self):
+        self.admin = Usuario.objects.create_user(
+            email='admin@test.com', nombre='Admin', password='admin123', rol='admin'
+        )
+        cliente = Usuario.objects.create_user(
+            email='cliente@test.com', nombre='Cliente', password='client123', rol='cliente'
+        )
+        tienda = Tienda.objects.create(nombre='Tienda', direccion='Calle 1', administrador=self.admin)
+        for _ in range(12):
+            pedido = Pedido.objects.create(cliente=cliente, tienda=tienda)
+            Venta.objects.create(pedido=pedido, cliente=cliente, total=Decimal('5.00'))
+        self.client.force_authenticate(user=self.admin)
+        self.url = reverse('venta-reporte-diario')
+
+    def test_reporte_paginado_con_totales(self):
+        """Test that totals cover the whole day while ventas is paged"""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['cantidad_ventas'], 12)
+        self.assertEqual(response.data['count'], 12)
+        self.assertEqual(len(response.data['ventas']), 10)
+
+    def test_reporte_stream(self):
+        """Test that the streamed report keeps totals and lists every sale"""
+        response = self.client.get(self.url, {'stream': '1'})
+        reporte = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(reporte['cantidad_ventas'], 12)
+        self.assertEqual(len(reporte['ventas']), 12)
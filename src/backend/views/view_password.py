@@ -6,8 +6,7 @@ User = get_user_model()
 from django.utils.encoding import force_bytes, force_str
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
-from django.core.mail import send_mail
-from django.conf import settings
+from backend.services.correo import enviar_correo
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
@@ -34,12 +33,10 @@ class ForgotPasswordView(APIView):
         reset_url = f"http://localhost:5173/reset-password/{uid}/{token}"
 
         # CORREO
-        send_mail(
-            subject="Restablecer contraseña",
-            message=f"Para restablecer tu contraseña, haz clic aquí:\n{reset_url}",
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[email],
-            fail_silently=False,
+        enviar_correo(
+            "Restablecer contraseña",
+            f"Para restablecer tu contraseña, haz clic aquí:\n{reset_url}",
+            [email],
         )
 
         return Response({"message": "Correo enviado"}, status=status.HTTP_200_OK)
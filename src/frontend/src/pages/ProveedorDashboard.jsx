@@ -9,6 +9,7 @@ import {
   getTiendas,
 } from "../services/productosService";
 import { axiosInstance } from "../services/api";
+import { recorrerPaginas } from "../services/paginacion";
 import "../styles/ProveedorDashboard.css";
 
 import DashboardHeader from "../components/DashboardHeader";
@@ -193,9 +194,9 @@ export default function ProveedorDashboard() {
 
   const cargarVentas = useCallback(async () => {
     try {
-      const res = await axiosInstance.get('/ventas/mis_ventas_proveedor/');
-      setVentas(res.data.ventas || []);
-      setTotalVendido(res.data.total_historico || 0);
+      const { items, data } = await recorrerPaginas('/ventas/mis_ventas_proveedor/', { clave: 'ventas' });
+      setVentas(items);
+      setTotalVendido(data.total_historico || 0);
     } catch (err) {
       console.error("Error cargando ventas:", err);
     }
@@ -0,0 +1,43 @@
+// frontend/src/services/paginacion.js
+import api from './api';
+
+/**
+ * Helpers para los listados paginados del backend
+ */
+
+const PAGE_SIZE = 100;
+
+/**
+ * Recorre un listado siguiendo `next` hasta la última página.
+ * @param {string} url - Endpoint del listado
+ * @param {Object} opciones
+ * @param {Object} opciones.params - Parámetros de la primera petición
+ * @param {string} opciones.clave - Clave de la lista en la respuesta (`results`, `ventas`, ...)
+ * @returns {{items: Array, data: Object}} Todos los elementos y la primera respuesta (totales, etc.)
+ */
+export const recorrerPaginas = async (url, { params = {}, clave = 'results' } = {}) => {
+  let response = await api.get(url, { params: { page_size: PAGE_SIZE, ...params } });
+  const primera = response.data;
+  // Endpoints sin paginar
+  if (Array.isArray(primera)) return { items: primera, data: primera };
+
+  const items = [...(primera?.[clave] || [])];
+  while (response.data?.next) {
+    response = await api.get(response.data.next);
+    items.push(...(response.data?.[clave] || []));
+  }
+  return { items, data: primera };
+};
+
+/**
+ * Obtener todos los elementos de un listado paginado
+ */
+export const obtenerTodos = async (url, params = {}) => {
+  const { items } = await recorrerPaginas(url, { params });
+  return items;
+};
+
+export default {
+  recorrerPaginas,
+  obtenerTodos,
+};
@@ -1,5 +1,6 @@
 // frontend/src/services/productosService.js
 import api from './api';
+import { obtenerTodos } from './paginacion';
 
 /**
  * Servicio para gestión de tiendas, productos y pedidos
@@ -12,9 +13,7 @@ import api from './api';
  */
 export const getTiendas = async () => {
   try {
-    const response = await api.get('/productos/tiendas/');
-    if (response.data && response.data.results) return response.data.results;
-    return response.data;
+    return await obtenerTodos('/productos/tiendas/');
   } catch (error) {
     console.error('[productosService] Error getting tiendas:', error);
     throw error;
@@ -26,8 +25,7 @@ export const getTiendas = async () => {
  */
 export const getMisTiendas = async () => {
   try {
-    const response = await api.get('/productos/tiendas/mis_tiendas/');
-    return response.data;
+    return await obtenerTodos('/productos/tiendas/mis_tiendas/');
   } catch (error) {
     console.error('[productosService] Error getting mis tiendas:', error);
     throw error;
@@ -80,9 +78,7 @@ export const eliminarTienda = async (tiendaId) => {
  */
 export const getProductos = async () => {
   try {
-    const response = await api.get('/productos/productos/');
-    if (response.data && response.data.results) return response.data.results;
-    return response.data;
+    return await obtenerTodos('/productos/productos/');
   } catch (error) {
     console.error('[productosService] Error getting productos:', error);
     throw error;
@@ -94,8 +90,7 @@ export const getProductos = async () => {
  */
 export const getProductosPorTienda = async (tiendaId) => {
   try {
-    const response = await api.get(`/productos/productos/por_tienda/?tienda_id=${tiendaId}`);
-    return response.data;
+    return await obtenerTodos('/productos/productos/por_tienda/', { tienda_id: tiendaId });
   } catch (error) {
     console.error('[productosService] Error getting productos por tienda:', error);
     throw error;
@@ -162,8 +157,7 @@ export const eliminarProducto = async (productoId) => {
  */
 export const getMisProductos = async () => {
   try {
-    const response = await api.get('/productos/productos/mis_productos/');
-    return response.data;
+    return await obtenerTodos('/productos/productos/mis_productos/');
   } catch (error) {
     console.error('[productosService] Error getting mis productos:', error);
     throw error;
@@ -225,8 +219,7 @@ export const asignarProveedor = async (productoId, proveedorId) => {
  */
 export const getMisPedidos = async () => {
   try {
-    const response = await api.get('/productos/pedidos/mis_pedidos/');
-    return response.data;
+    return await obtenerTodos('/productos/pedidos/mis_pedidos/');
   } catch (error) {
     console.error('[productosService] Error getting mis pedidos:', error);
     throw error;
@@ -238,9 +231,7 @@ export const getMisPedidos = async () => {
  */
 export const getPedidos = async () => {
   try {
-    const response = await api.get('/productos/pedidos/');
-    if (response.data && response.data.results) return response.data.results;
-    return response.data;
+    return await obtenerTodos('/productos/pedidos/');
   } catch (error) {
     console.error('[productosService] Error getting pedidos:', error);
     throw error;
@@ -299,8 +290,7 @@ export const cambiarEstadoPedido = async (pedidoId, nuevoEstado) => {
  */
 export const getPedidosPendientes = async () => {
   try {
-    const response = await api.get('/productos/pedidos/pendientes/');
-    return response.data;
+    return await obtenerTodos('/productos/pedidos/pendientes/');
   } catch (error) {
     console.error('[productosService] Error getting pedidos pendientes:', error);
     throw error;
@@ -312,8 +302,7 @@ export const getPedidosPendientes = async () => {
  */
 export const getPedidosEnPreparacion = async () => {
   try {
-    const response = await api.get('/productos/pedidos/en_preparacion/');
-    return response.data;
+    return await obtenerTodos('/productos/pedidos/en_preparacion/');
   } catch (error) {
     console.error('[productosService] Error getting pedidos en preparación:', error);
     throw error;
@@ -325,8 +314,7 @@ export const getPedidosEnPreparacion = async () => {
  */
 export const getDetallesPedido = async (pedidoId) => {
   try {
-    const response = await api.get(`/productos/detalles-pedido/por_pedido/?pedido_id=${pedidoId}`);
-    return response.data;
+    return await obtenerTodos('/productos/detalles-pedido/por_pedido/', { pedido_id: pedidoId });
   } catch (error) {
     console.error('[productosService] Error getting detalles pedido:', error);
     throw error;
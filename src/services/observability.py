@@ -18,6 +18,15 @@ class MetricsCollector:
         if status_code >= 500:
             cls._metrics[key]['errors'] += 1
 
+    @classmethod
+    def record_hash(cls, operation, duration, saturado=False):
+        """Latency of password hashing; rejections for lack of capacity count as errors."""
+        key = f"HASH {operation}"
+        cls._metrics[key]['count'] += 1
+        cls._metrics[key]['total_time'] += duration
+        if saturado:
+            cls._metrics[key]['errors'] += 1
+
     @classmethod
     def get_metrics(cls):
         results = {}